@@ -0,0 +1,73 @@
+"""Scan several Xcode installs at once, one worker process per install."""
+
+import copy
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import open_file_cache
+from generate import update_output_dir
+from timings import TimingsRecorder, add_stage_hook, remove_stage_hook
+
+
+def generate_for_xcode_install(args, xcode_path):
+    """Scan one Xcode install of a batch, and write its files to
+    OUTPUT_DIR/Xcode-<version>/.
+
+    Runs in a worker process. Returns a (xcode_path, version, error, timings)
+    tuple rather than raising, so one broken install doesn't abort the whole
+    batch. timings are the records of the worker's stages, with --timings.
+    """
+    args = copy.copy(args)
+    args.xcode_path = xcode_path
+
+    # Hooks registered in the main process don't see the worker's stages
+    timings_recorder = TimingsRecorder() if args.timings else None
+    if timings_recorder:
+        add_stage_hook(timings_recorder)
+
+    version = None
+    error = None
+    try:
+        version_info = update_output_dir(
+            args,
+            xcspec_cache=open_file_cache(args, "xcspec"),
+            checkers_cache=open_file_cache(args, "clang-checkers"),
+            versioned_output_dir=True,
+        )
+        version = version_info[0]
+    except Exception as exception:  # pylint: disable=broad-except
+        error = f"{type(exception).__name__}: {exception}"
+    finally:
+        if timings_recorder:
+            remove_stage_hook(timings_recorder)
+
+    timings = timings_recorder.stages if timings_recorder else None
+    return xcode_path, version, error, timings
+
+
+def generate_batch(args, timings_recorder=None):
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(
+            executor.map(
+                generate_for_xcode_install,
+                itertools.repeat(args),
+                args.xcode_paths,
+            )
+        )
+
+    if timings_recorder:
+        for xcode_path, _, _, timings in results:
+            timings_recorder.add_records(timings, xcode_path=xcode_path)
+
+    failures = [result for result in results if result[2] is not None]
+
+    print(
+        f"\nScanned {len(results)} Xcode installs, {len(failures)} failed",
+        file=sys.stderr,
+    )
+    for xcode_path, version, error, _ in failures:
+        version = f" ({version})" if version else ""
+        print(f"  {xcode_path}{version}: {error}", file=sys.stderr)
+
+    return 1 if failures else 0
@@ -0,0 +1,183 @@
+#! /usr/bin/env python3
+
+"""Compare the ways warnings2xcconfig can read Xcode's property lists.
+
+- a whole xcspec: the built-in OpenStep reader, and the plutil + plistlib path
+  (only measured when `plutil` is available, i.e. on macOS),
+- the queried tools of a xcspec: a whole read, then a selective one skipping
+  the other tools,
+- the shared settings of the project template: `plistlib`, then the
+  selective XML reader.
+"""
+
+import argparse
+import plistlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from synthetic import template_info_plist, xcspec_text  # noqa: E402
+import openstep_plist  # noqa: E402
+import xcspec  # noqa: E402
+import xml_plist  # noqa: E402
+
+QUERIED_TOOLS = xcspec.queried_tools(xcspec.CLANG_XCSPEC_QUERIES)
+SHARED_SETTINGS_KEY_PATH = ("Project", "SharedSettings")
+
+
+def measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak, result
+
+
+def parse_with_plutil(xcspec_path):
+    with tempfile.NamedTemporaryFile() as xml_file:
+        subprocess.check_call(
+            ["plutil", "-convert", "xml1", xcspec_path, "-o", xml_file.name]
+        )
+        return plistlib.load(xml_file)
+
+
+def parse_with_openstep_plist(xcspec_path):
+    with open(xcspec_path, "rb") as xcspec_fp:
+        return openstep_plist.load(xcspec_fp)
+
+
+def read_queried_tools_whole(xcspec_path):
+    return [
+        tool
+        for tool in parse_with_openstep_plist(xcspec_path)
+        if tool["Identifier"] in QUERIED_TOOLS
+    ]
+
+
+def read_queried_tools_selective(xcspec_path):
+    return xcspec.XSpecParser.read_xcspec(xcspec_path, tool_identifiers=QUERIED_TOOLS)
+
+
+def read_shared_settings_whole(template_path):
+    with open(template_path, "rb") as template_fp:
+        # pylint: disable=no-member
+        # This is a pylint false positive.
+        template_info = plistlib.load(template_fp, fmt=plistlib.FMT_XML)
+    return template_info["Project"]["SharedSettings"]
+
+
+def read_shared_settings_selective(template_path):
+    with open(template_path, "rb") as template_fp:
+        return xml_plist.load_key_path(template_fp, SHARED_SETTINGS_KEY_PATH)
+
+
+def compare(candidates, file_path, repeat):
+    """Measure each (name, func) reading file_path, and check they agree."""
+    results = []
+    for name, func in candidates:
+        elapsed, peak, result = measure(lambda f=func: f(file_path), repeat)
+        results.append(result)
+        print(
+            f"{name:>20}: {elapsed * 1000:8.1f} ms, "
+            f"peak {peak / 1024 / 1024:6.1f} MiB (Python heap)"
+        )
+
+    if any(result != results[0] for result in results[1:]):
+        print("error: the readers disagree on the parsed structure")
+        sys.exit(1)
+
+
+def _write(file_path, content):
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(file_path, mode) as out_fp:
+        out_fp.write(content)
+    return path.getsize(file_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--options", type=int, default=10000)
+    parser.add_argument(
+        "--unrelated-tools",
+        type=int,
+        default=3,
+        help="tools of the xcspec which aren't queried",
+    )
+    parser.add_argument(
+        "--other-settings",
+        type=int,
+        default=20000,
+        help="settings of the project template outside of the shared settings",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xcspec_path = path.join(tmp_dir, "Synthetic.xcspec")
+        size = _write(xcspec_path, xcspec_text(args.options, analyzer_options=500))
+        print(f"Synthetic xcspec: {args.options} options, {size / 1024:.0f} KiB")
+
+        candidates = [("openstep_plist", parse_with_openstep_plist)]
+        if shutil.which("plutil"):
+            candidates.append(("plutil + plistlib", parse_with_plutil))
+        else:
+            print("plutil not found, skipping the plutil + plistlib path")
+        compare(candidates, xcspec_path, args.repeat)
+
+        size = _write(
+            xcspec_path,
+            xcspec_text(
+                args.options,
+                analyzer_options=500,
+                unrelated_tools=args.unrelated_tools,
+            ),
+        )
+        print(
+            f"\nQueried tools of a xcspec with {args.unrelated_tools} other tools, "
+            f"{size / 1024:.0f} KiB"
+        )
+        compare(
+            [
+                ("whole xcspec", read_queried_tools_whole),
+                ("selective", read_queried_tools_selective),
+            ],
+            xcspec_path,
+            args.repeat,
+        )
+
+        template_path = path.join(tmp_dir, "TemplateInfo.plist")
+        size = _write(
+            template_path,
+            template_info_plist(args.options, other_settings=args.other_settings),
+        )
+        print(
+            f"\nShared settings of a project template with {args.other_settings} "
+            f"other settings, {size / 1024:.0f} KiB"
+        )
+        compare(
+            [
+                ("plistlib", read_shared_settings_whole),
+                ("selective", read_shared_settings_selective),
+            ],
+            template_path,
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,529 @@
+#! /usr/bin/env python3
+
+"""Check warnings2xcconfig end to end, without a Mac, against recorded Xcodes.
+
+On a Mac, `record` copies the files an Xcode install is read from (xcspecs,
+TemplateInfo.plist and version.plist), and the output of the commands run on
+it (`xcodebuild -version` and clang's checkers help), to a fixture:
+
+    python3 benchmarks/replay.py record -x /Applications/Xcode.app
+
+`record --synthetic` records a small install generated by synthetic.py
+instead, with its own golden output (in golden/, as no Xcode-<version>/
+folder is committed for it). The golden files are written by the script given
+with --golden-script, run like dump_all_styles.sh runs it, with a stub
+`plutil` converting the xcspecs from the data synthetic.py generated them
+from: e.g. a version of warnings2xcconfig.py predating the code under test.
+
+    git show <commit>:warnings2xcconfig.py > /tmp/reference.py
+    python3 benchmarks/replay.py record --synthetic --golden-script /tmp/reference.py
+
+Then, on any OS, `check` rebuilds a fake Xcode.app tree from each fixture,
+with stub `xcodebuild` and `clang` replaying the recorded output, and runs
+the command of `dump_all_styles.sh` on it, with the cache disabled. It fails
+if:
+- the files differ from the committed Xcode-<version>/ folder (or the
+  fixture's golden/ folder), byte for byte;
+- or the peak RSS of the run exceeds the limit stored in the fixture.
+
+    python3 benchmarks/replay.py check
+
+The wall time of the run is reported, but never fails the check: it varies
+too much between machines, and with their load.
+
+`check --update-limits` stores the measured peak RSS, plus a margin, as the
+new limit.
+"""
+
+import argparse
+import difflib
+import glob
+import json
+import os
+import plistlib
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from os import path
+
+ROOT_DIR = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# pylint: disable=wrong-import-position
+import xcode  # noqa: E402
+
+FIXTURE_FORMAT_VERSION = 1
+
+FIXTURE_FILENAME = "fixture.json"
+
+DEFAULT_FIXTURES_DIR = path.join(ROOT_DIR, "benchmarks", "fixtures")
+
+SCRIPT_PATH = path.join(ROOT_DIR, "warnings2xcconfig.py")
+
+# The options of dump_all_styles.sh, which wrote the Xcode-<version>/ folders
+GOLDEN_ARGS = ["--new-syntax", "--all-styles"]
+
+# The limits stored by --update-limits, relative to the measured values. They
+# are checked on CI machines, which differ from the one which stored them.
+LIMIT_MARGINS = {"peak_rss_mib": 1.5}
+
+# The install recorded by --synthetic: small enough to commit, with every kind
+# of option the script handles
+SYNTHETIC_INSTALL = {
+    "options_count": 200,
+    "based_on_depth": 4,
+    "analyzer_options": 20,
+    "swift_options": 40,
+    "checkers_count": 60,
+}
+
+# The expected output of a fixture with no committed Xcode-<version>/ folder
+GOLDEN_DIRNAME = "golden"
+
+# The styles dump_all_styles.sh writes, one run of the script each
+GOLDEN_STYLES = ["clang", "xcode", "strict", "aggressive"]
+
+# Both are recorded, whatever the options replayed
+CLANG_HELP_FLAGS = ["-analyzer-checker-help", "-analyzer-checker-help-alpha"]
+
+
+class FixtureError(Exception):
+    pass
+
+
+def _rel_path(xcode_path, file_path):
+    return path.relpath(file_path, xcode_path)
+
+
+def recorded_file_paths(xcode_path):
+    """Return the files of the install the script reads, besides executables."""
+    file_paths = [
+        xcode.named_xcspec_path(xcode_path, name) for name in xcode.XCSPECS
+    ] + [xcode.template_info_path(xcode_path)]
+    version_plist = xcode.xcode_version_plist(xcode_path)
+    if version_plist:
+        file_paths.append(version_plist[0])
+    return file_paths
+
+
+def recorded_commands(xcode_path):
+    """Return the (executable, arguments, output filename) of the commands the
+    script runs."""
+    clang_path = xcode.default_toolchain_bin_path(xcode_path, "clang")
+    commands = [(xcode.xcodebuild_path(xcode_path), ["-version"], "xcodebuild-version")]
+    for help_flag in CLANG_HELP_FLAGS:
+        commands.append((clang_path, ["-cc1", help_flag], f"clang{help_flag}"))
+    return commands
+
+
+def record_fixture(xcode_path, fixtures_dir):
+    """Record the Xcode install as a fixture in fixtures_dir, and return its
+    directory."""
+    version_info = xcode.read_xcode_version(xcode_path)
+    fixture_dir = path.join(fixtures_dir, f"Xcode-{version_info[0]}")
+    if path.exists(fixture_dir):
+        shutil.rmtree(fixture_dir)
+
+    files = []
+    for file_path in recorded_file_paths(xcode_path):
+        rel_path = _rel_path(xcode_path, file_path)
+        os.makedirs(
+            path.join(fixture_dir, "files", path.dirname(rel_path)), exist_ok=True
+        )
+        shutil.copyfile(file_path, path.join(fixture_dir, "files", rel_path))
+        files.append(rel_path)
+
+    commands = {}
+    os.makedirs(path.join(fixture_dir, "commands"))
+    for executable, arguments, output_name in recorded_commands(xcode_path):
+        try:
+            output = subprocess.check_output(
+                [executable] + arguments, stderr=subprocess.DEVNULL
+            )
+        except (OSError, subprocess.CalledProcessError):
+            # e.g. clang versions without alpha checkers help
+            continue
+
+        with open(path.join(fixture_dir, "commands", output_name), "wb") as out_fp:
+            out_fp.write(output)
+        commands.setdefault(_rel_path(xcode_path, executable), {})[
+            " ".join(arguments)
+        ] = output_name
+
+    write_fixture(
+        fixture_dir,
+        {
+            "version": FIXTURE_FORMAT_VERSION,
+            "xcode_version": list(version_info),
+            "files": files,
+            "commands": commands,
+            "limits": None,
+        },
+    )
+    return fixture_dir
+
+
+def read_fixture(fixture_dir):
+    try:
+        with open(path.join(fixture_dir, FIXTURE_FILENAME), encoding="utf-8") as fp:
+            fixture = json.load(fp)
+    except (OSError, ValueError) as error:
+        raise FixtureError(f"Can't read fixture {fixture_dir}: {error}") from error
+
+    if fixture.get("version") != FIXTURE_FORMAT_VERSION:
+        raise FixtureError(f"Fixture {fixture_dir} has an unsupported format")
+    return fixture
+
+
+def write_fixture(fixture_dir, fixture):
+    with open(path.join(fixture_dir, FIXTURE_FILENAME), "w", encoding="utf-8") as fp:
+        json.dump(fixture, fp, indent=2, sort_keys=True)
+        fp.write("\n")
+
+
+def _stub_script(invocations, outputs_dir):
+    lines = ["#!/bin/sh", 'case "$*" in']
+    for arguments, output_name in sorted(invocations.items()):
+        output_path = shlex.quote(path.join(outputs_dir, output_name))
+        lines.append(f"    {shlex.quote(arguments)}) cat {output_path} ;;")
+    lines += [
+        '    *) echo "unrecorded invocation: $0 $*" >&2; exit 1 ;;',
+        "esac",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def replay_command(xcode_path, output_dir):
+    """The command of dump_all_styles.sh, without the cache."""
+    return [sys.executable, SCRIPT_PATH, "-x", xcode_path, *GOLDEN_ARGS] + [
+        "--no-cache",
+        "--output-dir",
+        output_dir,
+    ]
+
+
+def _plutil_stub(xcspec_plists):
+    """Return a `plutil -convert xml1 FILE -o OUTPUT` stub copying the XML of
+    each xcspec, by file name, from xcspec_plists."""
+    lines = ["#!/bin/sh", 'case "$3" in']
+    for name, plist_path in sorted(xcspec_plists.items()):
+        lines.append(f'    */{shlex.quote(name)}) cp {shlex.quote(plist_path)} "$5" ;;')
+    lines += [
+        '    *) echo "unrecorded xcspec: $3" >&2; exit 1 ;;',
+        "esac",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def _plutil_stub_env(xcspecs, tmp_dir):
+    """Write a stub `plutil` to tmp_dir, and return the environment running
+    it instead of the real one."""
+    xcspec_plists = {}
+    for name, tools in xcspecs.items():
+        xcspec_plists[name] = path.join(tmp_dir, f"{name}.plist")
+        with open(xcspec_plists[name], "wb") as plist_fp:
+            plistlib.dump(tools, plist_fp)
+
+    bin_dir = path.join(tmp_dir, "bin")
+    os.makedirs(bin_dir)
+    with open(path.join(bin_dir, "plutil"), "w", encoding="utf-8") as stub_fp:
+        stub_fp.write(_plutil_stub(xcspec_plists))
+    os.chmod(path.join(bin_dir, "plutil"), 0o755)
+
+    return dict(os.environ, PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def record_golden(fixture_dir, golden_script, xcspecs):
+    """Store the files golden_script writes for the fixture as its golden
+    output. xcspecs are the tools of each xcspec, by file name, which a stub
+    `plutil` converts to XML."""
+    fixture = read_fixture(fixture_dir)
+    golden_dir = path.join(fixture_dir, GOLDEN_DIRNAME)
+    os.makedirs(golden_dir)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xcode_path = build_fake_xcode(
+            fixture_dir, fixture, path.join(tmp_dir, "Xcode.app")
+        )
+
+        env = _plutil_stub_env(xcspecs, tmp_dir)
+
+        for style in GOLDEN_STYLES:
+            golden_path = path.join(
+                golden_dir, f"Warnings-{style.capitalize()}Defaults.xcconfig"
+            )
+            with open(golden_path, "wb") as golden_fp:
+                subprocess.run(
+                    [sys.executable, golden_script, "-x", xcode_path]
+                    + ["--new-syntax", "--defaults", style],
+                    stdout=golden_fp,
+                    env=env,
+                    check=True,
+                )
+
+
+def record_synthetic(fixtures_dir, golden_script):
+    """Record a synthetic install, and its golden output, as a fixture."""
+    # pylint: disable=import-outside-toplevel
+    # Only needed here, and imports benchmarks-only modules
+    import synthetic
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xcode_path = synthetic.make_fake_xcode(
+            path.join(tmp_dir, "Xcode.app"), **SYNTHETIC_INSTALL
+        )
+        fixture_dir = record_fixture(xcode_path, fixtures_dir)
+
+    xcspecs = synthetic.install_xcspecs(
+        options_count=SYNTHETIC_INSTALL["options_count"],
+        based_on_depth=SYNTHETIC_INSTALL["based_on_depth"],
+        analyzer_options=SYNTHETIC_INSTALL["analyzer_options"],
+        swift_options=SYNTHETIC_INSTALL["swift_options"],
+    )
+    record_golden(
+        fixture_dir,
+        golden_script,
+        {path.basename(rel_path): tools for rel_path, tools in xcspecs.items()},
+    )
+    return fixture_dir
+
+
+def build_fake_xcode(fixture_dir, fixture, xcode_path):
+    """Create an Xcode.app-like tree at xcode_path, replaying the fixture."""
+    for rel_path in fixture["files"]:
+        file_path = path.join(xcode_path, rel_path)
+        os.makedirs(path.dirname(file_path), exist_ok=True)
+        shutil.copyfile(path.join(fixture_dir, "files", rel_path), file_path)
+
+    outputs_dir = path.abspath(path.join(fixture_dir, "commands"))
+    for rel_path, invocations in fixture["commands"].items():
+        stub_path = path.join(xcode_path, rel_path)
+        os.makedirs(path.dirname(stub_path), exist_ok=True)
+        with open(stub_path, "w", encoding="utf-8") as stub_fp:
+            stub_fp.write(_stub_script(invocations, outputs_dir))
+        os.chmod(stub_path, 0o755)
+
+    return xcode_path
+
+
+def _max_rss_mib(rusage):
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    max_rss = rusage.ru_maxrss
+    if sys.platform == "darwin":
+        max_rss /= 1024
+    return max_rss / 1024
+
+
+def run_measured(command, log_path):
+    """Run command, and return its (exit status, wall time, peak RSS in MiB)."""
+    with open(log_path, "wb") as log_fp:
+        start = time.perf_counter()
+        with subprocess.Popen(command, stdout=log_fp, stderr=log_fp) as process:
+            # The resource usage of this child only, unlike RUSAGE_CHILDREN
+            _, wait_status, rusage = os.wait4(process.pid, 0)
+            # Popen.wait() would wait for a process already reaped
+            process.returncode = os.waitstatus_to_exitcode(wait_status)
+        wall_time = time.perf_counter() - start
+
+    return process.returncode, wall_time, _max_rss_mib(rusage)
+
+
+def diff_output_dirs(golden_dir, output_dir):
+    """Return the differences between the xcconfig files of both folders, as
+    lines of text."""
+    golden_files = {path.basename(p) for p in glob.glob(path.join(golden_dir, "*"))}
+    output_files = {
+        path.basename(p) for p in glob.glob(path.join(output_dir, "*.xcconfig"))
+    }
+
+    differences = [f"missing {name}" for name in sorted(golden_files - output_files)]
+    differences += [
+        f"unexpected {name}" for name in sorted(output_files - golden_files)
+    ]
+    for name in sorted(golden_files & output_files):
+        with open(path.join(golden_dir, name), "rb") as golden_fp:
+            golden = golden_fp.read()
+        with open(path.join(output_dir, name), "rb") as output_fp:
+            output = output_fp.read()
+        if golden == output:
+            continue
+
+        diff = difflib.unified_diff(
+            golden.decode("utf-8", "replace").splitlines(),
+            output.decode("utf-8", "replace").splitlines(),
+            f"{golden_dir}/{name}",
+            f"{output_dir}/{name}",
+            lineterm="",
+        )
+        differences += list(diff)[:40]
+
+    return differences
+
+
+def measure(command, repeat, log_path):
+    """Run command repeat times, and return its best wall time, which only
+    varies with the machine's load, and its highest peak RSS."""
+    measured = {}
+    for _ in range(repeat):
+        status, wall_time, peak_rss_mib = run_measured(command, log_path)
+        if status:
+            with open(log_path, encoding="utf-8", errors="replace") as log_fp:
+                raise FixtureError(f"exit status {status}:\n{log_fp.read()}")
+
+        measured["wall_time"] = min(wall_time, measured.get("wall_time", wall_time))
+        measured["peak_rss_mib"] = max(
+            peak_rss_mib, measured.get("peak_rss_mib", peak_rss_mib)
+        )
+
+    return measured
+
+
+def check_limits(fixture, measured):
+    if fixture["limits"] is None:
+        return ["no limits stored, run check --update-limits"]
+
+    return [
+        f"{name} {measured[name]:.3f} exceeds {limit}"
+        for name, limit in sorted(fixture["limits"].items())
+        if name in LIMIT_MARGINS and measured[name] > limit
+    ]
+
+
+def check_fixture(fixture_dir, golden_root, repeat, update_limits=False):
+    """Replay a fixture, and return the list of its failures."""
+    fixture = read_fixture(fixture_dir)
+    golden_dir = path.join(fixture_dir, GOLDEN_DIRNAME)
+    if not path.isdir(golden_dir):
+        golden_dir = path.join(golden_root, f"Xcode-{fixture['xcode_version'][0]}")
+    if not path.isdir(golden_dir):
+        return [f"no golden folder {golden_dir}"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xcode_path = build_fake_xcode(
+            fixture_dir, fixture, path.join(tmp_dir, "Xcode.app")
+        )
+        output_dir = path.join(tmp_dir, "output")
+        os.makedirs(output_dir)
+        command = replay_command(xcode_path, output_dir)
+
+        measured = measure(command, repeat, path.join(tmp_dir, "log"))
+        failures = diff_output_dirs(golden_dir, output_dir)
+
+    print(
+        f"{path.basename(fixture_dir)}: {measured['wall_time'] * 1000:.0f} ms, "
+        f"peak RSS {measured['peak_rss_mib']:.1f} MiB"
+    )
+
+    if update_limits:
+        fixture["limits"] = {
+            name: round(measured[name] * margin, 3)
+            for name, margin in LIMIT_MARGINS.items()
+        }
+        write_fixture(fixture_dir, fixture)
+    else:
+        failures += check_limits(fixture, measured)
+
+    return failures
+
+
+def find_fixtures(fixtures_dir):
+    return sorted(
+        path.dirname(p)
+        for p in glob.glob(path.join(fixtures_dir, "*", FIXTURE_FILENAME))
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="record an Xcode install")
+    record_source = record_parser.add_mutually_exclusive_group()
+    record_source.add_argument(
+        "-x",
+        "--xcode-path",
+        help="the Xcode install to record (default is the one of xcode-select)",
+    )
+    record_source.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="record a small synthetic install, and the files written for it",
+    )
+    record_parser.add_argument(
+        "--golden-script",
+        default=SCRIPT_PATH,
+        help="with --synthetic, the script writing the golden files "
+        "(default is the one under test)",
+    )
+    record_parser.add_argument(
+        "--fixtures-dir", default=DEFAULT_FIXTURES_DIR, help="where to write it"
+    )
+
+    check_parser = subparsers.add_parser("check", help="replay the fixtures")
+    check_parser.add_argument(
+        "fixtures",
+        nargs="*",
+        metavar="FIXTURE",
+        help="fixture directories (default is all of --fixtures-dir)",
+    )
+    check_parser.add_argument("--fixtures-dir", default=DEFAULT_FIXTURES_DIR)
+    check_parser.add_argument(
+        "--golden-dir",
+        default=ROOT_DIR,
+        help="where the Xcode-<version>/ folders are, for fixtures without a "
+        "golden/ folder (default is the repository)",
+    )
+    check_parser.add_argument("--repeat", type=int, default=3)
+    check_parser.add_argument(
+        "--update-limits",
+        action="store_true",
+        help="store the measured peak RSS as the new limit",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == "record":
+        if args.synthetic:
+            fixture_dir = record_synthetic(args.fixtures_dir, args.golden_script)
+        else:
+            xcode_path = args.xcode_path or xcode.selected_xcode_path()
+            fixture_dir = record_fixture(xcode_path, args.fixtures_dir)
+        print(f"Recorded {fixture_dir}")
+        return 0
+
+    fixture_dirs = args.fixtures or find_fixtures(args.fixtures_dir)
+    if not fixture_dirs:
+        print(f"error: no fixtures in {args.fixtures_dir}", file=sys.stderr)
+        return 1
+
+    failed = 0
+    for fixture_dir in fixture_dirs:
+        try:
+            failures = check_fixture(
+                fixture_dir, args.golden_dir, args.repeat, args.update_limits
+            )
+        except FixtureError as error:
+            failures = [str(error)]
+
+        if failures:
+            failed += 1
+            print(f"FAIL {path.basename(fixture_dir)}")
+            for failure in failures:
+                print(f"    {failure}")
+
+    print(f"{len(fixture_dirs) - failed}/{len(fixture_dirs)} fixtures passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
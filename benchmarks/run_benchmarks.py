@@ -0,0 +1,378 @@
+#! /usr/bin/env python3
+
+"""Time each stage of warnings2xcconfig on a synthetic Xcode install.
+
+A fake Xcode.app tree, with large xcspecs and stub `clang`/`xcodebuild`
+executables, is generated in a temporary directory, so this runs on any OS.
+
+The cold start of the command line is measured too: the time to import the
+script (from `python -X importtime`), runs whose output is up to date, as a
+script and as a .pyz archive, and an `index` query from the .pyz archive.
+These should only take tens of milliseconds more than starting the
+interpreter (`python_startup`).
+
+Results can be saved as JSON with --output, and compared with a previous run
+with --compare, to spot regressions between commits.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import path
+
+ROOT_DIR = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# pylint: disable=wrong-import-position
+import synthetic  # noqa: E402
+import clang_analyzer  # noqa: E402
+import generate  # noqa: E402
+import xcode  # noqa: E402
+import xcspec  # noqa: E402
+import build_pyz  # noqa: E402
+import snapshot  # noqa: E402
+
+RESULTS_FORMAT_VERSION = 1
+
+
+class _NullWriter(io.TextIOBase):
+    def write(self, s):
+        return len(s)
+
+
+class Context:
+    """State handed from one stage to the next."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, xcode_path):
+        self.xcode_path = xcode_path
+        self.clang_parser = None
+        self.swift_parser = None
+        self.options_groups = None
+        self.clang_helps = None
+        self.analyzer_flags = None
+        self.counts = {}
+
+
+def stage_spec_load(ctx):
+    clang_xcspec_path = xcode.xcspec_path(ctx.xcode_path, "Clang LLVM 1.0")
+    swift_xcspec_path = xcode.xcspec_path(ctx.xcode_path, "XCLanguageSupport", "Swift")
+    ctx.clang_parser = xcspec.XSpecParser(
+        xcspec_root=xcspec.XSpecParser.read_xcspec(
+            clang_xcspec_path,
+            tool_identifiers=xcspec.queried_tools(xcspec.CLANG_XCSPEC_QUERIES),
+        )
+    )
+    ctx.swift_parser = xcspec.XSpecParser(
+        xcspec_root=xcspec.XSpecParser.read_xcspec(
+            swift_xcspec_path,
+            tool_identifiers=xcspec.queried_tools(xcspec.SWIFT_XCSPEC_QUERIES),
+        )
+    )
+
+
+def stage_parse_options(ctx):
+    clang_queries = [
+        xcspec.CLANG_WARNINGS_QUERY,
+        xcspec.CLANG_UBSAN_POLICY_QUERY,
+        xcspec.CLANG_ANALYZER_QUERY,
+    ]
+    ctx.options_groups = xcspec.flatten(ctx.clang_parser.query_options(clang_queries))
+    ctx.options_groups += xcspec.flatten(
+        ctx.swift_parser.query_options([xcspec.SWIFT_WARNINGS_QUERY])
+    )
+    ctx.counts["options"] = sum(len(g.options) for g in ctx.options_groups)
+
+
+def stage_load_xcode_defaults(ctx):
+    generate.load_xcode_defaults(ctx.xcode_path, ctx.options_groups)
+
+
+def stage_read_clang_help(ctx):
+    clang_bin_path = xcode.default_toolchain_bin_path(ctx.xcode_path, "clang")
+    ctx.clang_helps = {
+        help_flag: subprocess.check_output([clang_bin_path, "-cc1", help_flag]).decode()
+        for help_flag in ["-analyzer-checker-help", "-analyzer-checker-help-alpha"]
+    }
+
+
+def stage_parse_help(ctx):
+    all_xspec_options = [o for g in ctx.options_groups for o in g.options]
+    clang_bin_path = xcode.default_toolchain_bin_path(ctx.xcode_path, "clang")
+
+    ctx.analyzer_flags = []
+    for help_flag, clang_help in ctx.clang_helps.items():
+        help_parser = clang_analyzer.ClangHelpParser(
+            clang_bin_path, help_flag=help_flag, all_xspec_options=all_xspec_options
+        )
+        ctx.analyzer_flags += help_parser.parse_help(clang_help)
+    ctx.counts["analyzer_flags"] = len(ctx.analyzer_flags)
+
+
+def render_stage(default_values):
+    def stage_render(ctx):
+        out_fp = _NullWriter()
+        out_fp.writelines(
+            generate.iter_xcconfig(
+                "99.0 (99A999)",
+                ctx.options_groups,
+                ctx.analyzer_flags,
+                default_values=default_values,
+                add_doc=True,
+                prefix="WAX",
+                use_new_syntax=True,
+            )
+        )
+
+    return stage_render
+
+
+STAGES = [
+    ("spec_load", stage_spec_load),
+    ("parse_options", stage_parse_options),
+    ("load_xcode_defaults", stage_load_xcode_defaults),
+    ("read_clang_help", stage_read_clang_help),
+    ("parse_help", stage_parse_help),
+] + [(f"render_{style}", render_stage(style)) for style in generate.ALL_DEFAULTS_STYLES]
+
+
+def run_stages(xcode_path, repeat):
+    results = {name: {"seconds": None, "peak_bytes": None} for name, _ in STAGES}
+
+    for _ in range(repeat):
+        ctx = Context(xcode_path)
+        for name, stage in STAGES:
+            start = time.perf_counter()
+            stage(ctx)
+            elapsed = time.perf_counter() - start
+            best = results[name]["seconds"]
+            results[name]["seconds"] = elapsed if best is None else min(best, elapsed)
+
+    # Memory is measured in a separate pass, tracing slows everything down
+    ctx = Context(xcode_path)
+    tracemalloc.start()
+    for name, stage in STAGES:
+        tracemalloc.reset_peak()
+        stage(ctx)
+        results[name]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return results, ctx.counts
+
+
+def run_cli(input_args, repeat):
+    script = path.join(ROOT_DIR, "warnings2xcconfig.py")
+    best = None
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, script, *input_args, "--no-cache", "--force"]
+                + ["--all-styles", "--analyzer-alpha", "--doc", "--new-syntax"]
+                + ["--output-dir", output_dir],
+                check=True,
+                stderr=subprocess.DEVNULL,
+            )
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+
+    return {"seconds": best, "peak_rss_bytes": max_rss}
+
+
+def best_wall_time(command, repeat, cwd=None):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            command,
+            check=True,
+            cwd=cwd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def import_time(module_name, repeat):
+    """Return the best cumulative import time of module_name, in seconds."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+            cwd=ROOT_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stderr
+        for line in output.splitlines():
+            # import time: self [us] | cumulative | imported package
+            _, cumulative, name = line.split("|")
+            if name.strip() == module_name:
+                elapsed = int(cumulative) / 1_000_000
+                best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_startup(xcode_path, repeat, tmp_dir):
+    script = path.join(ROOT_DIR, "warnings2xcconfig.py")
+    pyz_path = path.join(tmp_dir, "warnings2xcconfig.pyz")
+    build_pyz.build_pyz(pyz_path)
+
+    output_dir = path.join(tmp_dir, "up-to-date")
+    os.makedirs(output_dir)
+    up_to_date_args = ["-x", xcode_path, "--all-styles", "--output-dir", output_dir]
+    # Write the files once, the next runs have nothing to do
+    subprocess.run(
+        [sys.executable, script, *up_to_date_args],
+        check=True,
+        stderr=subprocess.DEVNULL,
+    )
+
+    # The .pyz archive indexes the Xcode-*/ folders of the current directory
+    index_root = path.join(tmp_dir, "index-root")
+    shutil.copytree(output_dir, path.join(index_root, "Xcode-99.0"))
+
+    return {
+        "python_startup": {
+            "seconds": best_wall_time([sys.executable, "-c", "pass"], repeat)
+        },
+        "import_warnings2xcconfig": {
+            "seconds": import_time("warnings2xcconfig", repeat)
+        },
+        "cli_up_to_date": {
+            "seconds": best_wall_time(
+                [sys.executable, script, *up_to_date_args], repeat
+            )
+        },
+        "cli_up_to_date_pyz": {
+            "seconds": best_wall_time(
+                [sys.executable, pyz_path, *up_to_date_args], repeat
+            )
+        },
+        "cli_index_pyz": {
+            "seconds": best_wall_time(
+                [sys.executable, pyz_path, "index", "versions"], repeat, cwd=index_root
+            )
+        },
+    }
+
+
+def git_revision():
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+
+def print_results(results, baseline=None):
+    baseline_stages = baseline["stages"] if baseline else {}
+
+    print(f"{'stage':<22}{'time (ms)':>12}{'peak (KiB)':>14}")
+    for name, result in results["stages"].items():
+        peak = result.get("peak_bytes") or result.get("peak_rss_bytes", 0)
+        line = f"{name:<22}{result['seconds'] * 1000:>12.2f}{peak / 1024:>14.0f}"
+
+        old = baseline_stages.get(name)
+        if old and old["seconds"]:
+            delta = (result["seconds"] - old["seconds"]) / old["seconds"] * 100
+            line += f"   {delta:+6.1f}% time"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--options", type=int, default=10000)
+    parser.add_argument("--based-on-depth", type=int, default=20)
+    parser.add_argument("--analyzer-options", type=int, default=500)
+    parser.add_argument("--swift-options", type=int, default=1000)
+    parser.add_argument("--checkers", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-cli", dest="cli", action="store_false")
+    parser.add_argument("--output", metavar="FILE", help="save results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compare with results")
+    args = parser.parse_args()
+
+    params = {
+        "options": args.options,
+        "based_on_depth": args.based_on_depth,
+        "analyzer_options": args.analyzer_options,
+        "swift_options": args.swift_options,
+        "checkers": args.checkers,
+        "repeat": args.repeat,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xcode_path = synthetic.make_fake_xcode(
+            path.join(tmp_dir, "Xcode.app"),
+            options_count=args.options,
+            based_on_depth=args.based_on_depth,
+            analyzer_options=args.analyzer_options,
+            swift_options=args.swift_options,
+            checkers_count=args.checkers,
+        )
+
+        stages, counts = run_stages(xcode_path, args.repeat)
+        if args.cli:
+            stages["cli_all_styles"] = run_cli(["-x", xcode_path], args.repeat)
+
+            snapshot_path = path.join(tmp_dir, "Xcode.waxsnap")
+            snapshot.export_snapshot(xcode_path, snapshot_path)
+            stages["cli_from_snapshot"] = run_cli(
+                ["--from-snapshot", snapshot_path], args.repeat
+            )
+
+            stages.update(run_startup(xcode_path, max(args.repeat, 10), tmp_dir))
+
+    results = {
+        "version": RESULTS_FORMAT_VERSION,
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": params,
+            "counts": counts,
+        },
+        "stages": stages,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_fp:
+            baseline = json.load(baseline_fp)
+        if baseline["meta"]["params"] != params:
+            print("warning: the compared results used different parameters")
+
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_fp:
+            json.dump(results, output_fp, indent=2)
+            output_fp.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""Generators for synthetic, Xcode-shaped inputs used by the benchmarks."""
+
+import os
+import plistlib
+import random
+from os import path
+
+CLANG_BASE_TOOL_ID = "com.apple.compilers.llvm.clang.1_0"
+CLANG_TOOL_ID = "com.apple.compilers.llvm.clang.1_0.compiler"
+ANALYZER_TOOL_ID = "com.apple.compilers.llvm.clang.1_0.analyzer"
+SWIFT_TOOL_ID = "com.apple.xcode.tools.swift.compiler"
+
+XCSPEC_REL_DIR = (
+    "Contents/PlugIns/Xcode3Core.ideplugin/Contents/SharedSupport/"
+    "Developer/Library/Xcode/Plug-ins"
+)
+CLANG_XCSPEC_REL_PATH = (
+    f"{XCSPEC_REL_DIR}/Clang LLVM 1.0.xcplugin/Contents/Resources/Clang LLVM 1.0.xcspec"
+)
+SWIFT_XCSPEC_REL_PATH = (
+    f"{XCSPEC_REL_DIR}/XCLanguageSupport.xcplugin/Contents/Resources/Swift.xcspec"
+)
+TEMPLATE_INFO_REL_PATH = (
+    "Contents/Developer/Library/Xcode/Templates/Project Templates/Base/"
+    "Base_ProjectSettings.xctemplate/TemplateInfo.plist"
+)
+XCODEBUILD_REL_PATH = "Contents/Developer/usr/bin/xcodebuild"
+VERSION_PLIST_REL_PATH = "Contents/version.plist"
+CLANG_REL_PATH = "Contents/Developer/Toolchains/XcodeDefault.xctoolchain/usr/bin/clang"
+
+_CATEGORIES = [
+    "Warnings",
+    "WarningsObjC",
+    "WarningsCXX",
+    "WarningsPolicy",
+    "LanguageModules",
+    "UBSANPolicy",
+]
+
+_ANALYZER_CATEGORIES = [
+    "SACheckers",
+    "SAObjCCheckers",
+    "SASecurityCheckers",
+    "SAAppleAPICheckers",
+]
+
+
+def _quote(string):
+    escaped = string.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _args(args):
+    return "(" + ", ".join(_quote(arg) for arg in args) + ")"
+
+
+def option_name(index, prefix="CLANG_WARN_SYNTHETIC"):
+    return f"{prefix}_{index:06d}"
+
+
+def _option(name, category, on_args, off_args, *, rng, index):
+    # pylint: disable=too-many-arguments
+    option = {"Name": name}
+    if index % 4 == 0:
+        option["Type"] = "Enumeration"
+        option["Values"] = rng.choice(
+            [
+                ["YES", "YES_ERROR", "NO"],
+                ["YES", "YES_AGGRESSIVE", "NO"],
+                ["YES", "YES_NONAGGRESSIVE", "NO"],
+            ]
+        )
+    else:
+        option["Type"] = "Boolean"
+    option["Category"] = category
+    option["DisplayName"] = f"Synthetic setting #{index}"
+    option["Description"] = f'Warns about "synthetic" construct #{index}.\nSecond line.'
+    option["DefaultValue"] = "NO"
+    if index % 3:
+        option["CommandLineArgs"] = on_args
+    else:
+        # Dict-shaped CommandLineArgs, one list of arguments per value
+        option["CommandLineArgs"] = {"YES": on_args, "NO": off_args}
+    return option
+
+
+def _option_text(option):
+    values_line = ""
+    if "Values" in option:
+        values_line = f"                Values = ({', '.join(option['Values'])});\n"
+
+    command_line_args = option["CommandLineArgs"]
+    if isinstance(command_line_args, dict):
+        command_line_args = (
+            "{\n"
+            f"                    YES = {_args(command_line_args['YES'])};\n"
+            f"                    NO = {_args(command_line_args['NO'])};\n"
+            "                }"
+        )
+    else:
+        command_line_args = _args(command_line_args)
+
+    return (
+        "            {\n"
+        f"                Name = {option['Name']};\n"
+        f"                Type = {option['Type']};\n"
+        f"{values_line}"
+        f"                Category = {option['Category']};\n"
+        f"                DisplayName = {_quote(option['DisplayName'])};\n"
+        f"                Description = {_quote(option['Description'])};\n"
+        f"                DefaultValue = {option['DefaultValue']};\n"
+        f"                CommandLineArgs = {command_line_args};\n"
+        "            },"
+    )
+
+
+def _tool(identifier, name, options, based_on=None):
+    tool = {"Identifier": identifier}
+    if based_on:
+        tool["BasedOn"] = based_on
+    tool["Name"] = name
+    tool["Options"] = options
+    return tool
+
+
+def _tool_text(tool):
+    based_on = tool.get("BasedOn")
+    based_on_line = f"        BasedOn = {_quote(based_on)};\n" if based_on else ""
+    return (
+        "    {\n"
+        f"        Identifier = {_quote(tool['Identifier'])};\n"
+        f"{based_on_line}"
+        f"        Name = {_quote(tool['Name'])};\n"
+        "        Options = (\n"
+        + "\n".join(_option_text(option) for option in tool["Options"])
+        + "\n        );\n"
+        "    },"
+    )
+
+
+def tools_text(tools):
+    """Return the OpenStep text of a xcspec made of the tools."""
+    return (
+        "// Synthetic xcspec\n(\n"
+        + "\n".join(_tool_text(tool) for tool in tools)
+        + "\n)\n"
+    )
+
+
+def xcspec_tools(
+    options_count=5000,
+    seed=0,
+    based_on_depth=0,
+    analyzer_options=0,
+    unrelated_tools=0,
+):
+    """Return the tools of a Clang-like xcspec.
+
+    The compiler tool has `options_count` options and sits at the end of a
+    chain of `based_on_depth` BasedOn tools. When `analyzer_options` is set, an
+    analyzer tool based on the compiler is added, with that many options
+    enabling clang analyzer checkers. `unrelated_tools` tools with as many
+    options as the compiler, which warnings2xcconfig never reads, come first.
+    """
+    # pylint: disable=too-many-arguments
+    rng = random.Random(seed)
+
+    tools = []
+    for index in range(unrelated_tools):
+        options = [
+            _option(
+                option_name(i, f"CLANG_UNRELATED{index}"),
+                rng.choice(_CATEGORIES),
+                [f"-funrelated-{i}"],
+                [f"-fno-unrelated-{i}"],
+                rng=rng,
+                index=i,
+            )
+            for i in range(options_count)
+        ]
+        tools.append(_tool(f"{CLANG_BASE_TOOL_ID}.unrelated{index}", "Other", options))
+
+    parent = None
+    for depth in range(based_on_depth):
+        identifier = f"{CLANG_BASE_TOOL_ID}.level{depth}"
+        tools.append(_tool(identifier, "Apple Clang", [], based_on=parent))
+        parent = identifier
+
+    options = [
+        _option(
+            option_name(i),
+            rng.choice(_CATEGORIES),
+            [f"-Wsynthetic-{i}"],
+            [f"-Wno-synthetic-{i}"],
+            rng=rng,
+            index=i,
+        )
+        for i in range(options_count)
+    ]
+    tools.append(_tool(CLANG_TOOL_ID, "Apple Clang", options, based_on=parent))
+
+    if analyzer_options:
+        options = [
+            _option(
+                option_name(i, "CLANG_ANALYZER_SYNTHETIC"),
+                rng.choice(_ANALYZER_CATEGORIES),
+                ["-Xclang", "-analyzer-checker", "-Xclang", checker_name(i)],
+                [],
+                rng=rng,
+                index=i,
+            )
+            for i in range(analyzer_options)
+        ]
+        tools.append(
+            _tool(ANALYZER_TOOL_ID, "Static Analyzer", options, based_on=CLANG_TOOL_ID)
+        )
+
+    return tools
+
+
+def xcspec_text(*args, **kwargs):
+    """Return the text of a Clang-like OpenStep xcspec, see xcspec_tools()."""
+    return tools_text(xcspec_tools(*args, **kwargs))
+
+
+def swift_xcspec_tools(options_count=500, seed=0):
+    rng = random.Random(seed)
+    options = [
+        _option(
+            option_name(i, "SWIFT_WARN_SYNTHETIC"),
+            "WarningsPolicy",
+            [f"-warn-synthetic-{i}"],
+            [],
+            rng=rng,
+            index=i,
+        )
+        for i in range(options_count)
+    ]
+    return [_tool(SWIFT_TOOL_ID, "Swift Compiler", options)]
+
+
+def swift_xcspec_text(options_count=500, seed=0):
+    return tools_text(swift_xcspec_tools(options_count, seed))
+
+
+def install_xcspecs(*, options_count, based_on_depth, analyzer_options, swift_options):
+    """Return the tools of each xcspec of a fake install, by path relative to
+    the install."""
+    return {
+        CLANG_XCSPEC_REL_PATH: xcspec_tools(
+            options_count,
+            based_on_depth=based_on_depth,
+            analyzer_options=analyzer_options,
+        ),
+        SWIFT_XCSPEC_REL_PATH: swift_xcspec_tools(swift_options),
+    }
+
+
+def checker_name(index, alpha=False):
+    prefix = "alpha." if alpha else ""
+    return f"{prefix}synthetic.group{index % 50}.Checker{index:06d}"
+
+
+def checker_help_text(checkers_count=2000, alpha=False):
+    """Return a fake `clang -cc1 -analyzer-checker-help` output."""
+    lines = [
+        "OVERVIEW: Clang Static Analyzer Checkers List",
+        "",
+        "USAGE: -analyzer-checker <CHECKER or PACKAGE,...>",
+        "",
+        "CHECKERS:",
+    ]
+    for i in range(checkers_count):
+        name = checker_name(i, alpha)
+        doc = f"Check for synthetic issue #{i}"
+        if i % 5 == 0:
+            # Long names push the documentation to the next line
+            lines.append(f"  {name}.WithAVeryLongNameThatWraps")
+            lines.append(f"                                  {doc}")
+        else:
+            lines.append(f"  {name:<32}{doc}")
+
+    return "\n".join(lines) + "\n"
+
+
+def template_info_plist(options_count=5000, every=3, other_settings=0):
+    """Return the XML of a project template, with `other_settings` settings
+    outside of Project.SharedSettings, half before it and half after it."""
+    shared_settings = {option_name(i): "YES" for i in range(0, options_count, every)}
+    other = {option_name(i, "OTHER_SETTING"): "NO" for i in range(other_settings // 2)}
+    template_info = {
+        "Kind": "Xcode.Xcode3.ProjectTemplateUnitKind",
+        "Definitions": {"Settings": [other]},
+        "Project": {"SharedSettings": shared_settings, "Configurations": {}},
+        "Targets": [{"SharedSettings": other}],
+    }
+    # pylint: disable=no-member
+    # This is a pylint false positive.
+    return plistlib.dumps(template_info, fmt=plistlib.FMT_XML)
+
+
+def _write(root, rel_path, content, executable=False):
+    full_path = path.join(root, rel_path)
+    os.makedirs(path.dirname(full_path), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(full_path, mode) as out_fp:
+        out_fp.write(content)
+    if executable:
+        os.chmod(full_path, 0o755)
+    return full_path
+
+
+def make_fake_xcode(
+    xcode_path,
+    *,
+    options_count=5000,
+    based_on_depth=10,
+    analyzer_options=200,
+    swift_options=500,
+    checkers_count=2000,
+    version=("99.0", "99A999"),
+):
+    """Create an Xcode.app-like tree at xcode_path, with stub executables.
+
+    The stub `clang` and `xcodebuild` only print pre-generated output, so the
+    whole pipeline runs on any OS without a real Xcode install.
+    """
+    # pylint: disable=too-many-arguments
+    xcspecs = install_xcspecs(
+        options_count=options_count,
+        based_on_depth=based_on_depth,
+        analyzer_options=analyzer_options,
+        swift_options=swift_options,
+    )
+    for rel_path, tools in xcspecs.items():
+        _write(xcode_path, rel_path, tools_text(tools))
+    _write(xcode_path, TEMPLATE_INFO_REL_PATH, template_info_plist(options_count))
+
+    stub_dir = path.join(xcode_path, "Contents/Stubs")
+    _write(stub_dir, "help.txt", checker_help_text(checkers_count))
+    _write(stub_dir, "help-alpha.txt", checker_help_text(checkers_count, alpha=True))
+
+    _write(
+        xcode_path,
+        VERSION_PLIST_REL_PATH,
+        plistlib.dumps(
+            {
+                "CFBundleShortVersionString": version[0],
+                "ProductBuildVersion": version[1],
+            }
+        ),
+    )
+    # Only run when the version can't be read from version.plist
+    _write(
+        xcode_path,
+        XCODEBUILD_REL_PATH,
+        f"#!/bin/sh\nprintf 'Xcode {version[0]}\\nBuild version {version[1]}\\n'\n",
+        executable=True,
+    )
+    _write(
+        xcode_path,
+        CLANG_REL_PATH,
+        "#!/bin/sh\n"
+        f'STUBS="{stub_dir}"\n'
+        'case "$2" in\n'
+        '    -analyzer-checker-help) cat "$STUBS/help.txt" ;;\n'
+        '    -analyzer-checker-help-alpha) cat "$STUBS/help-alpha.txt" ;;\n'
+        '    *) echo "unsupported stub invocation: $*" >&2; exit 1 ;;\n'
+        "esac\n",
+        executable=True,
+    )
+
+    return xcode_path
@@ -0,0 +1,102 @@
+#! /usr/bin/env python3
+
+"""Build warnings2xcconfig.pyz, a single-file, self-contained distribution of
+the script:
+
+    python3 build_pyz.py
+    python3 warnings2xcconfig.pyz --all-styles --output-dir Warnings/
+
+The archive holds every module along with its bytecode, compiled by the
+Python running this script, so runs don't compile anything (not even the
+main script, which Python compiles on every run when it is run directly).
+Other Python versions ignore the bytecode, and compile the sources also
+found in the archive.
+"""
+
+import argparse
+import glob
+import py_compile
+import shutil
+import sys
+import tempfile
+import zipapp
+from os import path
+
+ROOT_DIR = path.dirname(path.abspath(__file__))
+
+DEFAULT_OUTPUT = path.join(ROOT_DIR, "warnings2xcconfig.pyz")
+
+# Modules which are part of the repository, but not of the script
+EXCLUDED_MODULES = {"build_pyz.py"}
+
+MAIN_SOURCE = """\
+import warnings2xcconfig
+
+if __name__ == "__main__":
+    warnings2xcconfig.main()
+"""
+
+
+def module_paths():
+    return sorted(
+        module_path
+        for module_path in glob.glob(path.join(ROOT_DIR, "*.py"))
+        if path.basename(module_path) not in EXCLUDED_MODULES
+    )
+
+
+def stage_module(source_path, staging_dir):
+    module_filename = path.basename(source_path)
+    staged_path = path.join(staging_dir, module_filename)
+    shutil.copyfile(source_path, staged_path)
+
+    # zipimport reads name.pyc next to name.py. The bytecode isn't checked
+    # against the sources: the archive is never modified once built.
+    py_compile.compile(
+        staged_path,
+        cfile=staged_path + "c",
+        dfile=module_filename,
+        doraise=True,
+        invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    )
+
+
+def build_pyz(output_path, interpreter="/usr/bin/env python3"):
+    with tempfile.TemporaryDirectory() as staging_dir:
+        for source_path in module_paths():
+            stage_module(source_path, staging_dir)
+
+        main_path = path.join(staging_dir, "__main__.py")
+        with open(main_path, "w", encoding="utf-8") as main_fp:
+            main_fp.write(MAIN_SOURCE)
+
+        zipapp.create_archive(
+            staging_dir, output_path, interpreter=interpreter, compressed=True
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="FILE",
+        default=DEFAULT_OUTPUT,
+        help="archive to write (default: warnings2xcconfig.pyz)",
+    )
+    parser.add_argument(
+        "--python",
+        metavar="INTERPRETER",
+        default="/usr/bin/env python3",
+        help="interpreter of the archive's shebang line",
+    )
+    args = parser.parse_args()
+
+    build_pyz(args.output, interpreter=args.python)
+    print(f"Wrote {args.output} (Python {sys.version.split()[0]} bytecode)")
+
+
+if __name__ == "__main__":
+    main()
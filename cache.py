@@ -0,0 +1,209 @@
+"""On-disk cache for values derived from a file, keyed by the file identity.
+
+An entry is only reused when the source file still has the same path, size,
+modification time and content hash as when the entry was written. Entries are
+pickled, which loads much faster than re-deriving them from Xcode's files.
+
+Hashing a large file (such as the clang binary) on every run would defeat the
+purpose of the cache, so the file's stat() information is recorded alongside
+each entry, and the content is only hashed again when it changed.
+"""
+
+import hashlib
+import os
+import time
+from os import path
+
+# pickle and tempfile are imported when first needed: runs with nothing to
+# do never read or write the cache, and should start as fast as possible
+
+# Bump this whenever the layout of cached values changes
+CACHE_FORMAT_VERSION = 2
+
+# Entries which have not been used for this long are evicted
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or path.expanduser("~/.cache")
+    return path.join(cache_home, "warnings2xcconfig")
+
+
+def file_digest(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as source_fp:
+        for chunk in iter(lambda: source_fp.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def stat_stamp(stat):
+    # Any write to the file changes at least one of these. They are used to
+    # skip re-hashing large files (e.g. the clang binary) which didn't change.
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_ctime_ns)
+
+
+def write_file_atomically(file_path, chunks, binary=False):
+    # Write next to the destination, then rename over it, so readers never
+    # see a half-written file
+    import tempfile  # pylint: disable=import-outside-toplevel
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.dirname(path.abspath(file_path)), prefix=".", suffix=".tmp"
+    )
+    try:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+        if binary:
+            out_fp = os.fdopen(fd, "wb")
+        else:
+            out_fp = os.fdopen(fd, "w", encoding="utf-8")
+        with out_fp:
+            out_fp.writelines(chunks)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class FileCache:
+    def __init__(self, cache_dir, namespace, max_age=DEFAULT_MAX_AGE, refresh=False):
+        self.cache_dir = path.join(cache_dir, namespace)
+        self.max_age = max_age
+        self.refresh = refresh
+
+    def _entry_path(self, file_path, key):
+        entry_key = repr((file_path, key)).encode("utf-8")
+        entry_name = hashlib.sha256(entry_key).hexdigest()
+        return path.join(self.cache_dir, entry_name + ".pickle")
+
+    def get_or_create(self, file_path, create, key=()):
+        """Return the cached value for file_path, calling create() on a miss.
+
+        `key` distinguishes several values derived from the same file (e.g. the
+        output of a binary run with different flags). When the cache was opened
+        with refresh=True, create() is always called.
+        """
+        file_path = path.realpath(file_path)
+        stat = os.stat(file_path)
+        stamp = stat_stamp(stat)
+        entry_path = self._entry_path(file_path, key)
+
+        digest = None
+        entry = None if self.refresh else self._load(entry_path, file_path, key)
+        if entry is not None:
+            if entry["stamp"] == stamp:
+                self._touch(entry_path)
+                return entry["value"]
+
+            # The file was touched or replaced, only its content can tell
+            # whether the entry is still valid
+            digest = file_digest(file_path)
+            identity = (file_path, stat.st_size, stat.st_mtime_ns, digest)
+            if entry["identity"] == identity:
+                self._store(entry_path, identity, stamp, key, entry["value"])
+                return entry["value"]
+
+            # The source file changed, this entry will never be valid again
+            self._remove(entry_path)
+
+        if digest is None:
+            digest = file_digest(file_path)
+        identity = (file_path, stat.st_size, stat.st_mtime_ns, digest)
+
+        value = create()
+        self._store(entry_path, identity, stamp, key, value)
+        self.evict_expired()
+
+        return value
+
+    def _load(self, entry_path, file_path, key):
+        import pickle  # pylint: disable=import-outside-toplevel
+
+        try:
+            with open(entry_path, "rb") as entry_fp:
+                entry = pickle.load(entry_fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            self._remove(entry_path)
+            return None
+
+        if (
+            not isinstance(entry, dict)
+            or entry.get("version") != CACHE_FORMAT_VERSION
+            or entry.get("key") != key
+            or entry["identity"][0] != file_path
+        ):
+            self._remove(entry_path)
+            return None
+
+        return entry
+
+    def _store(self, entry_path, identity, stamp, key, value):
+        # pylint: disable=import-outside-toplevel
+        import pickle
+        import tempfile
+
+        entry = {
+            "version": CACHE_FORMAT_VERSION,
+            "identity": identity,
+            "stamp": stamp,
+            "key": key,
+            "value": value,
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temporary file and rename it, so concurrent runs never see
+        # a partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as entry_fp:
+                pickle.dump(entry, entry_fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _touch(entry_path):
+        # Refresh the entry modification time, used for eviction
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+    def evict_expired(self):
+        oldest_allowed = time.time() - self.max_age
+        try:
+            entry_names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+
+        for entry_name in entry_names:
+            entry_path = path.join(self.cache_dir, entry_name)
+            try:
+                if os.stat(entry_path).st_mtime < oldest_allowed:
+                    self._remove(entry_path)
+            except FileNotFoundError:
+                continue
+
+    @staticmethod
+    def _remove(file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+
+def open_file_cache(args, namespace):
+    if not args.cache:
+        return None
+
+    return FileCache(args.cache_dir, namespace, refresh=args.refresh_cache)
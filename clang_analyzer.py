@@ -0,0 +1,164 @@
+"""The Clang Analyzer checkers listed by `clang -cc1 -analyzer-checker-help`."""
+
+import sys
+
+from tables import IGNORED_CLANG_ANALYZER_FLAGS
+from timings import SUBPROCESS, run_stage
+from xcspec import flatmap
+
+STDOUT_ENCODING = sys.stdout.encoding  # pylint: disable=invalid-name
+
+
+class ClangAnalyzerFlag:
+    __slots__ = ("name", "doc")
+
+    def __init__(self, name, doc=None):
+        self.name = name
+        self.doc = doc
+
+    def format_for_xcconfig(self, varname, add_doc, use_new_syntax):
+        flag_str = f"-Xclang -analyzer-checker -Xclang {self.name}"
+
+        if not use_new_syntax:
+            return flag_str
+
+        out = ""
+        if add_doc:
+            out += f"// {self.doc}\n"
+        out += f"{varname} = $(inherited) {flag_str}"
+
+        return out
+
+
+class ClangHelpParser:
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        clang_bin_path,
+        help_flag,
+        all_xspec_options=None,
+        include_localization_flags=True,
+    ):
+        self.clang_bin_path = clang_bin_path
+        self.help_flag = help_flag
+        self.include_localization_flags = include_localization_flags
+
+        # Extract the command line flags from all build settings we already
+        # have so we don't repeat the same options twice when building
+        self.skipped_flags = ClangHelpParser.options_analyzer_flags(
+            all_xspec_options or []
+        )
+
+        self.found_checkers = False
+        self.partial_flag = None
+        self.checkers = []
+        self.flags = []
+
+    @staticmethod
+    def options_analyzer_flags(xspec_options):
+        return set(flatmap(lambda opt: opt.clang_analyzer_flags, xspec_options))
+
+    def iter_help_lines(self):
+        # Read clang's output as it is written, instead of waiting for the
+        # (potentially long) list of checkers to be complete
+        # pylint: disable=import-outside-toplevel
+        from subprocess import PIPE, CalledProcessError, Popen
+
+        command = [self.clang_bin_path, "-cc1", self.help_flag]
+        with run_stage(f"clang -cc1 {self.help_flag}", SUBPROCESS), Popen(
+            command, stdout=PIPE, encoding=STDOUT_ENCODING
+        ) as process:
+            for line in process.stdout:
+                yield line.rstrip("\r\n")
+
+        if process.returncode:
+            raise CalledProcessError(process.returncode, command)
+
+    def parse_help(self, clang_help=None, cache=None):
+        return self.filter_checkers(self.read_checkers(clang_help, cache))
+
+    def read_checkers(self, clang_help=None, cache=None):
+        # Clang's list of checkers only depends on the clang binary, so it can
+        # be cached as long as the binary doesn't change
+        if cache is None:
+            return self.parse_checkers(clang_help)
+
+        return cache.get_or_create(
+            self.clang_bin_path,
+            lambda: self.parse_checkers(clang_help),
+            key=("checkers", self.help_flag),
+        )
+
+    def filter_checkers(self, checkers):
+        # Filtering is cheap, and depends on our own settings, so it is never
+        # cached
+        for name, doc in checkers:
+            flag = ClangAnalyzerFlag(name, doc)
+            if self.is_flag_valid(flag):
+                self.flags.append(flag)
+
+        return self.flags
+
+    def parse_checkers(self, clang_help=None):
+        """Return the (name, doc) of every checker listed by clang."""
+        if clang_help is None:
+            lines = self.iter_help_lines()
+        else:
+            lines = clang_help.splitlines()
+
+        for line in lines:
+            self.parse_line(line)
+
+        return [(flag.name, flag.doc) for flag in self.checkers]
+
+    def parse_line(self, line):
+        if line.startswith("CHECKERS"):
+            self.found_checkers = True
+            return
+
+        if not self.found_checkers:
+            return
+
+        if self.partial_flag:
+            flag = self.parse_doc_line(line)
+        else:
+            flag = self.parse_new_flag_line(line)
+
+        if flag:
+            self.checkers.append(flag)
+
+    def parse_doc_line(self, line):
+        self.partial_flag.doc = line.strip()
+        flag = self.partial_flag
+        self.partial_flag = None
+        return flag
+
+    def parse_new_flag_line(self, line):
+        bits = line.split(None, 1)
+        bits = [bit for bit in bits if bit != ""]
+
+        if len(bits) == 1:
+            name = bits[0]
+            self.partial_flag = ClangAnalyzerFlag(name)
+            return None
+
+        name, doc = bits
+        flag = ClangAnalyzerFlag(name, doc)
+        return flag
+
+    def is_flag_valid(self, flag):
+        if flag.name.startswith("debug."):
+            return False
+
+        if flag.name in IGNORED_CLANG_ANALYZER_FLAGS:
+            return False
+
+        if flag.name in self.skipped_flags:
+            return False
+
+        is_localization_flag = "LOCALIZABILITY" in flag.name.upper()
+        if not self.include_localization_flags and is_localization_flag:
+            return False
+
+        return True
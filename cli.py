@@ -0,0 +1,318 @@
+"""The command line of warnings2xcconfig.py."""
+
+import argparse
+import glob
+from os import path
+
+from cache import default_cache_dir
+from generate import ALL_DEFAULTS_STYLES
+from xcode import expand_xcode_paths
+
+
+def parse_script_args(argv=None, cwd=None):
+    """Parse the command line. Relative paths are resolved against cwd when
+    given (the client's directory, for requests parsed by a server)."""
+    # pylint: disable=too-many-statements,too-many-branches
+    # Mostly one add_argument() per option, and one check per incompatible
+    # options
+
+    def path_arg(value):
+        return path.join(cwd, value) if cwd else value
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawTextHelpFormatter,
+        description="Extract warning flags from Xcode and format them into "
+        "a xcconfig file",
+        epilog="subcommands:\n"
+        "  index       query the settings of the committed Xcode-*/ folders "
+        "(see `index --help`)\n"
+        "  serve       keep Xcode installs in memory and answer --server "
+        "requests\n              (see `serve --help`)\n"
+        "  export-snapshot\n"
+        "              capture an Xcode install for --from-snapshot "
+        "(see `export-snapshot --help`)\n"
+        "  evaluate    print the effective warning settings of xcconfig files "
+        "(see `evaluate --help`)",
+    )
+    parser.add_argument(
+        "-x",
+        "--xcode-path",
+        action="append",
+        type=path_arg,
+        metavar="PATH",
+        help="path to the Xcode install to scan. If not specified, "
+        "`xcode-select -p` will be used to find a suitable Xcode install.\n"
+        "Can be repeated, or be a glob pattern such as "
+        "'/Applications/Xcode-*.app', to scan\nseveral installs at once. "
+        "Each install is then written to DIR/Xcode-<version>/\n"
+        "(requires --output-dir)",
+    )
+    parser.add_argument(
+        "--from-snapshot",
+        dest="from_snapshot",
+        action="store",
+        type=path_arg,
+        metavar="FILE",
+        help="generate the files from a snapshot written by "
+        "`warnings2xcconfig.py export-snapshot`\ninstead of an Xcode install "
+        "(works on any OS)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        type=int,
+        metavar="N",
+        help="number of Xcode installs to scan in parallel when scanning "
+        "several installs\n(default is the number of CPUs)",
+    )
+    parser.add_argument(
+        "-d",
+        "--defaults",
+        action="store",
+        metavar="STYLE",
+        choices=["none", "clang", "xcode", "strict", "aggressive"],
+        help="default values for the options in the generated xcconfig file\n"
+        "  - none: no default values\n"
+        "  - clang: defaults used by the clang compiler\n"
+        "  - xcode: defaults used by xcode when creating a new project\n"
+        "  - strict: hand picked values to make your code safer without "
+        "being too much of a hassle to fix\n"
+        "  - aggressive: everything 'on' "
+        "(you probably don't want this)",
+    )
+    parser.add_argument(
+        "--all-styles",
+        dest="all_styles",
+        action="store_true",
+        help="generate one xcconfig file per defaults style "
+        f"({', '.join(ALL_DEFAULTS_STYLES)}) from a single scan of Xcode.\n"
+        "Requires --output-dir",
+    )
+    parser.add_argument(
+        "--delta-from",
+        dest="delta_from",
+        action="store",
+        metavar="STYLE",
+        choices=["clang", "xcode"],
+        help="only write the settings whose value differs from this style's\n"
+        "  - clang: for targets relying on clang's defaults\n"
+        "  - xcode: for projects created with Xcode, which already have "
+        "its defaults",
+    )
+    parser.add_argument(
+        "--profiles",
+        dest="profiles_path",
+        action="store",
+        type=path_arg,
+        metavar="FILE",
+        help="render each profile of a JSON (or TOML) manifest, as "
+        "<profile>.xcconfig,\nfrom a single scan of Xcode. A profile is a "
+        "defaults style with overridden\nsettings, its own prefix, and "
+        "filters of the settings it includes.\nRequires --output-dir",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        dest="output_dir",
+        action="store",
+        type=path_arg,
+        metavar="DIR",
+        help="write the generated xcconfig files as "
+        "Warnings-<Style>Defaults.xcconfig in DIR instead of printing them.\n"
+        "A manifest of the inputs is kept in DIR, and the files are only "
+        "generated again\nwhen Xcode, or the options, changed",
+    )
+    parser.add_argument(
+        "--force",
+        dest="force",
+        action="store_true",
+        help="generate the files in DIR even if the manifest shows they are "
+        "up to date",
+    )
+    parser.add_argument(
+        "--watch",
+        dest="watch",
+        action="store_true",
+        help="keep running, and update the files in DIR whenever Xcode is "
+        "switched\nwith xcode-select, or the files they come from change",
+    )
+    parser.add_argument(
+        "--no-swift",
+        dest="swift",
+        action="store_false",
+        help="don't include Swift-related flags in the output",
+    )
+    parser.add_argument(
+        "--no-analyzer",
+        dest="analyzer_flags",
+        action="store_false",
+        help="don't include Clang Analyzer checker flags in the output",
+    )
+    parser.add_argument(
+        "--analyzer-alpha",
+        dest="analyzer_alpha_flags",
+        action="store_true",
+        help="include Clang Analyzer alpha (in-development) checker flags in the output",
+    )
+    parser.add_argument(
+        "--no-localizability",
+        dest="localizability",
+        action="store_false",
+        help="don't include localization-related flags in the output",
+    )
+    parser.add_argument(
+        "-p",
+        "--prefix",
+        dest="prefix",
+        action="store",
+        type=str,
+        default="WAX",
+        help="the prefix to use for variables in the output " '(default is "WAX")',
+    )
+    parser.add_argument(
+        "--doc",
+        action="store_true",
+        help="include documentation about the options in the generated "
+        "xcconfig file, if available",
+    )
+    parser.add_argument(
+        "--new-syntax",
+        dest="new_syntax",
+        action="store_true",
+        help="use the new xcconfig syntax introduced with the new build"
+        "system of Xcode 10",
+    )
+    parser.add_argument(
+        "--max-subprocesses",
+        dest="max_subprocesses",
+        action="store",
+        type=int,
+        metavar="N",
+        default=4,
+        help="maximum number of external commands (clang, xcodebuild) run "
+        "concurrently\n(default is 4)",
+    )
+    parser.add_argument(
+        "--server",
+        dest="server",
+        nargs="?",
+        const=f"unix:{default_server_socket_path()}",
+        metavar="ADDRESS",
+        help="send the request to a server started with `warnings2xcconfig.py "
+        "serve`,\nwhich keeps Xcode installs in memory, instead of reading "
+        "Xcode. ADDRESS is\neither unix:PATH for a Unix socket (default is "
+        "the socket `serve` listens on\nby default), or HOST:PORT",
+    )
+    parser.add_argument(
+        "--timings",
+        dest="timings",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="write a JSON report of the time spent in each stage of the run, "
+        "and in\nexternal commands, to FILE (default is stderr)",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        action="store",
+        metavar="FILE",
+        help="profile the run with cProfile, and write the stats to FILE\n"
+        "(only the main thread of the main process is profiled)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help="don't read or write the cache of parsed Xcode files",
+    )
+    parser.add_argument(
+        "--refresh-cache",
+        dest="refresh_cache",
+        action="store_true",
+        help="ignore cached Xcode files and clang output, and cache them again",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        action="store",
+        metavar="PATH",
+        default=default_cache_dir(),
+        help="where to store the cache of parsed Xcode files\n"
+        "(default is ~/.cache/warnings2xcconfig)",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.all_styles and not args.output_dir:
+        parser.error("--all-styles requires --output-dir")
+
+    args.batch = False
+    if args.xcode_path is not None:
+        args.batch = len(args.xcode_path) > 1 or any(
+            glob.has_magic(p) for p in args.xcode_path
+        )
+        args.xcode_paths = expand_xcode_paths(args.xcode_path)
+        if not args.xcode_paths:
+            parser.error("--xcode-path matched no Xcode install")
+        args.xcode_path = args.xcode_paths[0]
+
+    if args.batch and not args.output_dir:
+        parser.error("scanning several Xcode installs requires --output-dir")
+
+    if args.from_snapshot and args.xcode_path:
+        parser.error("--from-snapshot and --xcode-path are mutually exclusive")
+
+    if args.from_snapshot and not path.isfile(args.from_snapshot):
+        parser.error(f"snapshot {args.from_snapshot} doesn't exist")
+
+    if args.batch and args.server:
+        parser.error("--server can't scan several Xcode installs at once")
+
+    if args.server and (args.timings or args.profile):
+        parser.error("--timings and --profile can't measure a --server request")
+
+    if args.watch and (not args.output_dir or args.batch or args.server):
+        parser.error("--watch requires --output-dir and a single, local Xcode install")
+
+    if args.all_styles and args.defaults:
+        parser.error("--all-styles and --defaults are mutually exclusive")
+
+    args.profiles = load_profiles_arg(parser, args)
+
+    if args.delta_from and not args.all_styles:
+        if args.defaults in (None, "none"):
+            parser.error("--delta-from requires --defaults STYLE or --all-styles")
+        if args.defaults == args.delta_from:
+            parser.error(f"--delta-from {args.delta_from} would write an empty file")
+
+    return args
+
+
+def load_profiles_arg(parser, args):
+    if not args.profiles_path:
+        return None
+
+    if not args.output_dir:
+        parser.error("--profiles requires --output-dir")
+    if args.defaults or args.all_styles or args.delta_from:
+        parser.error(
+            "--profiles can't be combined with --defaults, --all-styles or "
+            "--delta-from"
+        )
+
+    # pylint: disable=import-outside-toplevel
+    from profiles import ProfileError, read_profiles
+
+    try:
+        return read_profiles(args.profiles_path)
+    except ProfileError as error:
+        parser.error(str(error))
+        raise
+
+
+def default_server_socket_path():
+    """The Unix socket `serve` listens on, and --server connects to, by
+    default."""
+    return path.join(default_cache_dir(), "server.sock")
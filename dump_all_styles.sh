@@ -14,20 +14,11 @@ XCODE_FOLDER="Xcode-$XCODE_VERSION"
 
 mkdir -p "$XCODE_FOLDER"
 
-function export_settings_with_defaults {
-    OPTION=$1
-    NAME="$(tr '[:lower:]' '[:upper:]' <<< "${OPTION:0:1}")${OPTION:1}"
-    echo "Exporting settings for $NAME"
-    ./warnings2xcconfig.py --new-syntax --defaults "$OPTION" > "$XCODE_FOLDER/Warnings-${NAME}Defaults.xcconfig" || {
-        rm -r "$XCODE_FOLDER"
-        exit 1
-    }
+echo "Exporting settings for all styles"
+./warnings2xcconfig.py --new-syntax --all-styles --output-dir "$XCODE_FOLDER" || {
+    rm -r "$XCODE_FOLDER"
+    exit 1
 }
 
-export_settings_with_defaults clang
-export_settings_with_defaults xcode
-export_settings_with_defaults strict
-export_settings_with_defaults aggressive
-
 echo
 echo "Wrote all xcconfig files to $XCODE_FOLDER/"
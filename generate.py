@@ -0,0 +1,454 @@
+"""Generating the xcconfig files from the data read from Xcode, and keeping an
+output directory up to date."""
+
+import glob
+import os
+import sys
+from os import path
+
+from cache import write_file_atomically
+from clang_analyzer import ClangHelpParser
+from manifest import (
+    RENDER,
+    REGENERATE,
+    UP_TO_DATE,
+    Manifest,
+    modules_digest,
+    tables_digest,
+)
+from tables import (
+    AGGRESSIVE_DEFAULTS_EXCEPTIONS,
+    IGNORED_CLANG_ANALYZER_FLAGS,
+    INGORED_BUILD_SETTINGS,
+    STRICT_DEFAULTS_EXCEPTIONS,
+)
+from timings import run_stage
+from xcode import (
+    analyzer_help_flags,
+    format_xcode_version,
+    read_xcode_defaults,
+    read_xcode_inputs,
+    xcode_input_paths,
+    xcspec_names,
+)
+from xcspec import (
+    CLANG_ANALYZER_QUERY,
+    CLANG_UBSAN_POLICY_QUERY,
+    CLANG_WARNINGS_QUERY,
+    SWIFT_WARNINGS_QUERY,
+    XSpecParser,
+    flatmap,
+    flatten,
+)
+
+# Styles written by --all-styles, matching the files in the Xcode-* folders
+ALL_DEFAULTS_STYLES = ["clang", "xcode", "strict", "aggressive"]
+
+
+def load_xcode_defaults(xcode_path, options_groups):
+    apply_xcode_defaults(read_xcode_defaults(xcode_path), options_groups)
+
+
+def apply_xcode_defaults(xcode_defaults, options_groups):
+    for options_group in options_groups:
+        for option in options_group.options:
+            if option.name not in xcode_defaults:
+                continue
+
+            option.xcode_default_value = xcode_defaults[option.name]
+
+
+def iter_optgroups_xcconfig(
+    options_groups, default_values, add_doc, delta_from=None, values=None
+):
+    sorted_options_groups = sorted(options_groups, key=lambda g: g.display_name)
+
+    for options_group in sorted_options_groups:
+        yield from options_group.iter_xcconfig(
+            default_values=default_values,
+            add_doc=add_doc,
+            delta_from=delta_from,
+            values=values,
+        )
+
+
+def iter_analyzer_flags_xcconfig(analyzer_flags, add_doc, prefix, use_new_syntax):
+    if not analyzer_flags:
+        return
+
+    yield "// Clang Analyzer Flags\n"
+
+    varname = prefix + "_ANALYZER_FLAGS"
+
+    if use_new_syntax:
+        for flag in analyzer_flags:
+            yield flag.format_for_xcconfig(varname, add_doc, use_new_syntax) + "\n"
+    else:
+        # Flags are all printed on the same line, so output the documentation
+        # in one bloc before the flags.
+        if add_doc:
+            for flag in analyzer_flags:
+                yield f"// {flag.name}: {flag.doc}\n"
+
+        yield varname + " ="
+        for flag in analyzer_flags:
+            yield " " + flag.format_for_xcconfig(varname, add_doc, use_new_syntax)
+        yield "\n"
+
+    yield "\n"
+    yield "WARNING_CFLAGS = $(inherited) $(" + prefix + "_ANALYZER_FLAGS)"
+
+
+def iter_xcconfig(
+    xcode_version,
+    optgroups,
+    analyzer_flags,
+    *,
+    default_values,
+    add_doc,
+    prefix,
+    use_new_syntax,
+    delta_from=None,
+    values=None,
+    description=None,
+):
+    """Yield the content of the xcconfig file piece by piece, so it can be
+    written out without ever holding the whole document in memory.
+
+    With delta_from, only the settings whose value differs from the
+    delta_from style are written. With values, a {name: value} dict, only
+    these settings are written, with these values instead of the style's.
+    description is added to the header.
+    """
+    # pylint: disable=too-many-arguments
+    # This function does a lot, and it might be better to break it down a bit.
+    # For now accept that it needs all these inputs and silence the warning.
+
+    yield (
+        f"// Generated using XcodeWarningsAsXcconfig for Xcode {xcode_version}\n"
+        "// https://github.com/guillaumealgis/XcodeWarningsAsXcconfig\n"
+    )
+    if description:
+        yield f"// {description}\n"
+    if delta_from:
+        yield (
+            "// Only the settings whose value differs from the "
+            f"{delta_from} defaults\n"
+        )
+    yield "\n"
+
+    yield from iter_optgroups_xcconfig(
+        optgroups,
+        default_values=default_values,
+        add_doc=add_doc,
+        delta_from=delta_from,
+        values=values,
+    )
+
+    yield from iter_analyzer_flags_xcconfig(
+        analyzer_flags, add_doc=add_doc, prefix=prefix, use_new_syntax=use_new_syntax
+    )
+
+    yield "\n"
+
+
+def generate_xcconfig(*args, **kwargs):
+    return "".join(iter_xcconfig(*args, **kwargs))
+
+
+def load_options_groups(args, xcspecs, xcode_defaults):
+    clang_queries = [CLANG_WARNINGS_QUERY]
+    if args.analyzer_flags:
+        clang_queries += [CLANG_UBSAN_POLICY_QUERY, CLANG_ANALYZER_QUERY]
+
+    with run_stage("parse_options") as stage:
+        parsers = []
+
+        clang_llvm_parser = XSpecParser(xcspec_root=xcspecs["clang"])
+        clang_llvm_parser.include_localization_options = args.localizability
+        options_groups = flatten(clang_llvm_parser.query_options(clang_queries))
+        parsers.append(clang_llvm_parser)
+
+        if args.swift:
+            swift_parser = XSpecParser(xcspec_root=xcspecs["swift"])
+            swift_parser.include_localization_options = args.localizability
+            options_groups += flatten(
+                swift_parser.query_options([SWIFT_WARNINGS_QUERY])
+            )
+            parsers.append(swift_parser)
+
+        apply_xcode_defaults(xcode_defaults, options_groups)
+
+        parsed_count = sum(parser.parsed_options_count for parser in parsers)
+        selected_count = len({id(o) for g in options_groups for o in g.options})
+        stage.counts["options_parsed"] = parsed_count
+        stage.counts["options_filtered"] = parsed_count - selected_count
+        stage.counts["options_selected"] = selected_count
+
+    return options_groups
+
+
+def load_analyzer_flags(args, options_groups, checkers):
+    """Filter the analyzer checkers listed by clang.
+
+    `checkers` maps each help flag to the (name, doc) of the checkers clang
+    printed for it.
+    """
+    all_xspec_options = list(flatmap(lambda g: g.options, options_groups))
+
+    analyzer_flags = []
+    with run_stage("filter_analyzer_checkers") as stage:
+        for help_flag in analyzer_help_flags(args):
+            # Only used to filter checkers, clang isn't run
+            help_parser = ClangHelpParser(
+                None,
+                help_flag=help_flag,
+                all_xspec_options=all_xspec_options,
+                include_localization_flags=args.localizability,
+            )
+            analyzer_flags += help_parser.filter_checkers(checkers[help_flag])
+
+        checkers_count = sum(len(checkers[f]) for f in analyzer_help_flags(args))
+        stage.counts["checkers_filtered"] = checkers_count - len(analyzer_flags)
+        stage.counts["checkers_selected"] = len(analyzer_flags)
+
+    return analyzer_flags
+
+
+def read_inputs(args, xcspec_cache=None, checkers_cache=None):
+    """Return the data the xcconfig files are generated from, read from the
+    Xcode install or the snapshot given in args."""
+    if args.from_snapshot:
+        # pylint: disable=import-outside-toplevel
+        from snapshot import read_snapshot
+
+        with run_stage("read_snapshot"):
+            return read_snapshot(
+                args.from_snapshot, xcspec_names(args), analyzer_help_flags(args)
+            )
+
+    return read_xcode_inputs(args, xcspec_cache, checkers_cache)
+
+
+def build_xcode_model(args, xcode_inputs):
+    """Returns the (options_groups, analyzer_flags) to render."""
+    options_groups = load_options_groups(
+        args, xcode_inputs["xcspecs"], xcode_inputs["xcode_defaults"]
+    )
+    analyzer_flags = load_analyzer_flags(args, options_groups, xcode_inputs["checkers"])
+
+    return options_groups, analyzer_flags
+
+
+def load_xcode_model(args, xcspec_cache=None, checkers_cache=None):
+    """Gather everything needed to render xcconfig files for args.xcode_path.
+
+    Returns a ((version, build), options_groups, analyzer_flags) tuple.
+    """
+    xcode_inputs = read_inputs(args, xcspec_cache, checkers_cache)
+    options_groups, analyzer_flags = build_xcode_model(args, xcode_inputs)
+
+    return xcode_inputs["version"], options_groups, analyzer_flags
+
+
+def xcconfig_filename(default_values, delta_from=None):
+    if delta_from:
+        return (
+            f"Warnings-{default_values.capitalize()}Defaults-"
+            f"DeltaFrom{delta_from.capitalize()}.xcconfig"
+        )
+    return f"Warnings-{default_values.capitalize()}Defaults.xcconfig"
+
+
+def output_styles(args):
+    if args.all_styles:
+        # The file of the baseline style would be empty
+        return [style for style in ALL_DEFAULTS_STYLES if style != args.delta_from]
+    return [args.defaults]
+
+
+def iter_style_xcconfig(args, xcode_version, options_groups, analyzer_flags, style):
+    """iter_xcconfig() for a style, with the rendering options of args."""
+    return iter_xcconfig(
+        xcode_version,
+        options_groups,
+        analyzer_flags,
+        default_values=style,
+        add_doc=args.doc,
+        prefix=args.prefix,
+        use_new_syntax=args.new_syntax,
+        delta_from=args.delta_from,
+    )
+
+
+def iter_output_files(args, xcode_version, options_groups, analyzer_flags):
+    """Yield the (name, filename, content) of each file to write, name being
+    the style or profile, and content an iterator rendering the file lazily."""
+    if args.profiles:
+        from profiles import resolve_profiles  # pylint: disable=import-outside-toplevel
+
+        resolved_profiles = resolve_profiles(
+            args.profiles,
+            options_groups,
+            analyzer_flags,
+            SWIFT_WARNINGS_QUERY.tool_identifier,
+            args.prefix,
+        )
+        for (
+            profile,
+            profile_groups,
+            values,
+            profile_analyzer_flags,
+        ) in resolved_profiles:
+            content = iter_xcconfig(
+                xcode_version,
+                profile_groups,
+                profile_analyzer_flags,
+                default_values=profile.base,
+                add_doc=args.doc,
+                prefix=profile.prefix or args.prefix,
+                use_new_syntax=args.new_syntax,
+                values=values,
+                description=f"Profile {profile.name}, based on the "
+                f"{profile.base} defaults",
+            )
+            yield f"profile {profile.name}", profile.filename, content
+        return
+
+    for default_values in output_styles(args):
+        content = iter_style_xcconfig(
+            args, xcode_version, options_groups, analyzer_flags, default_values
+        )
+        filename = xcconfig_filename(default_values or "none", args.delta_from)
+        yield default_values or "none", filename, content
+
+
+def write_xcconfig_files(args, xcode_version, options_groups, analyzer_flags):
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    written_paths = []
+    output_files = iter_output_files(
+        args, xcode_version, options_groups, analyzer_flags
+    )
+    for name, filename, xcconfig in output_files:
+        # Rendering is lazy, it happens while the file is written
+        with run_stage(f"render {name}"):
+            if args.output_dir:
+                xcconfig_path = path.join(args.output_dir, filename)
+                write_file_atomically(xcconfig_path, xcconfig)
+                print(f"Wrote {xcconfig_path}", file=sys.stderr)
+                written_paths.append(xcconfig_path)
+            else:
+                sys.stdout.writelines(xcconfig)
+
+    return written_paths
+
+
+# The modules reading Xcode's files: when they change, Xcode is read again
+READ_MODULES = ("openstep_plist", "xml_plist", "xcspec", "clang_analyzer", "xcode")
+
+# The modules turning what was read into xcconfig files: when they change (e.g.
+# an edited table), the files are rendered again from the snapshot
+RENDER_MODULES = ("tables", "xcspec", "clang_analyzer", "generate", "profiles")
+
+
+def manifest_keys(args):
+    """Return what the xcconfig files depend on, besides Xcode's files.
+
+    The first dict decides which of Xcode's files are read, the second how
+    they are turned into xcconfig files.
+    """
+    inputs_key = {
+        "xcode_path": args.xcode_path and path.realpath(args.xcode_path),
+        "snapshot": args.from_snapshot and path.realpath(args.from_snapshot),
+        "swift": args.swift,
+        "analyzer_help_flags": analyzer_help_flags(args),
+        "code": modules_digest(READ_MODULES),
+    }
+    render_key = {
+        "styles": output_styles(args),
+        "localizability": args.localizability,
+        "doc": args.doc,
+        "prefix": args.prefix,
+        "new_syntax": args.new_syntax,
+        "delta_from": args.delta_from,
+        "profiles": args.profiles and [profile.key() for profile in args.profiles],
+        "code": modules_digest(RENDER_MODULES),
+        "tables": tables_digest(
+            {
+                "STRICT_DEFAULTS_EXCEPTIONS": STRICT_DEFAULTS_EXCEPTIONS,
+                "AGGRESSIVE_DEFAULTS_EXCEPTIONS": AGGRESSIVE_DEFAULTS_EXCEPTIONS,
+                "INGORED_BUILD_SETTINGS": INGORED_BUILD_SETTINGS,
+                "IGNORED_CLANG_ANALYZER_FLAGS": IGNORED_CLANG_ANALYZER_FLAGS,
+            }
+        ),
+    }
+
+    return inputs_key, render_key
+
+
+def find_manifest(args, versioned_output_dir):
+    if not versioned_output_dir:
+        return Manifest(args.output_dir)
+
+    # The version, hence the folder, of this install is only known once Xcode
+    # is read, look for the folder it was written to last time
+    xcode_path = path.realpath(args.xcode_path)
+    for output_dir in glob.glob(path.join(glob.escape(args.output_dir), "Xcode-*")):
+        manifest = Manifest(output_dir)
+        if manifest.xcode_path == xcode_path:
+            return manifest
+
+    return Manifest(args.output_dir)
+
+
+def update_output_dir(
+    args, xcspec_cache=None, checkers_cache=None, versioned_output_dir=False
+):
+    """Write the xcconfig files to args.output_dir, unless they are up to date.
+
+    The manifest in the output directory tells which work can be skipped: if
+    only our own options or tables changed, the files are rendered again from
+    the snapshot of Xcode's data, without reading Xcode. With
+    versioned_output_dir, args.output_dir is set to its Xcode-<version>/
+    subdirectory.
+
+    Returns the (version, build) of the Xcode install.
+    """
+    with run_stage("check_manifest"):
+        manifest = find_manifest(args, versioned_output_dir)
+        input_files = manifest.input_files(xcode_input_paths(args))
+        inputs_key, render_key = manifest_keys(args)
+        if args.force:
+            status = REGENERATE
+        else:
+            status = manifest.status(input_files, inputs_key, render_key)
+
+    if status == UP_TO_DATE:
+        manifest.refresh_input_files(input_files)
+        print(f"{manifest.output_dir} is up to date", file=sys.stderr)
+        return tuple(manifest.data["xcode_version"])
+
+    xcode_inputs = None
+    if status == RENDER:
+        xcode_inputs = manifest.load_snapshot(
+            xcspec_names(args), analyzer_help_flags(args)
+        )
+    if xcode_inputs is None:
+        xcode_inputs = read_inputs(args, xcspec_cache, checkers_cache)
+    options_groups, analyzer_flags = build_xcode_model(args, xcode_inputs)
+
+    version_info = xcode_inputs["version"]
+    if versioned_output_dir:
+        args.output_dir = path.join(args.output_dir, f"Xcode-{version_info[0]}")
+        os.makedirs(args.output_dir, exist_ok=True)
+        if path.realpath(args.output_dir) != path.realpath(manifest.output_dir):
+            manifest = Manifest(args.output_dir)
+
+    written_paths = write_xcconfig_files(
+        args, format_xcode_version(*version_info), options_groups, analyzer_flags
+    )
+    manifest.save(input_files, inputs_key, render_key, written_paths, xcode_inputs)
+
+    return version_info
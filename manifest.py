@@ -0,0 +1,177 @@
+"""Manifest of the inputs the xcconfig files in an output directory came from.
+
+The manifest records the identity (stat information and content hash) of
+every Xcode file the xcconfig files were generated from, along with the
+options, tables and code they were rendered with, and the hash of each file
+written. A snapshot of the data read from Xcode is saved next to it, in the
+format of `export-snapshot` (plain data, never unpickled: output directories
+are often committed, or shared between CI jobs).
+
+On the next run, this tells whether the files are up to date (nothing to do),
+only need to be rendered again from the snapshot (our own options or tables
+changed, or an output file was modified), or whether Xcode must be read again.
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from os import path
+
+from cache import file_digest, stat_stamp, write_file_atomically
+
+# Bump this whenever the manifest layout, or the way files are rendered, changes
+MANIFEST_FORMAT_VERSION = 2
+
+MANIFEST_FILENAME = ".warnings2xcconfig-manifest.json"
+SNAPSHOT_FILENAME = ".warnings2xcconfig-inputs.waxsnap"
+
+# Results of Manifest.status()
+UP_TO_DATE = "up-to-date"
+RENDER = "render"
+REGENERATE = "regenerate"
+
+
+def tables_digest(tables):
+    """Return a stable hash of a dict of tables (dicts or sets)."""
+    canonical = {
+        name: sorted(table) if isinstance(table, (set, frozenset)) else table
+        for name, table in tables.items()
+    }
+    encoded = json.dumps(canonical, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def modules_digest(module_names):
+    """Return the hash of the source of the modules, which changes when the
+    script is upgraded. Works inside the .pyz archive too."""
+    import importlib.util  # pylint: disable=import-outside-toplevel
+
+    digest = hashlib.sha256()
+    for module_name in module_names:
+        spec = importlib.util.find_spec(module_name)
+        digest.update(spec.loader.get_data(spec.origin))
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.manifest_path = path.join(output_dir, MANIFEST_FILENAME)
+        self.snapshot_path = path.join(output_dir, SNAPSHOT_FILENAME)
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, encoding="utf-8") as manifest_fp:
+                data = json.load(manifest_fp)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_FORMAT_VERSION:
+            return None
+
+        return data
+
+    @property
+    def xcode_path(self):
+        return self.data["inputs"]["key"].get("xcode_path") if self.data else None
+
+    def input_files(self, file_paths):
+        """Return the identity of each file, as recorded in a manifest.
+
+        Files are only hashed again when their stat information changed since
+        they were recorded.
+        """
+        recorded_files = self.data["inputs"]["files"] if self.data else {}
+
+        input_files = {}
+        for file_path in file_paths:
+            file_path = path.realpath(file_path)
+            stamp = list(stat_stamp(os.stat(file_path)))
+            recorded = recorded_files.get(file_path)
+            if recorded and recorded["stamp"] == stamp:
+                digest = recorded["sha256"]
+            else:
+                digest = file_digest(file_path)
+            input_files[file_path] = {"stamp": stamp, "sha256": digest}
+
+        return input_files
+
+    def status(self, input_files, inputs_key, render_key):
+        """Compare the current inputs with the recorded ones.
+
+        Returns UP_TO_DATE, RENDER when only render_key or the output files
+        changed (the snapshot can be used instead of reading Xcode), or
+        REGENERATE.
+        """
+        if self.data is None:
+            return REGENERATE
+
+        recorded_inputs = self.data["inputs"]
+        if recorded_inputs["key"] != inputs_key:
+            return REGENERATE
+
+        recorded_digests = {
+            file_path: recorded["sha256"]
+            for file_path, recorded in recorded_inputs["files"].items()
+        }
+        digests = {
+            file_path: current["sha256"] for file_path, current in input_files.items()
+        }
+        if recorded_digests != digests:
+            return REGENERATE
+
+        if self.data["render"] != render_key or not self._outputs_unchanged():
+            return RENDER
+
+        return UP_TO_DATE
+
+    def _outputs_unchanged(self):
+        for file_name, digest in self.data["outputs"].items():
+            try:
+                if file_digest(path.join(self.output_dir, file_name)) != digest:
+                    return False
+            except FileNotFoundError:
+                return False
+
+        return True
+
+    def load_snapshot(self, xcspecs, help_flags):
+        """Return the data read from Xcode last time, or None."""
+        # pylint: disable=import-outside-toplevel
+        from snapshot import SnapshotError, read_snapshot
+
+        try:
+            return read_snapshot(self.snapshot_path, xcspecs, help_flags)
+        except (OSError, ValueError, KeyError, zlib.error, SnapshotError):
+            return None
+
+    def refresh_input_files(self, input_files):
+        # Only the stat information changed (e.g. the files were touched),
+        # record it so the files aren't hashed again next time
+        if self.data["inputs"]["files"] != input_files:
+            self.data["inputs"]["files"] = input_files
+            self._write()
+
+    def save(self, input_files, inputs_key, render_key, output_paths, snapshot):
+        # pylint: disable=too-many-arguments,import-outside-toplevel
+        from snapshot import write_snapshot
+
+        write_snapshot(self.snapshot_path, snapshot)
+
+        self.data = {
+            "version": MANIFEST_FORMAT_VERSION,
+            "xcode_version": list(snapshot["version"]),
+            "inputs": {"key": inputs_key, "files": input_files},
+            "render": render_key,
+            "outputs": {
+                path.basename(output_path): file_digest(output_path)
+                for output_path in output_paths
+            },
+        }
+        self._write()
+
+    def _write(self):
+        manifest = json.dumps(self.data, indent=2, sort_keys=True)
+        write_file_atomically(self.manifest_path, [manifest, "\n"])
@@ -0,0 +1,376 @@
+"""Reader for the old-style (OpenStep/NeXTSTEP) ASCII property list format.
+
+Apple still ships its xcspec files in this format. This module parses them
+directly into the same dict/list/str structure `plistlib` would give after a
+`plutil -convert xml1` round-trip, without spawning a process or touching the
+disk.
+
+The API mirrors `plistlib`: use `load()` on a binary file object, or `loads()`
+on bytes/str. XML and binary plists are transparently handed to `plistlib`.
+
+When only a few dictionaries of a root array are needed (e.g. a few tools of
+a xcspec), `load_items()` skims the array instead: it only reads a few keys of
+each dictionary, jumps over everything else without building any object, and
+parses a dictionary when its `load()` is called.
+"""
+
+import plistlib
+import re
+
+__all__ = ["LazyItem", "PlistParseError", "load", "load_items", "loads"]
+
+_UNQUOTED_CHARS = r"[A-Za-z0-9_$+/:.\-]"
+
+# Master scanner: each alternative is a named group, the first one matching at
+# the current position wins. Whitespace and comments are folded into `skip`.
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<skip>(?:\s+|//[^\n]*|/\*.*?\*/)+)
+    |"(?P<dquoted>(?:[^"\\]|\\.)*)"
+    |'(?P<squoted>(?:[^'\\]|\\.)*)'
+    |(?P<unquoted>"""
+    + _UNQUOTED_CHARS
+    + r"""+)
+    |<(?P<data>[0-9A-Fa-f\s]*)>
+    |(?P<punct>[{}()=;,])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Jumps over the inside of a skipped value, up to the next bracket. Strings
+# and comments are matched whole, as they may contain brackets.
+_SKIP_RE = re.compile(
+    r"""
+    [^"'{}()/]*
+    (?:
+        (?:
+            "[^"\\]*(?:\\.[^"\\]*)*"
+            |'[^'\\]*(?:\\.[^'\\]*)*'
+            |//[^\n]*
+            |/\*.*?\*/
+            |/
+        )
+        [^"'{}()/]*
+    )*
+    [{}()]
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_ESCAPE_RE = re.compile(r"\\(U[0-9A-Fa-f]{1,4}|[0-7]{1,3}|.)", re.DOTALL)
+
+_SIMPLE_ESCAPES = {
+    "a": "\a",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+}
+
+# Token kinds yielded by the tokenizer
+_STRING = "string"
+_DATA = "data"
+_PUNCT = "punct"
+_EOF = "eof"
+
+
+class PlistParseError(ValueError):
+    def __init__(self, message, text, pos):
+        line = text.count("\n", 0, pos) + 1
+        super().__init__(f"{message} (line {line})")
+        self.pos = pos
+        self.line = line
+
+
+def _unescape_match(match):
+    escape = match.group(1)
+    if escape[0] == "U":
+        return chr(int(escape[1:], 16))
+    if escape[0] in "01234567":
+        # Octal escapes are in the NeXTSTEP encoding, which matches Latin-1
+        # for every character Apple actually uses in xcspecs.
+        return chr(int(escape, 8))
+    return _SIMPLE_ESCAPES.get(escape, escape)
+
+
+def _unescape(string):
+    if "\\" not in string:
+        return string
+    return _ESCAPE_RE.sub(_unescape_match, string)
+
+
+def _tokenize(text, pos=0):
+    """Yield (kind, value, position) tuples, lazily, until the end of text."""
+    end = len(text)
+    match_at = _TOKEN_RE.match
+
+    while pos < end:
+        match = match_at(text, pos)
+        if match is None:
+            raise PlistParseError(f"Unexpected character {text[pos]!r}", text, pos)
+
+        group = match.lastgroup
+        if group == "unquoted":
+            yield _STRING, match.group(group), pos
+        elif group in ("dquoted", "squoted"):
+            yield _STRING, _unescape(match.group(group)), pos
+        elif group == "punct":
+            yield _PUNCT, match.group(group), pos
+        elif group == "data":
+            hex_digits = "".join(match.group(group).split())
+            if len(hex_digits) % 2:
+                raise PlistParseError("Odd number of digits in data", text, pos)
+            yield _DATA, bytes.fromhex(hex_digits), pos
+
+        pos = match.end()
+
+    yield _EOF, None, end
+
+
+class _Parser:
+    def __init__(self, text, pos=0):
+        self.text = text
+        self.tokens = _tokenize(text, pos)
+
+    def _next(self):
+        return next(self.tokens)
+
+    def _error(self, message, pos):
+        return PlistParseError(message, self.text, pos)
+
+    def parse(self):
+        kind, value, pos = self._next()
+        if kind == _EOF:
+            raise self._error("Empty property list", pos)
+
+        root = self._parse_value(kind, value, pos)
+
+        kind, value, pos = self._next()
+        if kind != _EOF:
+            raise self._error(f"Unexpected {value!r} after root object", pos)
+
+        return root
+
+    def parse_value(self):
+        """Parse the value at the current position, ignoring what follows."""
+        return self._parse_value(*self._next())
+
+    def _parse_value(self, kind, value, pos):
+        if kind in (_STRING, _DATA):
+            return value
+        if value == "{":
+            return self._parse_dict()
+        if value == "(":
+            return self._parse_array()
+        raise self._error(f"Expected a value, found {value!r}", pos)
+
+    def _parse_dict(self):
+        result = {}
+        while True:
+            kind, key, pos = self._next()
+            if kind == _PUNCT and key == "}":
+                return result
+            if kind != _STRING:
+                raise self._error(f"Expected a dictionary key, found {key!r}", pos)
+
+            kind, value, pos = self._next()
+            if value != "=" or kind != _PUNCT:
+                raise self._error(f"Expected '=' after key {key!r}", pos)
+
+            result[key] = self._parse_value(*self._next())
+
+            kind, value, pos = self._next()
+            if value != ";" or kind != _PUNCT:
+                raise self._error(f"Expected ';' after value of {key!r}", pos)
+
+    def _parse_array(self):
+        result = []
+        while True:
+            kind, value, pos = self._next()
+            if kind == _PUNCT and value == ")":
+                return result
+
+            result.append(self._parse_value(kind, value, pos))
+
+            kind, value, pos = self._next()
+            if kind == _PUNCT and value == ")":
+                return result
+            if value != "," or kind != _PUNCT:
+                raise self._error("Expected ',' or ')' in array", pos)
+
+
+class LazyItem:
+    """A dictionary of a root array, only parsed when load() is called.
+
+    `summary` holds the string values of the keys `load_items()` was asked
+    for, when the dictionary has them.
+    """
+
+    __slots__ = ("summary", "_text", "_pos", "_value")
+
+    def __init__(self, summary, text=None, pos=None, value=None):
+        self.summary = summary
+        self._text = text
+        self._pos = pos
+        self._value = value
+
+    def load(self):
+        if self._text is None:
+            return self._value
+        return _Parser(self._text, self._pos).parse_value()
+
+
+def _next_match(text, pos):
+    match = _TOKEN_RE.match(text, pos)
+    if match is not None and match.lastgroup == "skip":
+        pos = match.end()
+        match = _TOKEN_RE.match(text, pos)
+
+    if match is None:
+        if pos >= len(text):
+            raise PlistParseError("Unexpected end of property list", text, len(text))
+        raise PlistParseError(f"Unexpected character {text[pos]!r}", text, pos)
+
+    return match
+
+
+def _expect(text, match, punct, message):
+    if match.lastgroup != "punct" or match.group() not in punct:
+        raise PlistParseError(message, text, match.start())
+    return match.group()
+
+
+def _string_token(match):
+    if match.lastgroup == "unquoted":
+        return match.group(match.lastgroup)
+    if match.lastgroup in ("dquoted", "squoted"):
+        return _unescape(match.group(match.lastgroup))
+    return None
+
+
+def _skip_value(text, match):
+    """Return the position after the value starting with match."""
+    if match.lastgroup != "punct":
+        return match.end()
+    if match.group() not in "{(":
+        raise PlistParseError(
+            f"Expected a value, found {match.group()!r}", text, match.start()
+        )
+
+    depth = 1
+    pos = match.end()
+    skip_at = _SKIP_RE.match
+    while depth:
+        skipped = skip_at(text, pos)
+        if skipped is None:
+            raise PlistParseError("Unexpected end of property list", text, pos)
+
+        pos = skipped.end()
+        if text[pos - 1] in "{(":
+            depth += 1
+        else:
+            depth -= 1
+
+    return pos
+
+
+def _skim_dict(text, pos, summary_keys):
+    """Read the summary_keys of the dictionary opening at pos, and return them
+    with the position after the dictionary."""
+    summary = {}
+    while True:
+        match = _next_match(text, pos)
+        key = _string_token(match)
+        if key is None:
+            _expect(text, match, "}", "Expected a dictionary key")
+            return summary, match.end()
+
+        match = _next_match(text, match.end())
+        _expect(text, match, "=", f"Expected '=' after key {key!r}")
+
+        match = _next_match(text, match.end())
+        value = _string_token(match) if key in summary_keys else None
+        if value is not None:
+            summary[key] = value
+        pos = _skip_value(text, match)
+
+        match = _next_match(text, pos)
+        _expect(text, match, ";", f"Expected ';' after value of {key!r}")
+        pos = match.end()
+
+
+def _skim_items(text, summary_keys):
+    match = _next_match(text, 0)
+    _expect(text, match, "(", "Expected an array of dictionaries")
+
+    items = []
+    while True:
+        match = _next_match(text, match.end())
+        if match.lastgroup == "punct" and match.group() == ")":
+            break
+        _expect(text, match, "{", "Expected a dictionary in array")
+
+        summary, pos = _skim_dict(text, match.end(), summary_keys)
+        items.append(LazyItem(summary, text, match.start()))
+
+        match = _next_match(text, pos)
+        if _expect(text, match, ",)", "Expected ',' or ')' in array") == ")":
+            break
+
+    end = match.end()
+    trailing = _TOKEN_RE.match(text, end)
+    if trailing is not None and trailing.lastgroup == "skip":
+        end = trailing.end()
+    if end < len(text):
+        raise PlistParseError("Unexpected data after root object", text, end)
+
+    return items
+
+
+def _decode(data):
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16")
+    if data.startswith(b"\xef\xbb\xbf"):
+        return data[3:].decode("utf-8")
+    return data.decode("utf-8")
+
+
+def loads(data):
+    """Parse a property list from bytes or str and return the root object."""
+    if isinstance(data, bytes):
+        if data.startswith((b"bplist", b"<?xml")):
+            return plistlib.loads(data)
+        data = _decode(data)
+
+    return _Parser(data).parse()
+
+
+def load(fp):
+    """Parse a property list from a binary file object."""
+    return loads(fp.read())
+
+
+def load_items(fp, summary_keys):
+    """Skim a property list whose root is an array of dictionaries.
+
+    Returns a LazyItem per dictionary, with the string values of the
+    summary_keys found at its top level. Nothing else is built until the
+    item's load() is called.
+    """
+    data = fp.read()
+    if data.startswith((b"bplist", b"<?xml")):
+        return [
+            LazyItem(
+                {
+                    key: item[key]
+                    for key in summary_keys
+                    if isinstance(item.get(key), str)
+                },
+                value=item,
+            )
+            for item in plistlib.loads(data)
+        ]
+
+    return _skim_items(_decode(data), frozenset(summary_keys))
@@ -0,0 +1,232 @@
+"""Profiles: named variants of the defaults styles, declared in a manifest.
+
+A profiles manifest (JSON, or TOML with Python 3.11+) declares each profile's
+base style, the settings it overrides, its variables prefix, whether it
+includes Swift settings, and regular expressions selecting the settings it
+includes or excludes:
+
+    {
+      "profiles": {
+        "App": {
+          "base": "strict",
+          "overrides": {"GCC_TREAT_WARNINGS_AS_ERRORS": "YES"},
+          "prefix": "APP"
+        },
+        "Legacy": {
+          "base": "xcode",
+          "swift": false,
+          "exclude": ["^CLANG_ANALYZER_", "_ANALYZER_FLAGS$"]
+        }
+      }
+    }
+
+The analyzer checkers without a build setting are selected together, by the
+name of the variable holding them (`<prefix>_ANALYZER_FLAGS`): when it isn't
+selected, neither it nor the WARNING_CFLAGS line adding it is written.
+
+`warnings2xcconfig.py --profiles FILE --output-dir DIR` renders every
+profile, as DIR/<name>.xcconfig, from a single scan of Xcode. The value of
+each setting is resolved once per profile, the values of a base style being
+shared by all the profiles based on it.
+"""
+
+import json
+import re
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None  # pylint: disable=invalid-name
+
+PROFILE_BASES = ("none", "clang", "xcode", "strict", "aggressive")
+
+_PROFILE_KEYS = {"base", "overrides", "prefix", "swift", "include", "exclude"}
+
+_PROFILE_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class ProfileError(Exception):
+    pass
+
+
+class Profile:
+    __slots__ = ("name", "base", "overrides", "prefix", "swift", "include", "exclude")
+
+    def __init__(
+        self,
+        name,
+        base,
+        *,
+        overrides=None,
+        prefix=None,
+        swift=True,
+        include=(),
+        exclude=(),
+    ):
+        # pylint: disable=too-many-arguments
+        # One per key of a profile in the manifest
+        self.name = name
+        self.base = base
+        self.overrides = overrides or {}
+        # None for the --prefix of the run
+        self.prefix = prefix
+        self.swift = swift
+        self.include = [re.compile(pattern) for pattern in include]
+        self.exclude = [re.compile(pattern) for pattern in exclude]
+
+    @property
+    def filename(self):
+        return f"{self.name}.xcconfig"
+
+    def selects(self, setting_name):
+        if self.include and not any(p.search(setting_name) for p in self.include):
+            return False
+        return not any(p.search(setting_name) for p in self.exclude)
+
+    def selects_analyzer_flags(self, default_prefix):
+        # The analyzer checkers without a build setting are all in one variable
+        return self.selects(f"{self.prefix or default_prefix}_ANALYZER_FLAGS")
+
+    def key(self):
+        """Return everything the profile's file depends on, as plain data."""
+        return {
+            "name": self.name,
+            "base": self.base,
+            "overrides": self.overrides,
+            "prefix": self.prefix,
+            "swift": self.swift,
+            "include": [p.pattern for p in self.include],
+            "exclude": [p.pattern for p in self.exclude],
+        }
+
+
+def _check_type(profile_name, key, value, expected_type, description):
+    if not isinstance(value, expected_type):
+        raise ProfileError(f"Profile {profile_name}: {key} must be {description}")
+
+
+def _string_list(profile_name, key, value):
+    _check_type(profile_name, key, value, list, "a list of regular expressions")
+    for pattern in value:
+        _check_type(profile_name, key, pattern, str, "a list of regular expressions")
+        try:
+            re.compile(pattern)
+        except re.error as error:
+            raise ProfileError(
+                f"Profile {profile_name}: invalid {key} pattern {pattern!r}: {error}"
+            ) from error
+    return value
+
+
+def parse_profile(name, profile_dict):
+    if not _PROFILE_NAME_RE.match(name):
+        raise ProfileError(f"Invalid profile name {name!r}, it is used as a filename")
+    _check_type(name, "the profile", profile_dict, dict, "a table")
+
+    unknown_keys = set(profile_dict) - _PROFILE_KEYS
+    if unknown_keys:
+        raise ProfileError(f"Profile {name}: unknown keys {sorted(unknown_keys)}")
+
+    base = profile_dict.get("base")
+    if base not in PROFILE_BASES:
+        raise ProfileError(
+            f"Profile {name}: base must be one of {', '.join(PROFILE_BASES)}"
+        )
+
+    overrides = profile_dict.get("overrides", {})
+    _check_type(name, "overrides", overrides, dict, "a table of strings")
+    for value in overrides.values():
+        _check_type(name, "overrides", value, str, "a table of strings")
+
+    prefix = profile_dict.get("prefix")
+    if prefix is not None:
+        _check_type(name, "prefix", prefix, str, "a string")
+    swift = profile_dict.get("swift", True)
+    _check_type(name, "swift", swift, bool, "true or false")
+
+    return Profile(
+        name,
+        base,
+        overrides=overrides,
+        prefix=prefix,
+        swift=swift,
+        include=_string_list(name, "include", profile_dict.get("include", [])),
+        exclude=_string_list(name, "exclude", profile_dict.get("exclude", [])),
+    )
+
+
+def read_profiles(file_path):
+    """Return the Profiles of a manifest, in the order they are declared."""
+    try:
+        if file_path.endswith(".toml"):
+            if tomllib is None:
+                raise ProfileError("TOML profiles manifests require Python 3.11+")
+            with open(file_path, "rb") as manifest_fp:
+                manifest = tomllib.load(manifest_fp)
+        else:
+            with open(file_path, encoding="utf-8") as manifest_fp:
+                manifest = json.load(manifest_fp)
+    except OSError as error:
+        raise ProfileError(f"Can't read {file_path}: {error}") from error
+    except ValueError as error:
+        # Both json.JSONDecodeError and tomllib.TOMLDecodeError
+        raise ProfileError(f"Can't parse {file_path}: {error}") from error
+
+    profiles = manifest.get("profiles") if isinstance(manifest, dict) else None
+    if not isinstance(profiles, dict) or not profiles:
+        raise ProfileError(f"{file_path} declares no profiles")
+
+    return [parse_profile(name, profile) for name, profile in profiles.items()]
+
+
+def resolve_profiles(
+    profiles, options_groups, analyzer_flags, swift_tool_identifier, default_prefix
+):
+    """Resolve the value of every setting of each profile.
+
+    Returns a list of (profile, options_groups, values, analyzer_flags)
+    tuples, values being a {setting name: value} dict of the settings the
+    profile selects. Settings overridden by a profile but missing from this
+    Xcode version are ignored.
+    """
+    # The values of each base style, computed once for all the profiles based
+    # on it, and only for the settings some profile selects
+    base_values = {}
+
+    resolved = []
+    for profile in profiles:
+        style_values = base_values.setdefault(profile.base, {})
+        profile_groups = [
+            group
+            for group in options_groups
+            if profile.swift or group.tool_identifier != swift_tool_identifier
+        ]
+
+        values = {}
+        for group in profile_groups:
+            for option in group.options:
+                if not profile.selects(option.name):
+                    continue
+
+                value = profile.overrides.get(option.name)
+                if value is None:
+                    value = style_values.get(option.name)
+                if value is None:
+                    value = option.default_value_for_style(profile.base)
+                    style_values[option.name] = value
+                values[option.name] = value
+
+        resolved.append(
+            (
+                profile,
+                profile_groups,
+                values,
+                (
+                    analyzer_flags
+                    if profile.selects_analyzer_flags(default_prefix)
+                    else []
+                ),
+            )
+        )
+
+    return resolved
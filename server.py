@@ -0,0 +1,484 @@
+"""Generation server keeping the parsed Xcode installs in memory.
+
+`warnings2xcconfig.py serve` loads each Xcode install once, on the first
+request for it, and then answers requests from memory. Before each request,
+the install's files are stat()-ed, and the install is loaded again if any of
+them changed.
+
+Requests are sent by `warnings2xcconfig.py --server [ADDRESS] ...`, which
+takes the same arguments as a normal run: they are parsed again by the server,
+relative to the client's working directory, and the server returns the content
+of the files to write. Without --xcode-path, the server uses the install
+xcode-select selects with the client's DEVELOPER_DIR.
+
+The server speaks HTTP on a Unix socket only its user can access (ADDRESS
+being `unix:/path/to/socket`), or, when asked to, on a local TCP port. Other
+users of the machine can connect to the port: requests to it must carry the
+token of the WARNINGS2XCCONFIG_SERVER_TOKEN environment variable. Only the
+Xcode installs and snapshots allowed with `serve --allow` (and the one
+selected with xcode-select) are read.
+"""
+
+import argparse
+import hmac
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+
+from cache import (
+    default_cache_dir,
+    open_file_cache,
+    stat_stamp,
+    write_file_atomically,
+)
+from cli import default_server_socket_path, parse_script_args
+from generate import iter_output_files, load_xcode_model
+from xcode import (
+    analyzer_help_flags,
+    format_xcode_version,
+    selected_xcode_path,
+    xcode_input_paths,
+)
+
+# The shared secret TCP requests must carry, known to the server and clients
+TOKEN_ENV_VAR = "WARNINGS2XCCONFIG_SERVER_TOKEN"
+
+# How long the install selected with xcode-select is remembered, in seconds
+XCODE_SELECT_TTL = 10
+
+_UNIX_ADDRESS_PREFIX = "unix:"
+
+
+class RequestError(Exception):
+    pass
+
+
+class LoadedInstall:
+    __slots__ = ("stamps", "version_info", "options_groups", "analyzer_flags")
+
+    def __init__(self, stamps, version_info, options_groups, analyzer_flags):
+        self.stamps = stamps
+        self.version_info = version_info
+        self.options_groups = options_groups
+        self.analyzer_flags = analyzer_flags
+
+
+class ModelStore:  # pylint: disable=too-many-instance-attributes
+    """The models of the Xcode installs requested so far, by install and by
+    the options they were built with."""
+
+    def __init__(self, cache_dir=None, max_subprocesses=4, allowed_paths=()):
+        self.cache_dir = cache_dir
+        self.max_subprocesses = max_subprocesses
+        self.allowed_paths = {path.realpath(p) for p in allowed_paths}
+        self._installs = {}
+        # Guards _installs and _install_locks. Loading an install only holds
+        # its own lock, requests for other installs are answered meanwhile.
+        self._lock = threading.Lock()
+        self._install_locks = {}
+        self._selected_lock = threading.Lock()
+        # {DEVELOPER_DIR: (install path, time it was found)}
+        self._selected_xcode_paths = {}
+
+    def selected_xcode_path(self, developer_dir=None):
+        """Return the install xcode-select selects with DEVELOPER_DIR set to
+        developer_dir (or unset when None), like in a client's environment."""
+        now = time.monotonic()
+        with self._selected_lock:
+            selected = self._selected_xcode_paths.get(developer_dir)
+            if selected is None or now - selected[1] > XCODE_SELECT_TTL:
+                environ = dict(os.environ)
+                environ.pop("DEVELOPER_DIR", None)
+                if developer_dir is not None:
+                    environ["DEVELOPER_DIR"] = developer_dir
+                selected = (selected_xcode_path(environ), now)
+                self._selected_xcode_paths[developer_dir] = selected
+
+            return selected[0]
+
+    @staticmethod
+    def _install_key(args):
+        # Everything a model depends on. Other options only affect rendering.
+        return (
+            path.realpath(args.from_snapshot or args.xcode_path),
+            args.swift,
+            tuple(analyzer_help_flags(args)),
+            args.localizability,
+        )
+
+    @staticmethod
+    def _stamps(args):
+        return [stat_stamp(os.stat(p)) for p in xcode_input_paths(args)]
+
+    def check_allowed(self, args):
+        """Raise RequestError unless the server may read the install (or
+        snapshot) of args."""
+        real_path = path.realpath(args.from_snapshot or args.xcode_path)
+        if real_path in self.allowed_paths:
+            return
+        # The install the server itself would use
+        server_xcode_path = self.selected_xcode_path(os.environ.get("DEVELOPER_DIR"))
+        if not args.from_snapshot and real_path == path.realpath(server_xcode_path):
+            return
+
+        raise RequestError(
+            f"{args.from_snapshot or args.xcode_path} isn't allowed, "
+            "start the server with --allow PATH"
+        )
+
+    def _install_lock(self, key):
+        with self._lock:
+            return self._install_locks.setdefault(key, threading.Lock())
+
+    def get(self, args):
+        """Return the LoadedInstall for args, loading it if needed."""
+        key = self._install_key(args)
+        try:
+            stamps = self._stamps(args)
+        except OSError as error:
+            raise RequestError(f"Can't read Xcode install: {error}") from error
+
+        with self._install_lock(key):
+            with self._lock:
+                install = self._installs.get(key)
+            if install is not None and install.stamps == stamps:
+                return install
+
+            print(f"Loading {args.from_snapshot or args.xcode_path}", file=sys.stderr)
+            args.cache_dir = self.cache_dir
+            args.cache = self.cache_dir is not None
+            args.refresh_cache = False
+            args.max_subprocesses = self.max_subprocesses
+            version_info, options_groups, analyzer_flags = load_xcode_model(
+                args,
+                xcspec_cache=open_file_cache(args, "xcspec"),
+                checkers_cache=open_file_cache(args, "clang-checkers"),
+            )
+
+            install = LoadedInstall(
+                stamps, version_info, options_groups, analyzer_flags
+            )
+            with self._lock:
+                self._installs[key] = install
+            return install
+
+    def loaded_installs(self):
+        with self._lock:
+            return [
+                {
+                    "xcode_path": xcode_path,
+                    "version": format_xcode_version(*install.version_info),
+                    "swift": swift,
+                    "analyzer_help_flags": list(analyzer_help_flags),
+                    "localizability": localizability,
+                }
+                for (
+                    xcode_path,
+                    swift,
+                    analyzer_help_flags,
+                    localizability,
+                ), install in self._installs.items()
+            ]
+
+
+def generate(store, argv, cwd, developer_dir=None):
+    """Return the response to a generation request for the CLI arguments,
+    given in the cwd directory of the client, whose DEVELOPER_DIR is
+    developer_dir."""
+    if not path.isabs(cwd):
+        raise RequestError(f"The client's directory {cwd} isn't absolute")
+    if developer_dir is not None:
+        if not isinstance(developer_dir, str):
+            raise RequestError("The client's DEVELOPER_DIR must be a string")
+        developer_dir = path.join(cwd, developer_dir)
+
+    try:
+        args = parse_script_args(argv, cwd=cwd)
+    except SystemExit as error:
+        raise RequestError(f"Invalid arguments: {' '.join(argv)}") from error
+
+    if args.batch:
+        raise RequestError("Scanning several Xcode installs isn't supported")
+
+    if args.xcode_path is None and not args.from_snapshot:
+        args.xcode_path = store.selected_xcode_path(developer_dir)
+    store.check_allowed(args)
+
+    install = store.get(args)
+    xcode_version = format_xcode_version(*install.version_info)
+
+    files = [
+        {"filename": filename, "content": "".join(content)}
+        for _, filename, content in iter_output_files(
+            args, xcode_version, install.options_groups, install.analyzer_flags
+        )
+    ]
+
+    return {"xcode_version": xcode_version, "files": files}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = "warnings2xcconfig"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if not self._check_token():
+            return
+
+        if self.path != "/status":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        self._send_json(200, {"installs": self.server.store.loaded_installs()})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        if not self._check_token():
+            return
+
+        if self.path != "/generate":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            response = generate(
+                self.server.store,
+                request["argv"],
+                request["cwd"],
+                request.get("developer_dir"),
+            )
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            self._send_json(400, {"error": f"Invalid request: {error}"})
+        except RequestError as error:
+            self._send_json(400, {"error": str(error)})
+        except Exception as error:  # pylint: disable=broad-except
+            self._send_json(500, {"error": f"{type(error).__name__}: {error}"})
+        else:
+            self._send_json(200, response)
+
+    def _check_token(self):
+        token = self.server.token
+        if token is None:
+            return True
+
+        authorization = self.headers.get("Authorization", "")
+        if hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+            return True
+
+        self._send_json(401, {"error": f"Missing or wrong {TOKEN_ENV_VAR}"})
+        return False
+
+    def _send_json(self, status, body):
+        encoded = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def address_string(self):
+        # Unix sockets have no client address
+        return self.client_address[0] if self.client_address else "local"
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        super().server_bind()
+        os.chmod(self.server_address, 0o600)
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ""
+
+
+def make_server(store, socket_path=None, port=None, token=None):
+    """Listen on the Unix socket, or on the port of 127.0.0.1, which
+    requires a token."""
+    if port is not None:
+        if not token:
+            raise ValueError("Listening on a TCP port requires a token")
+        server = ThreadingHTTPServer(("127.0.0.1", port), RequestHandler)
+    else:
+        os.makedirs(path.dirname(socket_path), mode=0o700, exist_ok=True)
+        # Left by a server which didn't exit cleanly
+        if path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, RequestHandler)
+
+    # pylint: disable=attribute-defined-outside-init
+    # The request handlers reach the store and token through their server
+    server.store = store
+    server.token = token
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _connect(address, timeout):
+    if address.startswith(_UNIX_ADDRESS_PREFIX):
+        _, _, socket_path = address.partition(":")
+        return _UnixHTTPConnection(socket_path, timeout)
+
+    host, _, port = address.rpartition(":")
+    return http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=timeout)
+
+
+def generate_remotely(args, argv, timeout=300):
+    """Send a generation request to the server at args.server, and write the
+    files it returned like a normal run would. Returns the exit status."""
+    headers = {"Content-Type": "application/json"}
+    token = os.environ.get(TOKEN_ENV_VAR)
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    connection = _connect(args.server, timeout)
+    try:
+        connection.request(
+            "POST",
+            "/generate",
+            body=json.dumps(
+                {
+                    "argv": argv,
+                    "cwd": os.getcwd(),
+                    # The server selects the install with the client's
+                    "developer_dir": os.environ.get("DEVELOPER_DIR") or None,
+                }
+            ),
+            headers=headers,
+        )
+        response = connection.getresponse()
+        body = json.loads(response.read())
+    except (OSError, ValueError, http.client.HTTPException) as error:
+        # Also when something else than the server answered
+        print(f"error: can't reach server at {args.server}: {error}", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+
+    if response.status != 200:
+        print(f"error: {body.get('error')}", file=sys.stderr)
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    for generated_file in body["files"]:
+        if args.output_dir:
+            xcconfig_path = path.join(args.output_dir, generated_file["filename"])
+            write_file_atomically(xcconfig_path, [generated_file["content"]])
+            print(f"Wrote {xcconfig_path}", file=sys.stderr)
+        else:
+            sys.stdout.write(generated_file["content"])
+
+    return 0
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="warnings2xcconfig.py serve",
+        description="Serve xcconfig generation requests, keeping the parsed "
+        "Xcode installs in memory. Send requests with "
+        "`warnings2xcconfig.py --server [ADDRESS] [options]`.",
+    )
+    listen_group = parser.add_mutually_exclusive_group()
+    listen_group.add_argument(
+        "--socket",
+        metavar="PATH",
+        default=default_server_socket_path(),
+        help="listen on this Unix socket, only accessible to the current user "
+        "(send requests to unix:PATH, default is the socket --server "
+        "connects to)",
+    )
+    listen_group.add_argument(
+        "--port",
+        type=int,
+        help="listen on this port of 127.0.0.1 instead. Requests must carry "
+        f"the token of the {TOKEN_ENV_VAR} environment variable",
+    )
+    parser.add_argument(
+        "--allow",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="an Xcode install or snapshot requests may use (can be "
+        "repeated). The install selected with xcode-select is always allowed",
+    )
+    parser.add_argument(
+        "--max-subprocesses",
+        type=int,
+        default=4,
+        metavar="N",
+        help="maximum number of external commands run concurrently",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help="only keep the parsed Xcode installs in memory, not on disk",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="PATH",
+        default=default_cache_dir(),
+        help="where to store the cache of parsed Xcode files",
+    )
+    args = parser.parse_args(argv)
+
+    args.token = os.environ.get(TOKEN_ENV_VAR)
+    if args.port is not None and not args.token:
+        parser.error(f"--port requires a token in {TOKEN_ENV_VAR}")
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = ModelStore(
+        cache_dir=args.cache_dir if args.cache else None,
+        max_subprocesses=args.max_subprocesses,
+        allowed_paths=args.allow,
+    )
+    if args.port is not None:
+        server = make_server(store, port=args.port, token=args.token)
+        address = f"127.0.0.1:{args.port}"
+    else:
+        server = make_server(store, socket_path=args.socket)
+        address = f"unix:{args.socket}"
+
+    # Exit cleanly (removing the socket) when stopped by a service manager
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    print(f"Listening on {address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.port is None and path.exists(args.socket):
+            os.remove(args.socket)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,473 @@
+"""Index of the settings in the committed `Xcode-*/` xcconfig files.
+
+All the xcconfig files are parsed once into a SQLite database, mapping each
+setting, Xcode version and defaults style to its value, so questions such as
+"when did this setting appear?" or "what changed between these two versions?"
+are answered without grepping every file.
+
+The index is refreshed before each query: only the files which were added,
+changed or removed since the last run are parsed again.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from os import path
+
+from cache import file_digest
+
+# Bump this whenever the database schema, or the way files are parsed, changes
+INDEX_FORMAT_VERSION = 1
+
+DEFAULT_INDEX_FILENAME = ".settings-index.sqlite"
+
+_VERSION_DIR_RE = re.compile(r"^Xcode-(?P<version>\d+(?:\.\d+)*)$")
+_XCCONFIG_FILENAME_RE = re.compile(r"^Warnings-(?P<style>\w+)Defaults\.xcconfig$")
+_HEADER_VERSION_RE = re.compile(r"for Xcode (?P<version>\S+) \((?P<build>\w+)\)")
+_ANALYZER_CHECKER_RE = re.compile(r"-analyzer-checker -Xclang (?P<checker>\S+)")
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE versions (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    sort_key TEXT NOT NULL,
+    build TEXT
+);
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    version_id INTEGER NOT NULL REFERENCES versions(id),
+    style TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE settings (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE entries (
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    setting_id INTEGER NOT NULL REFERENCES settings(id),
+    value TEXT NOT NULL,
+    PRIMARY KEY (file_id, setting_id)
+) WITHOUT ROWID;
+CREATE INDEX entries_by_setting ON entries (setting_id);
+"""
+
+
+def version_sort_key(version):
+    # Stored as text, zero-padded so that "9.3" sorts before "10.0"
+    return ".".join(f"{int(part):04d}" for part in version.split("."))
+
+
+def parse_xcconfig_settings(lines):
+    """Return a dict of the settings assigned in an xcconfig file.
+
+    A setting assigned several times with `$(inherited)` (as the analyzer
+    flags are, with --new-syntax) has its values concatenated. Analyzer
+    checkers enabled in a setting are listed as `<SETTING>:<checker>` pseudo
+    settings instead, to be diffable one by one.
+    """
+    settings = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+
+        name, equal_sign, value = line.partition("=")
+        if not equal_sign:
+            continue
+        name = name.strip()
+        value = value.strip()
+
+        previous_value = settings.get(name)
+        if previous_value is not None and "$(inherited)" in value:
+            value = value.replace("$(inherited)", previous_value)
+        settings[name] = value
+
+    for name, value in list(settings.items()):
+        checkers = _ANALYZER_CHECKER_RE.findall(value)
+        if checkers:
+            del settings[name]
+            for checker in checkers:
+                settings[f"{name}:{checker}"] = "YES"
+
+    return settings
+
+
+def find_xcconfig_files(root_dir):
+    """Yield (version, style, file path) for each committed xcconfig file."""
+    for dir_name in sorted(os.listdir(root_dir)):
+        dir_match = _VERSION_DIR_RE.match(dir_name)
+        dir_path = path.join(root_dir, dir_name)
+        if not dir_match or not path.isdir(dir_path):
+            continue
+
+        for file_name in sorted(os.listdir(dir_path)):
+            file_match = _XCCONFIG_FILENAME_RE.match(file_name)
+            if file_match:
+                style = file_match.group("style").lower()
+                file_path = path.join(dir_path, file_name)
+                yield dir_match.group("version"), style, file_path
+
+
+class SettingsIndex:
+    def __init__(self, index_path, root_dir):
+        self.root_dir = root_dir
+        self.db = sqlite3.connect(index_path)
+        self._ensure_schema()
+
+    def close(self):
+        self.db.close()
+
+    def _ensure_schema(self):
+        try:
+            row = self.db.execute(
+                "SELECT value FROM meta WHERE key = 'format_version'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+
+        if row is not None and row[0] == str(INDEX_FORMAT_VERSION):
+            return
+
+        # Missing or outdated index, start over
+        with self.db:
+            tables = self.db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall()
+            for (table,) in tables:
+                self.db.execute(f'DROP TABLE "{table}"')
+            self.db.executescript(_SCHEMA)
+            self.db.execute(
+                "INSERT INTO meta (key, value) VALUES ('format_version', ?)",
+                (str(INDEX_FORMAT_VERSION),),
+            )
+
+    def update(self):
+        """Sync the index with the xcconfig files on disk.
+
+        Returns the number of files which were (re-)parsed.
+        """
+        indexed_files = {
+            file_path: (size, mtime_ns, digest)
+            for file_path, size, mtime_ns, digest in self.db.execute(
+                "SELECT path, size, mtime_ns, sha256 FROM files"
+            )
+        }
+
+        parsed_count = 0
+        with self.db:
+            for version, style, file_path in find_xcconfig_files(self.root_dir):
+                rel_path = path.relpath(file_path, self.root_dir)
+                stat = os.stat(file_path)
+                indexed = indexed_files.pop(rel_path, None)
+                if indexed and indexed[:2] == (stat.st_size, stat.st_mtime_ns):
+                    continue
+
+                # The file was touched, only its content can tell if it changed
+                digest = file_digest(file_path)
+                if indexed and indexed[2] == digest:
+                    self.db.execute(
+                        "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                        (stat.st_size, stat.st_mtime_ns, rel_path),
+                    )
+                    continue
+
+                self._index_file(version, style, file_path, stat, digest)
+                parsed_count += 1
+
+            for rel_path in indexed_files:
+                self._remove_file(rel_path)
+
+            self.db.execute(
+                "DELETE FROM versions WHERE id NOT IN (SELECT version_id FROM files)"
+            )
+
+        return parsed_count
+
+    def _index_file(self, version, style, file_path, stat, digest):
+        # pylint: disable=too-many-arguments
+        rel_path = path.relpath(file_path, self.root_dir)
+        with open(file_path, encoding="utf-8") as xcconfig_fp:
+            lines = xcconfig_fp.readlines()
+
+        build = None
+        if lines:
+            header_match = _HEADER_VERSION_RE.search(lines[0])
+            if header_match:
+                build = header_match.group("build")
+
+        self.db.execute(
+            "INSERT OR IGNORE INTO versions (name, sort_key) VALUES (?, ?)",
+            (version, version_sort_key(version)),
+        )
+        if build:
+            self.db.execute(
+                "UPDATE versions SET build = ? WHERE name = ?", (build, version)
+            )
+        (version_id,) = self.db.execute(
+            "SELECT id FROM versions WHERE name = ?", (version,)
+        ).fetchone()
+
+        self._remove_file(rel_path)
+        file_id = self.db.execute(
+            "INSERT INTO files (path, version_id, style, size, mtime_ns, sha256)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (rel_path, version_id, style, stat.st_size, stat.st_mtime_ns, digest),
+        ).lastrowid
+
+        settings = parse_xcconfig_settings(lines)
+        self.db.executemany(
+            "INSERT OR IGNORE INTO settings (name) VALUES (?)",
+            ((name,) for name in settings),
+        )
+        setting_ids = self._setting_ids(settings)
+        self.db.executemany(
+            "INSERT INTO entries (file_id, setting_id, value) VALUES (?, ?, ?)",
+            ((file_id, setting_ids[name], value) for name, value in settings.items()),
+        )
+
+    def _setting_ids(self, names):
+        # Every known setting name, the table is small (a few thousand rows)
+        all_ids = dict(self.db.execute("SELECT name, id FROM settings"))
+        return {name: all_ids[name] for name in names}
+
+    def _remove_file(self, rel_path):
+        self.db.execute(
+            "DELETE FROM entries WHERE file_id IN (SELECT id FROM files WHERE path = ?)",
+            (rel_path,),
+        )
+        self.db.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+
+    def versions(self):
+        return [
+            name
+            for (name,) in self.db.execute(
+                "SELECT name FROM versions ORDER BY sort_key"
+            )
+        ]
+
+    def styles(self):
+        return [
+            style
+            for (style,) in self.db.execute(
+                "SELECT DISTINCT style FROM files ORDER BY style"
+            )
+        ]
+
+    def previous_version(self, version):
+        row = self.db.execute(
+            "SELECT name FROM versions WHERE sort_key < ?"
+            " ORDER BY sort_key DESC LIMIT 1",
+            (version_sort_key(version),),
+        ).fetchone()
+        return row[0] if row else None
+
+    def history(self, setting, style):
+        """Return a list of (version, value) for every indexed version.
+
+        The value is None for versions in which the setting doesn't exist.
+        """
+        rows = self.db.execute(
+            """
+            SELECT versions.name, entries.value
+            FROM versions
+            LEFT JOIN files ON files.version_id = versions.id AND files.style = ?
+            LEFT JOIN entries ON entries.file_id = files.id AND entries.setting_id = (
+                SELECT id FROM settings WHERE name = ?
+            )
+            ORDER BY versions.sort_key
+            """,
+            (style, setting),
+        )
+        return rows.fetchall()
+
+    def values(self, version, style):
+        """Return a dict of all the settings of a version, in a style."""
+        rows = self.db.execute(
+            """
+            SELECT settings.name, entries.value
+            FROM entries
+            JOIN files ON files.id = entries.file_id
+            JOIN versions ON versions.id = files.version_id
+            JOIN settings ON settings.id = entries.setting_id
+            WHERE versions.name = ? AND files.style = ?
+            """,
+            (version, style),
+        )
+        return dict(rows)
+
+    def diff(self, old_version, new_version, style):
+        """Return the (added, removed, changed) settings between two versions.
+
+        added and removed are dicts of setting names to values, changed is a
+        dict of setting names to (old value, new value) tuples.
+        """
+        old_values = self.values(old_version, style)
+        new_values = self.values(new_version, style)
+
+        added = {
+            name: value for name, value in new_values.items() if name not in old_values
+        }
+        removed = {
+            name: value for name, value in old_values.items() if name not in new_values
+        }
+        changed = {
+            name: (old_values[name], value)
+            for name, value in new_values.items()
+            if name in old_values and old_values[name] != value
+        }
+        return added, removed, changed
+
+
+def _print_settings(title, settings):
+    if not settings:
+        return
+    print(f"{title}:")
+    for name in sorted(settings):
+        print(f"  {name} = {settings[name]}")
+
+
+def command_update(index, _args):
+    parsed_count = index.update()
+    print(f"Indexed {len(index.versions())} versions ({parsed_count} files parsed)")
+
+
+def command_history(index, args):
+    index.update()
+    previous_value = None
+    for version, value in index.history(args.setting, args.style):
+        if value is None and previous_value is None:
+            continue
+        if value != previous_value:
+            shown_value = "(removed)" if value is None else value
+            print(f"{version:<10} {shown_value}")
+        previous_value = value
+
+
+def command_diff(index, args):
+    index.update()
+    _check_version(index, args.old_version)
+    _check_version(index, args.new_version)
+    added, removed, changed = index.diff(args.old_version, args.new_version, args.style)
+
+    _print_settings("Added", added)
+    _print_settings("Removed", removed)
+    if changed:
+        print("Changed:")
+        for name in sorted(changed):
+            old_value, new_value = changed[name]
+            print(f"  {name} = {old_value} -> {new_value}")
+
+
+def diff_with_previous_command(added_or_removed):
+    def command(index, args):
+        index.update()
+        _check_version(index, args.version)
+        old_version = index.previous_version(args.version)
+        if old_version is None:
+            sys.exit(f"error: {args.version} is the oldest indexed version")
+
+        added, removed, _ = index.diff(old_version, args.version, args.style)
+        settings = added if added_or_removed == "added" else removed
+        for name in sorted(settings):
+            print(name)
+
+    return command
+
+
+def command_versions(index, _args):
+    index.update()
+    for version in index.versions():
+        print(version)
+
+
+def _check_version(index, version):
+    if version not in index.versions():
+        sys.exit(f"error: Xcode version {version} is not in the index")
+
+
+def default_root_dir():
+    """The repository when run from it, or the working directory when run
+    from the .pyz archive, which can't hold the index."""
+    module_dir = path.dirname(path.abspath(__file__))
+    return module_dir if path.isdir(module_dir) else os.getcwd()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="warnings2xcconfig.py index",
+        description="Query the settings of the committed Xcode-*/ xcconfig files.",
+    )
+    parser.add_argument(
+        "--root",
+        default=default_root_dir(),
+        help="directory containing the Xcode-*/ folders (default: the repository, "
+        "or the current directory when run from the .pyz archive)",
+    )
+    parser.add_argument(
+        "--index",
+        metavar="FILE",
+        help=f"index database (default: ROOT/{DEFAULT_INDEX_FILENAME})",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+
+    def add_command(name, func, help_text):
+        command_parser = subparsers.add_parser(name, help=help_text)
+        command_parser.set_defaults(func=func)
+        return command_parser
+
+    def add_style_argument(command_parser):
+        command_parser.add_argument(
+            "-s",
+            "--style",
+            default="strict",
+            help="defaults style to query (default: strict)",
+        )
+
+    add_command("update", command_update, "refresh the index")
+    add_command("versions", command_versions, "list the indexed Xcode versions")
+
+    history_parser = add_command(
+        "history", command_history, "show the values of a setting across versions"
+    )
+    history_parser.add_argument("setting")
+    add_style_argument(history_parser)
+
+    diff_parser = add_command(
+        "diff", command_diff, "show the settings changes between two versions"
+    )
+    diff_parser.add_argument("old_version")
+    diff_parser.add_argument("new_version")
+    add_style_argument(diff_parser)
+
+    for added_or_removed in ["added", "removed"]:
+        command_parser = add_command(
+            added_or_removed,
+            diff_with_previous_command(added_or_removed),
+            f"list the settings {added_or_removed} in a version",
+        )
+        command_parser.add_argument("version")
+        add_style_argument(command_parser)
+
+    args = parser.parse_args(argv)
+    if args.index is None:
+        args.index = path.join(args.root, DEFAULT_INDEX_FILENAME)
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    index = SettingsIndex(args.index, args.root)
+    try:
+        args.func(index, args)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
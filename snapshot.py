@@ -0,0 +1,224 @@
+"""Snapshots of the data read from an Xcode install, to generate xcconfig files
+without Xcode.
+
+`warnings2xcconfig.py export-snapshot -o FILE` captures everything the
+xcconfig files are generated from (the xcspec tools, Xcode's default values,
+clang's analyzer checkers and Xcode's version) into a single file. Any style
+can then be generated from it, on any OS, with `--from-snapshot FILE`.
+
+A snapshot starts with a magic string, then a JSON header, then one
+compressed JSON section per piece of data. The header lists the offset of
+each section, so the file is memory-mapped and only the sections a run needs
+are decompressed (e.g. the Swift xcspec isn't with --no-swift).
+"""
+
+import argparse
+import json
+import struct
+import sys
+import zlib
+
+from cache import default_cache_dir, open_file_cache, write_file_atomically
+from xcode import format_xcode_version, read_xcode_inputs, selected_xcode_path
+from xcspec import (
+    CLANG_XCSPEC_QUERIES,
+    SWIFT_XCSPEC_QUERIES,
+    XSpecParser,
+    queried_tools,
+)
+
+# mmap is imported when first needed: the main script imports this module for
+# SnapshotError, and should start as fast as possible
+
+SNAPSHOT_MAGIC = b"WAXSNAP\n"
+
+# Bump this whenever the layout of snapshots changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+_HEADER_LENGTH = struct.Struct(">I")
+
+_XCSPEC_QUERIES = {
+    "clang": CLANG_XCSPEC_QUERIES,
+    "swift": SWIFT_XCSPEC_QUERIES,
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _encode_section(value):
+    encoded = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(encoded, 9)
+
+
+def write_snapshot(file_path, xcode_inputs):
+    """Write a snapshot of xcode_inputs, as returned by read_xcode_inputs()."""
+    sections = {}
+    for name, xcspec_root in xcode_inputs["xcspecs"].items():
+        sections[f"xcspec:{name}"] = xcspec_root
+    sections["xcode_defaults"] = xcode_inputs["xcode_defaults"]
+    for help_flag, checkers in xcode_inputs["checkers"].items():
+        sections[f"checkers:{help_flag}"] = checkers
+
+    offsets = {}
+    blobs = []
+    offset = 0
+    for name, value in sections.items():
+        blob = _encode_section(value)
+        offsets[name] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "xcode_version": list(xcode_inputs["version"]),
+        "sections": offsets,
+    }
+    encoded_header = json.dumps(header, sort_keys=True).encode("utf-8")
+
+    chunks = [SNAPSHOT_MAGIC, _HEADER_LENGTH.pack(len(encoded_header)), encoded_header]
+    write_file_atomically(file_path, chunks + blobs, binary=True)
+
+
+def read_snapshot(file_path, xcspecs, help_flags):
+    """Read the parts of a snapshot needed to generate xcconfig files.
+
+    Returns the same dict as read_xcode_inputs(), with only the given xcspecs
+    and the checkers of the given help flags.
+    """
+    import mmap  # pylint: disable=import-outside-toplevel
+
+    with open(file_path, "rb") as snapshot_fp:
+        try:
+            data = mmap.mmap(snapshot_fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as error:
+            raise SnapshotError(f"{file_path} is empty") from error
+
+    with data:
+        if data[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{file_path} is not a snapshot")
+
+        damaged_error = SnapshotError(f"{file_path} is truncated or damaged")
+        header_start = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size
+        try:
+            (header_length,) = _HEADER_LENGTH.unpack_from(data, len(SNAPSHOT_MAGIC))
+            sections_start = header_start + header_length
+            header = json.loads(data[header_start:sections_start])
+        except (struct.error, ValueError) as error:
+            raise damaged_error from error
+
+        if header.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise SnapshotError(
+                f"{file_path} was written by an incompatible version of "
+                "warnings2xcconfig, export it again"
+            )
+
+        # Even the sections this run doesn't read must all be there
+        sections_length = max(map(sum, header["sections"].values()), default=0)
+        if len(data) != sections_start + sections_length:
+            raise damaged_error
+
+        def read_section(name):
+            if name not in header["sections"]:
+                raise SnapshotError(f"{file_path} has no {name} section")
+
+            offset, length = header["sections"][name]
+            start = sections_start + offset
+            end = start + length
+            try:
+                return json.loads(zlib.decompress(data[start:end]))
+            except (zlib.error, ValueError) as error:
+                raise damaged_error from error
+
+        return {
+            "version": tuple(header["xcode_version"]),
+            "xcspecs": {name: read_section(f"xcspec:{name}") for name in xcspecs},
+            "xcode_defaults": read_section("xcode_defaults"),
+            "checkers": {
+                help_flag: [tuple(c) for c in read_section(f"checkers:{help_flag}")]
+                for help_flag in help_flags
+            },
+        }
+
+
+def export_snapshot(xcode_path, file_path, cache_dir=None, max_subprocesses=4):
+    """Read everything any run may need from an Xcode install, and write it to
+    a snapshot. Returns the (version, build) of the install."""
+    # Everything is captured, whatever the options of the runs which will
+    # use the snapshot
+    args = argparse.Namespace(
+        xcode_path=xcode_path,
+        swift=True,
+        analyzer_flags=True,
+        analyzer_alpha_flags=True,
+        max_subprocesses=max_subprocesses,
+        cache=cache_dir is not None,
+        cache_dir=cache_dir,
+        refresh_cache=False,
+    )
+    xcode_inputs = read_xcode_inputs(
+        args,
+        xcspec_cache=open_file_cache(args, "xcspec"),
+        checkers_cache=open_file_cache(args, "clang-checkers"),
+    )
+
+    # Only keep the tools, and option keys, the pipeline reads
+    xcode_inputs["xcspecs"] = {
+        name: XSpecParser(xcspec_root=xcspec_root).export_tools(
+            queried_tools(_XCSPEC_QUERIES[name])
+        )
+        for name, xcspec_root in xcode_inputs["xcspecs"].items()
+    }
+
+    write_snapshot(file_path, xcode_inputs)
+    return xcode_inputs["version"]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="warnings2xcconfig.py export-snapshot",
+        description="Capture the data read from an Xcode install into a single "
+        "file, to generate xcconfig files from it with --from-snapshot FILE, "
+        "without Xcode.",
+    )
+    parser.add_argument(
+        "-x",
+        "--xcode-path",
+        metavar="PATH",
+        help="path to the Xcode install to capture. If not specified, "
+        "`xcode-select -p` is used",
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="FILE", required=True, help="snapshot to write"
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help="don't use the cache of parsed Xcode files",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="PATH",
+        default=default_cache_dir(),
+        help="where the cache of parsed Xcode files is stored",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    xcode_path = args.xcode_path or selected_xcode_path()
+
+    version_info = export_snapshot(
+        xcode_path, args.output, cache_dir=args.cache_dir if args.cache else None
+    )
+
+    xcode_version = format_xcode_version(*version_info)
+    print(f"Wrote {args.output} (Xcode {xcode_version})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
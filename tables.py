@@ -0,0 +1,66 @@
+"""Our own choices about the settings read from Xcode: the values of the
+'strict' and 'aggressive' defaults styles, and the settings and analyzer
+checkers left out of the xcconfig files."""
+
+# These settings are used for the 'strict' defaults style.
+# All other settings values not explicitly defined here are inherited from
+# the 'aggressive' style.
+# The goal is to get as strict as possible, without making day-to-day
+# development with these warnings a nightmare. This is intended to be
+# community driven, do not hesitate to submit a PR if you feel one setting
+# should have a stricter or looser default value.
+#
+# See https://pewpewthespells.com/blog/buildsettings.html for a description
+# of each setting effect.
+STRICT_DEFAULTS_EXCEPTIONS = {
+    # https://openradar.appspot.com/radar?id=5907704967069696
+    "CLANG_WARN_OBJC_REPEATED_USE_OF_WEAK": "NO",
+    # It's sometime useful to test a few things in debug build
+    # Maybe use `YES` for release builds
+    "GCC_TREAT_WARNINGS_AS_ERRORS": "NO",
+    "SWIFT_TREAT_WARNINGS_AS_ERRORS": "NO",
+    # Doesn't play nice with Apple Frameworks
+    "GCC_WARN_PEDANTIC": "NO",
+    # Don't need that with Objective-C 2.0
+    "CLANG_WARN_OBJC_MISSING_PROPERTY_SYNTHESIS": "NO",
+    # Probably a bit controversial, but not uncommon to ignore some parameters
+    # in Apple delegates methods
+    "GCC_WARN_UNUSED_PARAMETER": "NO",
+    # It's not unusual to have a @selector on its own, apart from a method
+    # definition
+    "GCC_WARN_MULTIPLE_DEFINITION_TYPES_FOR_SELECTOR": "NO",
+}
+
+###############################################################################
+
+# Those are settings where 'YES' is not the most aggressive value
+AGGRESSIVE_DEFAULTS_EXCEPTIONS = {
+    "GCC_WARN_INHIBIT_ALL_WARNINGS": "NO",
+    "SWIFT_SUPPRESS_WARNINGS": "NO",
+    "CLANG_ALLOW_NON_MODULAR_INCLUDES_IN_FRAMEWORK_MODULES": "NO",
+    "GCC_ENABLE_TRIGRAPHS": "NO",
+    # The default when Analyzing will stay "deep", but when Building we prefer
+    # to favor build speed over thoroughness
+    "CLANG_STATIC_ANALYZER_MODE": "shallow",
+}
+
+# Those are build settings we found in Xcode files but should stay untouched
+INGORED_BUILD_SETTINGS = {
+    "CLANG_INDEX_STORE_ENABLE",
+    # The sanitizers should be enabled on a per-build basis. It makes little
+    # sense to include these in a xcconfig file.
+    "CLANG_ADDRESS_SANITIZER",
+    "CLANG_THREAD_SANITIZER",
+    "CLANG_UNDEFINED_BEHAVIOR_SANITIZER",
+}
+
+# Clang Analyzer flags which are either too noisy, returns too much
+# false-positives, or are already included in Xcode build settings
+IGNORED_CLANG_ANALYZER_FLAGS = {
+    # Too much false positives
+    "alpha.clone.CloneChecker",
+    "alpha.deadcode.UnreachableCode",
+    # Crashes clang
+    # rdar://51330803 http://www.openradar.me/radar?id=5579839566249984
+    "alpha.cplusplus.EnumCastOutOfRange",
+}
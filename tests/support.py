@@ -0,0 +1,73 @@
+"""Helpers shared by the tests: small fake Xcode installs, whose `clang` and
+`xcodebuild` are stub shell scripts, so the tests run on any OS."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from os import path
+
+ROOT_DIR = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, path.join(ROOT_DIR, "benchmarks")]
+
+# pylint: disable=wrong-import-position
+import synthetic  # noqa: E402
+
+VERSION_PLIST_REL_PATH = synthetic.VERSION_PLIST_REL_PATH
+
+
+def make_fake_xcode(xcode_path, **kwargs):
+    """synthetic.make_fake_xcode(), with only a few options and checkers."""
+    small_install = {
+        "options_count": 40,
+        "based_on_depth": 3,
+        "analyzer_options": 10,
+        "swift_options": 10,
+        "checkers_count": 20,
+    }
+    small_install.update(kwargs)
+    return synthetic.make_fake_xcode(xcode_path, **small_install)
+
+
+def write_file(file_path, content, executable=False):
+    os.makedirs(path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb" if isinstance(content, bytes) else "w") as file_fp:
+        file_fp.write(content)
+    if executable:
+        os.chmod(file_path, 0o755)
+    return file_path
+
+
+def read_xcconfig_files(output_dir):
+    """Return the {filename: content} of the xcconfig files in output_dir."""
+    contents = {}
+    for filename in os.listdir(output_dir):
+        if filename.endswith(".xcconfig"):
+            with open(path.join(output_dir, filename), encoding="utf-8") as xcconfig_fp:
+                contents[filename] = xcconfig_fp.read()
+    return contents
+
+
+def barrier_stub(stub_path, barrier_dir, parties, timeout=10):
+    """Make a stub executable wait, before answering, until parties stubs
+    sharing barrier_dir are running (or timeout seconds passed)."""
+    with open(stub_path, encoding="utf-8") as stub_fp:
+        shebang, script = stub_fp.read().split("\n", 1)
+    barrier = (
+        f'mkdir -p "{barrier_dir}"; touch "{barrier_dir}/$$"; tries=0\n'
+        f'while [ "$(ls "{barrier_dir}" | wc -l)" -lt {parties} ]'
+        f" && [ $tries -lt {timeout * 20} ]; do\n"
+        "  sleep 0.05; tries=$((tries + 1))\n"
+        "done\n"
+    )
+    write_file(stub_path, f"{shebang}\n{barrier}{script}", executable=True)
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def tmp_path(self, *components):
+        return path.join(self.tmp_dir, *components)
@@ -0,0 +1,123 @@
+"""The on-disk cache of values derived from Xcode's files, only reused while
+the files are unchanged."""
+
+import os
+import unittest
+from os import path
+from unittest import mock
+
+from support import TempDirTestCase, write_file
+
+# pylint: disable=wrong-import-order
+import cache
+
+
+class FileCacheTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source_path = write_file(self.tmp_path("source.xcspec"), "content")
+        self.cache = cache.FileCache(self.tmp_path("cache"), "xcspec")
+        self.created = []
+
+    def get(self, value="value", key=()):
+        def create():
+            self.created.append(value)
+            return value
+
+        return self.cache.get_or_create(self.source_path, create, key)
+
+    def entry_paths(self):
+        return [
+            path.join(self.cache.cache_dir, entry_name)
+            for entry_name in os.listdir(self.cache.cache_dir)
+        ]
+
+    def test_reuses_entry(self):
+        self.assertEqual(self.get("first"), "first")
+
+        with mock.patch.object(cache, "file_digest") as file_digest:
+            self.assertEqual(self.get("second"), "first")
+        # The file's stat didn't change, its content wasn't hashed
+        file_digest.assert_not_called()
+        self.assertEqual(self.created, ["first"])
+
+    def test_keys(self):
+        self.get("a", key=("-a",))
+        self.get("b", key=("-b",))
+
+        self.assertEqual(self.get("other", key=("-a",)), "a")
+        self.assertEqual(self.get("other", key=("-b",)), "b")
+        self.assertEqual(self.created, ["a", "b"])
+
+    def test_replaced_file_is_hashed_once(self):
+        self.get("first")
+        stat = os.stat(self.source_path)
+        # A copy keeping the modification time, e.g. an install reinstalled
+        copy_path = write_file(self.tmp_path("copy.xcspec"), "content")
+        os.utime(copy_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(copy_path, self.source_path)
+
+        self.assertEqual(self.get("second"), "first")
+        # The new stat was recorded
+        with mock.patch.object(cache, "file_digest") as file_digest:
+            self.assertEqual(self.get("third"), "first")
+        file_digest.assert_not_called()
+        self.assertEqual(self.created, ["first"])
+
+    def test_touched_file(self):
+        self.get("first")
+        stat = os.stat(self.source_path)
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertEqual(self.get("second"), "second")
+
+    def test_changed_file(self):
+        self.get("first")
+        stat = os.stat(self.source_path)
+        # Same size and modification time, only the content tells
+        write_file(self.source_path, "CONTENT")
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.assertEqual(self.get("second"), "second")
+        self.assertEqual(self.get("third"), "second")
+        self.assertEqual(len(self.entry_paths()), 1)
+
+    def test_refresh(self):
+        self.get("first")
+        self.cache.refresh = True
+
+        self.assertEqual(self.get("second"), "second")
+
+    def test_recovers_from_damaged_entry(self):
+        damages = {
+            "truncated": lambda content: content[: len(content) // 2],
+            "empty": lambda content: b"",
+            "garbage": lambda content: b"\x00not a pickle" + content,
+        }
+        for name, damage in damages.items():
+            with self.subTest(name):
+                self.get("first")
+                (entry_path,) = self.entry_paths()
+                with open(entry_path, "rb") as entry_fp:
+                    content = entry_fp.read()
+                write_file(entry_path, damage(content))
+
+                self.assertEqual(self.get("second"), "second")
+                # A valid entry was written again
+                self.assertEqual(self.get("third"), "second")
+
+                os.remove(entry_path)
+
+    def test_evicts_expired_entries(self):
+        self.get("first", key=("old",))
+        (old_entry_path,) = self.entry_paths()
+        os.utime(old_entry_path, (0, 0))
+
+        self.get("second", key=("new",))
+
+        self.assertNotIn(old_entry_path, self.entry_paths())
+        self.assertEqual(len(self.entry_paths()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
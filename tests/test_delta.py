@@ -0,0 +1,136 @@
+"""`--delta-from`: only writing the settings of a style whose value differs
+from a baseline style."""
+
+import io
+import os
+import re
+import unittest
+from unittest import mock
+
+from support import TempDirTestCase, make_fake_xcode
+
+# pylint: disable=wrong-import-order
+import cli
+import generate
+import warnings2xcconfig
+
+# The settings of the analyzer flags, the same whatever the style
+ANALYZER_SETTINGS = ("WAX_ANALYZER_FLAGS", "WARNING_CFLAGS")
+
+_SETTING_RE = re.compile(r"^(?P<name>\w+) = (?P<value>.*)$")
+
+
+def read_xcconfig(xcconfig_path):
+    """Return the (group headers, {name: value} settings) of an xcconfig file,
+    without the analyzer flags."""
+    headers = []
+    settings = {}
+    with open(xcconfig_path, encoding="utf-8") as xcconfig_fp:
+        for line in xcconfig_fp:
+            if line.startswith("// ") and " - " in line:
+                headers.append(line[3:].strip())
+            match = _SETTING_RE.match(line)
+            if match and match.group("name") not in ANALYZER_SETTINGS:
+                settings[match.group("name")] = match.group("value")
+    return headers, settings
+
+
+def xcconfig_filenames(output_dir):
+    return sorted(name for name in os.listdir(output_dir) if name.endswith(".xcconfig"))
+
+
+class DeltaFromTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+
+    def generate(self, output_dir, *argv):
+        args = cli.parse_script_args(
+            ["-x", self.xcode_path, "--no-cache", "-o", output_dir, *argv]
+        )
+        with mock.patch("sys.stderr", new_callable=io.StringIO):
+            warnings2xcconfig.run(args)
+        return output_dir
+
+    def test_only_differing_settings(self):
+        full_dir = self.generate(self.tmp_path("full"), "--all-styles")
+        delta_dir = self.generate(
+            self.tmp_path("delta"), "--defaults", "strict", "--delta-from", "xcode"
+        )
+
+        _, strict_settings = read_xcconfig(
+            os.path.join(full_dir, generate.xcconfig_filename("strict"))
+        )
+        _, xcode_settings = read_xcconfig(
+            os.path.join(full_dir, generate.xcconfig_filename("xcode"))
+        )
+        delta_filename = generate.xcconfig_filename("strict", "xcode")
+        self.assertEqual(xcconfig_filenames(delta_dir), [delta_filename])
+        _, delta_settings = read_xcconfig(os.path.join(delta_dir, delta_filename))
+
+        self.assertEqual(
+            delta_settings,
+            {
+                name: value
+                for name, value in strict_settings.items()
+                if xcode_settings[name] != value
+            },
+        )
+        self.assertLess(len(delta_settings), len(strict_settings))
+        self.assertTrue(delta_settings)
+
+    def test_omits_empty_groups(self):
+        full_dir = self.generate(self.tmp_path("full"), "--defaults", "xcode")
+        delta_dir = self.generate(
+            self.tmp_path("delta"), "--defaults", "xcode", "--delta-from", "clang"
+        )
+
+        full_headers, _ = read_xcconfig(
+            os.path.join(full_dir, generate.xcconfig_filename("xcode"))
+        )
+        delta_path = os.path.join(
+            delta_dir, generate.xcconfig_filename("xcode", "clang")
+        )
+        delta_headers, _ = read_xcconfig(delta_path)
+
+        self.assertLess(len(delta_headers), len(full_headers))
+        # Every group written has a setting before the next group
+        with open(delta_path, encoding="utf-8") as delta_fp:
+            content = delta_fp.read()
+        for header in delta_headers:
+            group_content = content.split(f"// {header}\n", 1)[1].split("\n\n", 1)[0]
+            self.assertRegex(group_content, r"^\w+ = ")
+
+    def test_all_styles_skip_baseline(self):
+        delta_dir = self.generate(
+            self.tmp_path("delta"), "--all-styles", "--delta-from", "xcode"
+        )
+
+        self.assertEqual(
+            xcconfig_filenames(delta_dir),
+            sorted(
+                generate.xcconfig_filename(style, "xcode")
+                for style in generate.ALL_DEFAULTS_STYLES
+                if style != "xcode"
+            ),
+        )
+
+    def test_invalid_arguments(self):
+        invalid_argvs = {
+            "no style": (["--delta-from", "xcode"], "requires --defaults"),
+            "same style": (
+                ["--defaults", "xcode", "--delta-from", "xcode"],
+                "would write an empty file",
+            ),
+        }
+        for name, (argv, message) in invalid_argvs.items():
+            with self.subTest(name):
+                with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                    with self.assertRaises(SystemExit):
+                        cli.parse_script_args(["-x", self.xcode_path, *argv])
+
+                self.assertIn(message, stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""The manifest of an output directory, telling which work can be skipped when
+the script runs again."""
+
+import io
+import unittest
+from unittest import mock
+
+from support import TempDirTestCase, make_fake_xcode
+
+# pylint: disable=wrong-import-order
+import cli
+import generate
+import manifest
+import xcode
+
+
+def edited_modules_digest(edited_module):
+    """A modules_digest() seeing edited_module's source changed."""
+
+    def modules_digest(module_names):
+        digest = manifest.modules_digest(module_names)
+        return digest + "-edited" if edited_module in module_names else digest
+
+    return modules_digest
+
+
+class ManifestStatusTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        self.args = cli.parse_script_args(
+            ["-x", self.xcode_path, "-d", "strict", "--no-cache", "-o", self.tmp_dir]
+        )
+
+        with mock.patch("sys.stderr", new_callable=io.StringIO):
+            generate.update_output_dir(self.args)
+
+    def status(self):
+        output_manifest = manifest.Manifest(self.tmp_dir)
+        input_files = output_manifest.input_files(xcode.xcode_input_paths(self.args))
+        return output_manifest.status(input_files, *generate.manifest_keys(self.args))
+
+    def test_up_to_date(self):
+        self.assertEqual(self.status(), manifest.UP_TO_DATE)
+
+    def test_edited_table_only_renders(self):
+        edited_digest = edited_modules_digest("tables")
+        with mock.patch.object(generate, "modules_digest", edited_digest):
+            self.assertEqual(self.status(), manifest.RENDER)
+
+    def test_edited_plist_parser_reads_xcode(self):
+        edited_digest = edited_modules_digest("openstep_plist")
+        with mock.patch.object(generate, "modules_digest", edited_digest):
+            self.assertEqual(self.status(), manifest.REGENERATE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+"""The reader of old-style (OpenStep) property lists, in which Xcode ships its
+xcspecs."""
+
+import io
+import unittest
+
+# Puts the scripts on sys.path
+import support  # noqa: F401  pylint: disable=unused-import
+
+# pylint: disable=wrong-import-order
+import openstep_plist
+
+
+def load_items(text, summary_keys):
+    return openstep_plist.load_items(io.BytesIO(text.encode("utf-8")), summary_keys)
+
+
+class LoadsTest(unittest.TestCase):
+    def test_values(self):
+        self.assertEqual(
+            openstep_plist.loads(
+                "{ Name = Clang; Values = (YES, NO); Empty = {}; Path = a/b-c.1; }"
+            ),
+            {
+                "Name": "Clang",
+                "Values": ["YES", "NO"],
+                "Empty": {},
+                "Path": "a/b-c.1",
+            },
+        )
+
+    def test_quoted_string_escapes(self):
+        escapes = {
+            "newline and tab": (r'"a\nb\tc"', "a\nb\tc"),
+            "quotes and backslash": (r'"\"\\"', '"\\'),
+            "unicode": (r'"\U00e9\U2026"', "é…"),
+            "octal": (r'"\101\351"', "Aé"),
+            "unknown escape": (r'"\q"', "q"),
+            "single quotes": (r"'it\'s'", "it's"),
+        }
+        for name, (text, expected) in escapes.items():
+            with self.subTest(name):
+                self.assertEqual(openstep_plist.loads(text), expected)
+
+    def test_comments(self):
+        self.assertEqual(
+            openstep_plist.loads(
+                "// Header\n"
+                "( /* first */ A, // after A\n"
+                '  "/* not a comment */", /* multi\n line */ B )\n'
+                "// Footer"
+            ),
+            ["A", "/* not a comment */", "B"],
+        )
+
+    def test_data(self):
+        self.assertEqual(
+            openstep_plist.loads("{ Data = <0fA1 22\n 33>; Empty = <>; }"),
+            {"Data": b"\x0f\xa1\x22\x33", "Empty": b""},
+        )
+
+    def test_trailing_separators(self):
+        self.assertEqual(openstep_plist.loads("(A, B,)"), ["A", "B"])
+        self.assertEqual(openstep_plist.loads("{ A = 1; }"), {"A": "1"})
+
+    def test_bytes(self):
+        self.assertEqual(openstep_plist.loads(b'\xef\xbb\xbf("\xc3\xa9")'), ["\xe9"])
+        self.assertEqual(openstep_plist.loads('("\xe9")'.encode("utf-16")), ["\xe9"])
+
+    def test_errors(self):
+        errors = {
+            "empty": ("// nothing\n", "Empty property list", 2),
+            "missing semicolon": ("{\n A = 1\n B = 2; }", "Expected ';'", 3),
+            "missing equal": ("{\n A 1; }", "Expected '='", 2),
+            "missing comma": ("(\nA\nB)", "Expected ',' or '\\)'", 3),
+            "unexpected character": ("(\n\n A, # )", "Unexpected character '#'", 3),
+            "odd data": ("<abc>", "Odd number of digits", 1),
+            "after root": ("(A)\n(B)", "Unexpected '\\(' after root", 2),
+            "unclosed": ("(A,\n", "Expected a value", 2),
+        }
+        for name, (text, message, line) in errors.items():
+            with self.subTest(name):
+                with self.assertRaisesRegex(
+                    openstep_plist.PlistParseError, f"{message}.*\\(line {line}\\)"
+                ) as context:
+                    openstep_plist.loads(text)
+
+                self.assertEqual(context.exception.line, line)
+                self.assertEqual(text.count("\n", 0, context.exception.pos) + 1, line)
+
+
+class LoadItemsTest(unittest.TestCase):
+    def test_summary_and_load(self):
+        items = load_items(
+            "(\n"
+            '  { Identifier = a; Name = "Tool A"; Options = ({ Name = X; }); },\n'
+            "  { Identifier = b; BasedOn = a; Values = (1, 2); },\n"
+            ")\n",
+            ["Identifier", "BasedOn", "Options"],
+        )
+
+        self.assertEqual(
+            [item.summary for item in items],
+            # Options isn't a string
+            [{"Identifier": "a"}, {"Identifier": "b", "BasedOn": "a"}],
+        )
+        self.assertEqual(
+            items[0].load(),
+            {"Identifier": "a", "Name": "Tool A", "Options": [{"Name": "X"}]},
+        )
+        self.assertEqual(
+            items[1].load(),
+            {"Identifier": "b", "BasedOn": "a", "Values": ["1", "2"]},
+        )
+
+    def test_skips_brackets_in_strings_and_comments(self):
+        text = (
+            "( {\n"
+            '  Skipped = ( "(", \'}\', "\\")", /* ) } */ { Nested = ")"; } );\n'
+            "  // ) }\n"
+            "  Path = a/b;\n"
+            "  Identifier = a;\n"
+            "}, { Identifier = b; } )"
+        )
+
+        items = load_items(text, ["Identifier"])
+
+        self.assertEqual(
+            [item.summary for item in items], [{"Identifier": "a"}, {"Identifier": "b"}]
+        )
+        self.assertEqual(items[0].load(), openstep_plist.loads(text)[0])
+
+    def test_xml_plist(self):
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<plist version="1.0"><array>'
+            "<dict><key>Identifier</key><string>a</string>"
+            "<key>Options</key><array/></dict>"
+            "</array></plist>"
+        )
+
+        items = load_items(xml, ["Identifier", "Options"])
+
+        self.assertEqual([item.summary for item in items], [{"Identifier": "a"}])
+        self.assertEqual(items[0].load(), {"Identifier": "a", "Options": []})
+
+    def test_errors(self):
+        errors = {
+            "not an array": ("{ A = 1; }", "Expected an array of dictionaries", 1),
+            "not a dictionary": ("(\n A )", "Expected a dictionary in array", 2),
+            "unclosed": ("( { A = (1, 2; }\n", "Unexpected end", 2),
+            "after root": ("( { A = 1; } )\n X", "Unexpected data after root", 2),
+        }
+        for name, (text, message, line) in errors.items():
+            with self.subTest(name):
+                with self.assertRaisesRegex(
+                    openstep_plist.PlistParseError, f"{message}.*\\(line {line}\\)"
+                ):
+                    load_items(text, ["A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""The whole pipeline, with stub `xcode-select`, `xcodebuild` and `clang`."""
+
+import os
+import subprocess
+import sys
+import unittest
+from os import path
+
+from support import (
+    ROOT_DIR,
+    VERSION_PLIST_REL_PATH,
+    TempDirTestCase,
+    barrier_stub,
+    make_fake_xcode,
+    write_file,
+)
+
+# pylint: disable=wrong-import-order
+import cli
+import timings
+import xcconfig
+import xcode
+
+
+class PipelineTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        # Only xcodebuild can tell the version
+        os.remove(path.join(self.xcode_path, VERSION_PLIST_REL_PATH))
+
+    def read_inputs(self, *argv):
+        args = cli.parse_script_args(["-x", self.xcode_path, "--no-cache", *argv])
+        return xcode.read_xcode_inputs(args)
+
+    def test_reads_stub_executables(self):
+        xcode_inputs = self.read_inputs("--analyzer-alpha")
+
+        self.assertEqual(xcode_inputs["version"], ("99.0", "99A999"))
+        self.assertEqual(
+            sorted(xcode_inputs["checkers"]),
+            ["-analyzer-checker-help", "-analyzer-checker-help-alpha"],
+        )
+        self.assertTrue(all(xcode_inputs["checkers"].values()))
+
+    def subprocess_times(self, *argv):
+        """Read the inputs, and return the (start, end) times of the commands
+        run."""
+        times = []
+
+        def record_subprocess(stage):
+            if stage.finished and stage.kind == timings.SUBPROCESS:
+                times.append((stage.start_time, stage.start_time + stage.wall_time))
+
+        timings.add_stage_hook(record_subprocess)
+        try:
+            self.read_inputs(*argv)
+        finally:
+            timings.remove_stage_hook(record_subprocess)
+        return times
+
+    def test_commands_run_concurrently(self):
+        # xcodebuild, and clang for each of the two checkers lists
+        for stub_path in (
+            xcode.xcodebuild_path(self.xcode_path),
+            xcode.default_toolchain_bin_path(self.xcode_path, "clang"),
+        ):
+            barrier_stub(stub_path, self.tmp_path("barrier"), 3)
+
+        times = self.subprocess_times("--analyzer-alpha", "--max-subprocesses", "3")
+
+        self.assertEqual(len(times), 3)
+        # Each one started before any finished
+        self.assertLess(max(start for start, _ in times), min(end for _, end in times))
+
+    def test_commands_run_one_at_a_time(self):
+        times = self.subprocess_times("--analyzer-alpha", "--max-subprocesses", "1")
+
+        self.assertEqual(len(times), 3)
+        times.sort()
+        for (_, end), (next_start, _) in zip(times, times[1:]):
+            self.assertLessEqual(end, next_start)
+
+    def test_evaluate_doesnt_run_clang(self):
+        os.remove(xcode.default_toolchain_bin_path(self.xcode_path, "clang"))
+        xcconfig_path = write_file(
+            self.tmp_path("App.xcconfig"), "CLANG_WARN_SYNTHETIC_000000 = YES\n"
+        )
+        args = xcconfig.parse_args(["-x", self.xcode_path, xcconfig_path])
+
+        options = xcconfig.load_options(args)
+        settings = xcconfig.evaluate_targets(options, [xcconfig_path])[xcconfig_path][
+            "settings"
+        ]
+
+        self.assertEqual(settings["CLANG_WARN_SYNTHETIC_000000"], "YES")
+
+    @unittest.skipIf(
+        any(path.lexists(link) for link in xcode.XCODE_SELECT_LINKS),
+        "xcode-select's symlink would be read instead of running it",
+    )
+    def test_runs_xcode_select_from_path(self):
+        bin_dir = self.tmp_path("bin")
+        developer_dir = path.join(self.xcode_path, "Contents", "Developer")
+        write_file(
+            path.join(bin_dir, "xcode-select"),
+            f"#!/bin/sh\necho '{developer_dir}'\n",
+            executable=True,
+        )
+        env = dict(os.environ, PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        env.pop("DEVELOPER_DIR", None)
+
+        output = subprocess.run(
+            [sys.executable, path.join(ROOT_DIR, "warnings2xcconfig.py"), "--no-cache"],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+        self.assertTrue(
+            output.startswith("// Generated using XcodeWarningsAsXcconfig ")
+        )
+        self.assertIn("for Xcode 99.0 (99A999)", output.splitlines()[0])
+        self.assertIn("CLANG_ANALYZER_", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
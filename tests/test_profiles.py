@@ -0,0 +1,200 @@
+"""`--profiles`: named variants of the defaults styles, declared in a
+manifest."""
+
+import io
+import json
+import unittest
+from unittest import mock
+
+from support import (
+    TempDirTestCase,
+    make_fake_xcode,
+    read_xcconfig_files,
+    write_file,
+)
+
+# pylint: disable=wrong-import-order
+import cli
+import profiles
+import warnings2xcconfig
+
+
+class ReadProfilesTest(TempDirTestCase):
+    def read_profiles(self, manifest):
+        manifest_path = write_file(self.tmp_path("profiles.json"), json.dumps(manifest))
+        return profiles.read_profiles(manifest_path)
+
+    def test_profiles(self):
+        app, legacy = self.read_profiles(
+            {
+                "profiles": {
+                    "App": {
+                        "base": "strict",
+                        "overrides": {"GCC_TREAT_WARNINGS_AS_ERRORS": "YES"},
+                        "prefix": "APP",
+                    },
+                    "Legacy": {
+                        "base": "xcode",
+                        "swift": False,
+                        "include": ["^CLANG_"],
+                        "exclude": ["^CLANG_ANALYZER_"],
+                    },
+                }
+            }
+        )
+
+        self.assertEqual(app.filename, "App.xcconfig")
+        self.assertEqual(app.overrides, {"GCC_TREAT_WARNINGS_AS_ERRORS": "YES"})
+        self.assertEqual(app.prefix, "APP")
+        self.assertTrue(app.swift)
+        self.assertFalse(legacy.swift)
+        self.assertIsNone(legacy.prefix)
+        self.assertTrue(legacy.selects("CLANG_WARN_EMPTY_BODY"))
+        self.assertFalse(legacy.selects("CLANG_ANALYZER_NONNULL"))
+        self.assertFalse(legacy.selects("GCC_WARN_UNUSED_VARIABLE"))
+
+    def test_invalid_profiles(self):
+        invalid_profiles = {
+            "bad base": ({"base": "pedantic"}, "App: base must be one of none, "),
+            "no base": ({}, "App: base must be one of"),
+            "bad regex": (
+                {"base": "strict", "exclude": ["^CLANG_(ANALYZER"]},
+                "App: invalid exclude pattern '\\^CLANG_\\(ANALYZER'",
+            ),
+            "regex not in list": (
+                {"base": "strict", "include": "^CLANG_"},
+                "App: include must be a list of regular expressions",
+            ),
+            "unknown keys": (
+                {"base": "strict", "exlude": [], "sufix": "X"},
+                "App: unknown keys \\['exlude', 'sufix'\\]",
+            ),
+            "not a table": (["strict"], "App: the profile must be a table"),
+            "bad override": (
+                {"base": "strict", "overrides": {"A": True}},
+                "App: overrides must be a table of strings",
+            ),
+            "bad prefix": ({"base": "strict", "prefix": 1}, "App: prefix must be"),
+            "bad swift": ({"base": "strict", "swift": "no"}, "App: swift must be"),
+        }
+        for name, (profile, message) in invalid_profiles.items():
+            with self.subTest(name):
+                with self.assertRaisesRegex(profiles.ProfileError, message):
+                    self.read_profiles({"profiles": {"App": profile}})
+
+    def test_invalid_manifests(self):
+        invalid_manifests = {
+            "no profiles": ({"profiles": {}}, "declares no profiles"),
+            "not a table": ([], "declares no profiles"),
+            "bad name": (
+                {"profiles": {"../App": {"base": "strict"}}},
+                "Invalid profile name '../App'",
+            ),
+        }
+        for name, (manifest, message) in invalid_manifests.items():
+            with self.subTest(name):
+                with self.assertRaisesRegex(profiles.ProfileError, message):
+                    self.read_profiles(manifest)
+
+        with self.assertRaisesRegex(profiles.ProfileError, "Can't parse"):
+            profiles.read_profiles(write_file(self.tmp_path("bad.json"), "{"))
+        with self.assertRaisesRegex(profiles.ProfileError, "Can't read"):
+            profiles.read_profiles(self.tmp_path("missing.json"))
+
+    def test_errors_are_argument_errors(self):
+        manifest_path = write_file(
+            self.tmp_path("profiles.json"),
+            json.dumps({"profiles": {"App": {"base": "pedantic"}}}),
+        )
+
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit):
+                cli.parse_script_args(
+                    ["--profiles", manifest_path, "-o", self.tmp_path("out")]
+                )
+
+        self.assertIn("error: Profile App: base must be one of", stderr.getvalue())
+
+
+class RenderProfilesTest(TempDirTestCase):
+    def render(self, manifest):
+        """Render the profiles of manifest, and return the {filename: content}
+        of the files."""
+        xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        manifest_path = write_file(self.tmp_path("profiles.json"), json.dumps(manifest))
+        output_dir = self.tmp_path("out")
+        args = cli.parse_script_args(
+            [
+                "-x",
+                xcode_path,
+                "--no-cache",
+                "--profiles",
+                manifest_path,
+                "-o",
+                output_dir,
+            ]
+        )
+        with mock.patch("sys.stderr", new_callable=io.StringIO):
+            warnings2xcconfig.run(args)
+
+        return read_xcconfig_files(output_dir)
+
+    def test_filters_analyzer_flags(self):
+        contents = self.render(
+            {
+                "profiles": {
+                    "All": {"base": "strict"},
+                    "NoSettings": {"base": "strict", "exclude": ["^CLANG_ANALYZER_"]},
+                    "NoAnalyzer": {
+                        "base": "strict",
+                        "exclude": ["^CLANG_ANALYZER_", "_ANALYZER_FLAGS$"],
+                    },
+                    "OnlyFlags": {
+                        "base": "strict",
+                        "prefix": "APP",
+                        "include": ["^APP_ANALYZER_FLAGS$"],
+                    },
+                }
+            }
+        )
+
+        self.assertIn("\nCLANG_ANALYZER_", contents["All.xcconfig"])
+        self.assertIn("\nWAX_ANALYZER_FLAGS = ", contents["All.xcconfig"])
+
+        # The checkers without a setting are selected by their variable
+        self.assertNotIn("\nCLANG_ANALYZER_", contents["NoSettings.xcconfig"])
+        self.assertIn("\nWAX_ANALYZER_FLAGS = ", contents["NoSettings.xcconfig"])
+
+        self.assertNotIn("ANALYZER", contents["NoAnalyzer.xcconfig"])
+        self.assertNotIn("WARNING_CFLAGS", contents["NoAnalyzer.xcconfig"])
+
+        self.assertNotIn("\nCLANG_", contents["OnlyFlags.xcconfig"])
+        self.assertIn("\nAPP_ANALYZER_FLAGS = ", contents["OnlyFlags.xcconfig"])
+        self.assertIn(
+            "\nWARNING_CFLAGS = $(inherited) $(APP_ANALYZER_FLAGS)",
+            contents["OnlyFlags.xcconfig"],
+        )
+
+    def test_overrides(self):
+        contents = self.render(
+            {
+                "profiles": {
+                    "App": {
+                        "base": "xcode",
+                        "overrides": {
+                            "CLANG_WARN_SYNTHETIC_000001": "YES_ERROR",
+                            "MISSING_SETTING": "YES",
+                        },
+                    }
+                }
+            }
+        )
+
+        self.assertIn(
+            "\nCLANG_WARN_SYNTHETIC_000001 = YES_ERROR\n", contents["App.xcconfig"]
+        )
+        self.assertNotIn("MISSING_SETTING", contents["App.xcconfig"])
+
+
+if __name__ == "__main__":
+    unittest.main()
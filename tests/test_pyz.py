@@ -0,0 +1,77 @@
+"""warnings2xcconfig.pyz, the single-file archive built by build_pyz.py."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from support import ROOT_DIR, TempDirTestCase, write_file
+
+# pylint: disable=wrong-import-order
+import settings_index
+
+XCCONFIG_TEXT = """\
+// Generated using XcodeWarningsAsXcconfig for Xcode {version} ({build})
+
+// Clang LLVM 1.0 - Warnings - All languages
+CLANG_WARN_EMPTY_BODY = YES
+"""
+
+
+class PyzTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pyz_path = self.tmp_path("warnings2xcconfig.pyz")
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join(ROOT_DIR, "build_pyz.py"),
+                "-o",
+                self.pyz_path,
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+        self.index_root = self.tmp_path("Warnings")
+        for version, build in [("10.0", "10A255"), ("9.3", "9E145")]:
+            write_file(
+                os.path.join(
+                    self.index_root,
+                    f"Xcode-{version}",
+                    "Warnings-StrictDefaults.xcconfig",
+                ),
+                XCCONFIG_TEXT.format(version=version, build=build),
+            )
+
+    def run_pyz(self, *argv, cwd=None):
+        return subprocess.run(
+            [sys.executable, self.pyz_path, *argv],
+            check=True,
+            capture_output=True,
+            cwd=cwd,
+            text=True,
+        ).stdout
+
+    def test_index_working_directory(self):
+        # Not the directory of settings_index.py, which is within the archive
+        self.assertEqual(
+            self.run_pyz("index", "versions", cwd=self.index_root), "9.3\n10.0\n"
+        )
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(self.index_root, settings_index.DEFAULT_INDEX_FILENAME)
+            )
+        )
+
+    def test_index_root(self):
+        self.assertEqual(
+            self.run_pyz(
+                "index", "--root", self.index_root, "history", "CLANG_WARN_EMPTY_BODY"
+            ),
+            "9.3        YES\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
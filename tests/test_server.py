@@ -0,0 +1,202 @@
+"""`serve` and `--server` requests, over a Unix socket or a TCP port."""
+
+import io
+import os
+import socket
+import stat
+import threading
+import unittest
+from os import path
+from unittest import mock
+
+from support import TempDirTestCase, make_fake_xcode
+
+# pylint: disable=wrong-import-order
+import cli
+import generate
+import server
+import xcode
+
+TOKEN = "secret"
+
+
+class ServerTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        self.store = server.ModelStore(allowed_paths=[self.xcode_path])
+        # The server logs each request
+        stderr_patcher = mock.patch("sys.stderr", new_callable=io.StringIO)
+        self.stderr = stderr_patcher.start()
+        self.addCleanup(stderr_patcher.stop)
+
+    def serve(self, **kwargs):
+        http_server = server.make_server(self.store, **kwargs)
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(http_server.server_close)
+        self.addCleanup(http_server.shutdown)
+        return http_server
+
+    def request(self, address, *argv):
+        argv = ["--server", address, "--no-analyzer", *argv]
+        return server.generate_remotely(cli.parse_script_args(argv), argv)
+
+
+class ServerTest(ServerTestCase):
+    def test_paths_are_relative_to_the_client(self):
+        # The server's directory differs from the client's
+        self.assertNotEqual(os.getcwd(), self.tmp_dir)
+
+        response = server.generate(
+            self.store, ["-x", "Xcode.app", "--no-analyzer"], self.tmp_dir
+        )
+
+        self.assertEqual(response["xcode_version"], "99.0 (99A999)")
+        self.assertIn("CLANG_WARN_SYNTHETIC_", response["files"][0]["content"])
+
+    def test_refuses_installs_not_allowed(self):
+        other_xcode_path = make_fake_xcode(self.tmp_path("Other.app"))
+
+        with mock.patch.dict(os.environ, DEVELOPER_DIR=developer_dir(self.xcode_path)):
+            with self.assertRaisesRegex(server.RequestError, "isn't allowed"):
+                server.generate(self.store, ["-x", other_xcode_path], self.tmp_dir)
+
+    def test_unix_socket(self):
+        socket_path = self.tmp_path("cache", "server.sock")
+        self.serve(socket_path=socket_path)
+        self.assertEqual(stat.S_IMODE(os.stat(socket_path).st_mode), 0o600)
+
+        output_dir = self.tmp_path("new", "dir")
+        status = self.request(
+            f"unix:{socket_path}",
+            "-x",
+            self.xcode_path,
+            "--all-styles",
+            "-o",
+            output_dir,
+        )
+
+        self.assertEqual(status, 0)
+        self.assertEqual(len(os.listdir(output_dir)), len(generate.ALL_DEFAULTS_STYLES))
+
+    def test_tcp_port_requires_the_token(self):
+        with self.assertRaises(ValueError):
+            server.make_server(self.store, port=0)
+
+        http_server = self.serve(port=0, token=TOKEN)
+        address = f"127.0.0.1:{http_server.server_address[1]}"
+        argv = ["-x", self.xcode_path, "-d", "strict", "-o", self.tmp_path("out")]
+
+        with mock.patch.dict(os.environ, {server.TOKEN_ENV_VAR: "wrong"}):
+            self.assertEqual(self.request(address, *argv), 1)
+        with mock.patch.dict(os.environ, {server.TOKEN_ENV_VAR: TOKEN}):
+            self.assertEqual(self.request(address, *argv), 0)
+
+
+class SelectedXcodeTest(ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_xcode_path = make_fake_xcode(
+            self.tmp_path("Other.app"), version=("98.0", "98A1")
+        )
+        self.store.allowed_paths.add(path.realpath(self.other_xcode_path))
+
+        # xcode-select --switch selected Xcode.app, the server runs with
+        # Other.app as its DEVELOPER_DIR
+        link_path = self.tmp_path("xcode_select_link")
+        os.symlink(developer_dir(self.xcode_path), link_path)
+        patchers = [
+            mock.patch.object(xcode, "XCODE_SELECT_LINKS", [link_path]),
+            mock.patch.dict(
+                os.environ, DEVELOPER_DIR=developer_dir(self.other_xcode_path)
+            ),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def generated_version(self, client_developer_dir):
+        response = server.generate(
+            self.store, ["--no-analyzer"], self.tmp_dir, client_developer_dir
+        )
+        return response["xcode_version"]
+
+    def test_uses_client_developer_dir(self):
+        self.assertEqual(
+            self.generated_version(developer_dir(self.other_xcode_path)),
+            "98.0 (98A1)",
+        )
+        # Relative to the client's directory
+        self.assertEqual(
+            self.generated_version(developer_dir("Xcode.app")), "99.0 (99A999)"
+        )
+
+    def test_client_without_developer_dir(self):
+        # Not the server's DEVELOPER_DIR
+        self.assertEqual(self.generated_version(None), "99.0 (99A999)")
+
+    def test_refuses_client_developer_dir_not_allowed(self):
+        not_allowed_path = make_fake_xcode(self.tmp_path("NotAllowed.app"))
+
+        with self.assertRaisesRegex(server.RequestError, "isn't allowed"):
+            self.generated_version(developer_dir(not_allowed_path))
+
+    def test_sends_client_developer_dir(self):
+        socket_path = self.tmp_path("server.sock")
+        self.serve(socket_path=socket_path)
+        output_dir = self.tmp_path("out")
+
+        status = self.request(f"unix:{socket_path}", "-d", "strict", "-o", output_dir)
+
+        self.assertEqual(status, 0)
+        xcconfig_path = path.join(output_dir, generate.xcconfig_filename("strict"))
+        with open(xcconfig_path, encoding="utf-8") as xcconfig_fp:
+            self.assertIn("for Xcode 98.0 (98A1)", xcconfig_fp.readline())
+
+
+class BadResponseTest(ServerTestCase):
+    def answer_once(self, response):
+        """Listen on a Unix socket, answer the first request with the response
+        bytes, and return the socket's address."""
+        socket_path = self.tmp_path("bad.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(socket_path)
+        listener.listen(1)
+        self.addCleanup(listener.close)
+
+        def answer():
+            connection, _ = listener.accept()
+            with connection:
+                connection.recv(65536)
+                connection.sendall(response)
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        return f"unix:{socket_path}"
+
+    def test_reports_bad_responses(self):
+        bad_responses = {
+            "not json": b"HTTP/1.0 200 OK\r\nContent-Length: 3\r\n\r\n{{{",
+            "not http": b"garbage\r\n\r\n",
+            "closed": b"",
+        }
+        for name, response in bad_responses.items():
+            with self.subTest(name):
+                address = self.answer_once(response)
+
+                self.assertEqual(self.request(address, "-x", self.xcode_path), 1)
+                self.assertIn(
+                    f"error: can't reach server at {address}", self.stderr.getvalue()
+                )
+
+                os.remove(address.partition(":")[2])
+
+
+def developer_dir(xcode_path):
+    return path.join(xcode_path, "Contents", "Developer")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""`index`: queries on the settings of the committed `Xcode-*/` xcconfig
+files, from a SQLite index refreshed before each query."""
+
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+from support import TempDirTestCase, write_file
+
+# pylint: disable=wrong-import-order
+import settings_index
+
+# The strict defaults of each version: the settings, and analyzer checkers
+XCODE_VERSIONS = {
+    "9.3": ("9E145", {"CLANG_WARN_OLD": "YES", "CLANG_WARN_CHANGED": "NO"}, []),
+    "10.0": (
+        "10A255",
+        {"CLANG_WARN_CHANGED": "YES", "CLANG_WARN_NEW": "YES_ERROR"},
+        ["core.DivideZero"],
+    ),
+    "10.2": (
+        "10E125",
+        {"CLANG_WARN_CHANGED": "YES", "CLANG_WARN_NEW": "YES_ERROR"},
+        ["core.DivideZero", "core.NullDereference"],
+    ),
+}
+
+
+def xcconfig_text(version, build, settings, checkers):
+    lines = [
+        f"// Generated using XcodeWarningsAsXcconfig for Xcode {version} ({build})\n",
+        "\n",
+        "// Clang LLVM 1.0 - Warnings - All languages\n",
+    ]
+    lines += [f"{name} = {value}\n" for name, value in settings.items()]
+    lines += [
+        "WAX_ANALYZER_FLAGS = $(inherited) -Xclang -analyzer-checker"
+        f" -Xclang {checker}\n"
+        for checker in checkers
+    ]
+    return "".join(lines)
+
+
+class SettingsIndexTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        for version, (build, settings, checkers) in XCODE_VERSIONS.items():
+            self.write_xcconfig(
+                version, xcconfig_text(version, build, settings, checkers)
+            )
+        # Not an xcconfig file of a version folder
+        write_file(
+            self.tmp_path("Other", "Warnings-StrictDefaults.xcconfig"), "A = B\n"
+        )
+
+    def write_xcconfig(self, version, content):
+        return write_file(
+            self.tmp_path(f"Xcode-{version}", "Warnings-StrictDefaults.xcconfig"),
+            content,
+        )
+
+    def run_index(self, *argv):
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            settings_index.main(["--root", self.tmp_dir, *argv])
+        return stdout.getvalue()
+
+    @contextlib.contextmanager
+    def open_index(self):
+        index = settings_index.SettingsIndex(
+            self.tmp_path(settings_index.DEFAULT_INDEX_FILENAME), self.tmp_dir
+        )
+        try:
+            yield index
+        finally:
+            index.close()
+
+    def test_versions(self):
+        # In version order, not in file name order
+        self.assertEqual(self.run_index("versions"), "9.3\n10.0\n10.2\n")
+
+    def test_history(self):
+        self.assertEqual(
+            self.run_index("history", "CLANG_WARN_NEW"), "10.0       YES_ERROR\n"
+        )
+        self.assertEqual(
+            self.run_index("history", "CLANG_WARN_OLD"),
+            "9.3        YES\n10.0       (removed)\n",
+        )
+        self.assertEqual(
+            self.run_index("history", "CLANG_WARN_CHANGED"),
+            "9.3        NO\n10.0       YES\n",
+        )
+        self.assertEqual(self.run_index("history", "CLANG_WARN_OLD", "-s", "xcode"), "")
+
+    def test_added_and_removed(self):
+        self.assertEqual(
+            self.run_index("added", "10.0"),
+            "CLANG_WARN_NEW\nWAX_ANALYZER_FLAGS:core.DivideZero\n",
+        )
+        self.assertEqual(self.run_index("removed", "10.0"), "CLANG_WARN_OLD\n")
+        self.assertEqual(
+            self.run_index("added", "10.2"), "WAX_ANALYZER_FLAGS:core.NullDereference\n"
+        )
+
+    def test_added_in_oldest_version(self):
+        with self.assertRaisesRegex(SystemExit, "9.3 is the oldest indexed version"):
+            self.run_index("added", "9.3")
+
+    def test_diff(self):
+        self.assertEqual(
+            self.run_index("diff", "9.3", "10.2"),
+            "Added:\n"
+            "  CLANG_WARN_NEW = YES_ERROR\n"
+            "  WAX_ANALYZER_FLAGS:core.DivideZero = YES\n"
+            "  WAX_ANALYZER_FLAGS:core.NullDereference = YES\n"
+            "Removed:\n"
+            "  CLANG_WARN_OLD = YES\n"
+            "Changed:\n"
+            "  CLANG_WARN_CHANGED = NO -> YES\n",
+        )
+        self.assertEqual(self.run_index("diff", "10.0", "10.0"), "")
+
+    def test_diff_unknown_version(self):
+        with self.assertRaisesRegex(SystemExit, "11.0 is not in the index"):
+            self.run_index("diff", "10.0", "11.0")
+
+    def test_update_only_parses_changed_files(self):
+        with self.open_index() as index:
+            self.assertEqual(index.update(), 3)
+            self.assertEqual(index.update(), 0)
+
+            # Touched, with the same content
+            touched_path = self.tmp_path(
+                "Xcode-9.3", "Warnings-StrictDefaults.xcconfig"
+            )
+            stat = os.stat(touched_path)
+            os.utime(touched_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertEqual(index.update(), 0)
+
+            self.write_xcconfig(
+                "10.2", xcconfig_text("10.2", "10E125", {"CLANG_WARN_NEW": "NO"}, [])
+            )
+            os.remove(self.tmp_path("Xcode-10.0", "Warnings-StrictDefaults.xcconfig"))
+            self.assertEqual(index.update(), 1)
+
+            self.assertEqual(index.versions(), ["9.3", "10.2"])
+            self.assertEqual(index.values("10.2", "strict"), {"CLANG_WARN_NEW": "NO"})
+
+    def test_rebuilds_outdated_index(self):
+        with self.open_index() as index:
+            index.update()
+            index.db.execute(
+                "UPDATE meta SET value = 'outdated' WHERE key = 'format_version'"
+            )
+            index.db.commit()
+
+        with self.open_index() as index:
+            self.assertEqual(index.versions(), [])
+            self.assertEqual(index.update(), 3)
+
+    def test_parse_inherited_settings(self):
+        self.assertEqual(
+            settings_index.parse_xcconfig_settings(
+                [
+                    "// Comment\n",
+                    "FLAGS = -Wa\n",
+                    "FLAGS = $(inherited) -Wb\n",
+                    '#include "Other.xcconfig"\n',
+                ]
+            ),
+            {"FLAGS": "-Wa -Wb"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""`export-snapshot` and `--from-snapshot`: generating the xcconfig files
+from a single file capturing an Xcode install."""
+
+import io
+import unittest
+from unittest import mock
+
+from support import (
+    TempDirTestCase,
+    make_fake_xcode,
+    read_xcconfig_files,
+    write_file,
+)
+
+# pylint: disable=wrong-import-order
+import cli
+import snapshot
+import warnings2xcconfig
+
+
+class SnapshotTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        self.snapshot_path = self.tmp_path("Xcode.waxsnap")
+
+        stderr_patcher = mock.patch("sys.stderr", new_callable=io.StringIO)
+        self.stderr = stderr_patcher.start()
+        self.addCleanup(stderr_patcher.stop)
+
+        snapshot.main(["-x", self.xcode_path, "--no-cache", "-o", self.snapshot_path])
+
+    def generate(self, output_dir, *argv):
+        """Generate every style of xcconfig file, and return their contents."""
+        args = cli.parse_script_args(
+            [*argv, "--all-styles", "--analyzer-alpha", "--no-cache", "-o", output_dir]
+        )
+        warnings2xcconfig.run(args)
+
+        return read_xcconfig_files(output_dir)
+
+    def test_same_files_as_from_xcode(self):
+        from_xcode = self.generate(self.tmp_path("xcode"), "-x", self.xcode_path)
+        from_snapshot = self.generate(
+            self.tmp_path("snapshot"), "--from-snapshot", self.snapshot_path
+        )
+
+        self.assertEqual(len(from_xcode), 4)
+        self.assertEqual(from_snapshot, from_xcode)
+        self.assertIn("Wrote", self.stderr.getvalue())
+
+    def test_rejects_damaged_snapshots(self):
+        with open(self.snapshot_path, "rb") as snapshot_fp:
+            content = snapshot_fp.read()
+        damaged_snapshots = {
+            "empty": (b"", "is empty"),
+            "bad magic": (b"WAXSNAQ\n" + content[8:], "is not a snapshot"),
+            "truncated header": (content[:20], "is truncated or damaged"),
+            "truncated section": (content[:-10], "is truncated or damaged"),
+        }
+        for name, (damaged_content, message) in damaged_snapshots.items():
+            with self.subTest(name):
+                damaged_path = write_file(
+                    self.tmp_path(f"{name}.waxsnap"), damaged_content
+                )
+
+                with self.assertRaisesRegex(snapshot.SnapshotError, message):
+                    snapshot.read_snapshot(
+                        damaged_path, ["clang", "swift"], ["-analyzer-checker-help"]
+                    )
+
+    def test_missing_section(self):
+        with self.assertRaisesRegex(snapshot.SnapshotError, "has no checkers:-x"):
+            snapshot.read_snapshot(self.snapshot_path, ["clang"], ["-x"])
+
+    def test_reports_damaged_snapshot(self):
+        damaged_path = write_file(self.tmp_path("damaged.waxsnap"), b"garbage")
+        argv = ["warnings2xcconfig.py", "--from-snapshot", damaged_path]
+
+        with mock.patch("sys.argv", argv), self.assertRaises(SystemExit) as context:
+            warnings2xcconfig.main()
+
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn(
+            f"error: {damaged_path} is not a snapshot", self.stderr.getvalue()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""`--watch`: the xcconfig files are updated when the Xcode install changes,
+and only the ones whose content changed are written."""
+
+import io
+import os
+import plistlib
+import threading
+import time
+import unittest
+from os import path
+from unittest import mock
+
+from support import (
+    VERSION_PLIST_REL_PATH,
+    TempDirTestCase,
+    make_fake_xcode,
+    write_file,
+)
+
+# pylint: disable=wrong-import-order
+import cli
+import generate
+import synthetic
+import watch
+import xcode
+
+# How long to wait for the watcher to update the files, in seconds
+UPDATE_TIMEOUT = 10
+
+
+class WatchTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        self.output_dir = self.tmp_path("out")
+        args = cli.parse_script_args(
+            ["-x", self.xcode_path, "--all-styles", "--no-cache", "-o", self.output_dir]
+        )
+
+        stderr_patcher = mock.patch("sys.stderr", new_callable=io.StringIO)
+        stderr_patcher.start()
+        self.addCleanup(stderr_patcher.stop)
+
+        stop = threading.Event()
+        self.watch = watch.OutputDirWatch(
+            args, watch.PollingWatcher(interval=0.05), stop, debounce=0.2
+        )
+        thread = threading.Thread(target=self.watch.run, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(stop.set)
+
+        self.wait_for_update(1)
+
+    def wait_for_update(self, updates):
+        deadline = time.monotonic() + UPDATE_TIMEOUT
+        while self.watch.updates < updates:
+            if time.monotonic() > deadline:
+                self.fail(f"Update {updates} didn't happen")
+            time.sleep(0.05)
+
+    def written_files(self):
+        """Return a {filename: stamp} dict, the stamp changing when the file
+        is written again (it is replaced, not modified in place)."""
+        return {
+            filename: (stat.st_ino, stat.st_mtime_ns)
+            for filename in os.listdir(self.output_dir)
+            if filename.endswith(".xcconfig")
+            for stat in [os.stat(path.join(self.output_dir, filename))]
+        }
+
+    def rewritten_files(self, change_install):
+        before = self.written_files()
+        updates = self.watch.updates
+        change_install()
+        self.wait_for_update(updates + 1)
+
+        after = self.written_files()
+        return sorted(name for name, stamp in after.items() if before[name] != stamp)
+
+    def test_rewrites_files_whose_content_changed(self):
+        self.assertEqual(
+            sorted(self.written_files()),
+            [
+                generate.xcconfig_filename(style)
+                for style in sorted(generate.ALL_DEFAULTS_STYLES)
+            ],
+        )
+
+        def change_xcode_defaults():
+            write_file(
+                path.join(self.xcode_path, synthetic.TEMPLATE_INFO_REL_PATH),
+                synthetic.template_info_plist(40, every=2),
+            )
+
+        self.assertEqual(
+            self.rewritten_files(change_xcode_defaults),
+            [generate.xcconfig_filename("xcode")],
+        )
+
+        def change_version():
+            version_plist = {
+                "CFBundleShortVersionString": "99.1",
+                "ProductBuildVersion": "99B1",
+            }
+            write_file(
+                path.join(self.xcode_path, VERSION_PLIST_REL_PATH),
+                plistlib.dumps(version_plist),
+            )
+
+        # The version is in the header of every file
+        self.assertEqual(
+            self.rewritten_files(change_version), sorted(self.written_files())
+        )
+        xcode_defaults_path = path.join(
+            self.output_dir, generate.xcconfig_filename("xcode")
+        )
+        with open(xcode_defaults_path, encoding="utf-8") as xcconfig_fp:
+            self.assertIn("for Xcode 99.1 (99B1)", xcconfig_fp.readline())
+
+    def test_touched_install_rewrites_nothing(self):
+        xcspec_path = xcode.named_xcspec_path(self.xcode_path, "clang")
+
+        self.assertEqual(self.rewritten_files(lambda: os.utime(xcspec_path)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
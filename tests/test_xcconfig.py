@@ -0,0 +1,189 @@
+"""`evaluate`: the effective values of layered xcconfig files, resolved like
+Xcode does."""
+
+import io
+import unittest
+from unittest import mock
+
+from support import TempDirTestCase, make_fake_xcode, write_file
+
+# pylint: disable=wrong-import-order
+import xcconfig
+
+
+class EvaluatorTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.loader = xcconfig.XcconfigLoader()
+
+    def write_xcconfig(self, name, content):
+        return write_file(self.tmp_path(name), content)
+
+    def evaluator(self, *contents, conditions=None, base=None):
+        """Return an Evaluator of one layer per content, above the base
+        {name: value} layer."""
+        layers = [xcconfig.settings_layer(base or {}, self.loader)]
+        for index, content in enumerate(contents):
+            xcconfig_path = self.write_xcconfig(f"layer{index}.xcconfig", content)
+            layers.append(self.loader.load(xcconfig_path))
+        return xcconfig.Evaluator(layers, conditions)
+
+    def test_last_assignment_wins(self):
+        evaluator = self.evaluator("A = 1\nA = 2 // comment\n", "B = 3;\n")
+
+        self.assertEqual(evaluator.value("A"), "2")
+        self.assertEqual(evaluator.value("B"), "3")
+        self.assertEqual(evaluator.value("UNSET"), "")
+
+    def test_inherited(self):
+        evaluator = self.evaluator(
+            "FLAGS = $(inherited) -Wfile\nFLAGS = $(inherited) -Wagain\n",
+            "FLAGS = $(FLAGS) -Wtarget\nOTHER = $(inherited) -Wother\n",
+            base={"FLAGS": "-Wbase"},
+        )
+
+        self.assertEqual(evaluator.value("FLAGS"), "-Wbase -Wfile -Wagain -Wtarget")
+        # Nothing below
+        self.assertEqual(evaluator.value("OTHER"), " -Wother")
+
+    def test_references(self):
+        evaluator = self.evaluator(
+            "NAME = Warnings\n"
+            "PARENS = $(NAME)\n"
+            "BRACES = ${NAME}\n"
+            "BARE = $NAME.xcconfig\n"
+            "KIND = NAME\n"
+            "NESTED = $($(KIND))\n"
+            "LATER = $(DEFINED_BELOW)\n"
+            "DEFINED_BELOW = below\n"
+            "DOLLAR = 5$ )\n"
+        )
+
+        self.assertEqual(evaluator.value("PARENS"), "Warnings")
+        self.assertEqual(evaluator.value("BRACES"), "Warnings")
+        self.assertEqual(evaluator.value("BARE"), "Warnings.xcconfig")
+        self.assertEqual(evaluator.value("NESTED"), "Warnings")
+        self.assertEqual(evaluator.value("LATER"), "below")
+        self.assertEqual(evaluator.value("DOLLAR"), "5$ )")
+
+    def test_modifiers(self):
+        evaluator = self.evaluator(
+            "NAME = Warnings\n"
+            "LOWER = $(NAME:lower)\n"
+            "UPPER = $(NAME:upper)\n"
+            "DEFAULT = $(UNSET:default=NO)\n"
+            "NOT_DEFAULT = $(NAME:default=NO)\n"
+            "CHAINED = $(UNSET:default=Yes:upper)\n"
+            "IGNORED = $(NAME:base)\n"
+        )
+
+        self.assertEqual(evaluator.value("LOWER"), "warnings")
+        self.assertEqual(evaluator.value("UPPER"), "WARNINGS")
+        self.assertEqual(evaluator.value("DEFAULT"), "NO")
+        self.assertEqual(evaluator.value("NOT_DEFAULT"), "Warnings")
+        self.assertEqual(evaluator.value("CHAINED"), "YES")
+        self.assertEqual(evaluator.value("IGNORED"), "Warnings")
+
+    def test_reference_cycle(self):
+        evaluator = self.evaluator("A = $(B)\nB = x $(C)\nC = $(A)\n")
+
+        with self.assertRaisesRegex(xcconfig.XcconfigError, "Reference cycle: A -> "):
+            evaluator.value("A")
+
+    def test_unclosed_reference(self):
+        with self.assertRaisesRegex(xcconfig.XcconfigError, "Missing"):
+            self.evaluator("A = $(B\n")
+
+    def test_include(self):
+        self.write_xcconfig("Shared/Base.xcconfig", "A = base\nB = base\n")
+        evaluator = self.evaluator(
+            '#include "Shared/Base.xcconfig"\n'
+            '#include? "Missing.xcconfig"\n'
+            "B = $(inherited) target\n"
+        )
+
+        self.assertEqual(evaluator.value("A"), "base")
+        self.assertEqual(evaluator.value("B"), "base target")
+
+    def test_include_is_relative_to_the_including_file(self):
+        self.write_xcconfig("Shared/Base.xcconfig", '#include "Common.xcconfig"\n')
+        self.write_xcconfig("Shared/Common.xcconfig", "A = common\n")
+
+        evaluator = self.evaluator('#include "Shared/Base.xcconfig"\n')
+
+        self.assertEqual(evaluator.value("A"), "common")
+
+    def test_missing_include(self):
+        with self.assertRaisesRegex(xcconfig.XcconfigError, "Can't read"):
+            self.evaluator('#include "Missing.xcconfig"\n')
+
+    def test_include_cycle(self):
+        self.write_xcconfig("A.xcconfig", '#include "B.xcconfig"\n')
+        self.write_xcconfig("B.xcconfig", '#include? "A.xcconfig"\n')
+
+        with self.assertRaisesRegex(xcconfig.XcconfigError, "#include cycle"):
+            self.loader.load(self.tmp_path("A.xcconfig"))
+
+    def test_conditions(self):
+        content = (
+            "A = all\n"
+            "A[sdk=iphoneos*] = iphone\n"
+            "A[sdk=iphoneos*][config=Debug] = iphone debug\n"
+            "B[sdk=macosx*,arch=arm64] = mac arm\n"
+        )
+        evaluations = {
+            "none": ({}, "all", ""),
+            "iphone": ({"sdk": "iphoneos17.0"}, "iphone", ""),
+            "iphone debug": (
+                {"sdk": "iphoneos17.0", "config": "Debug"},
+                "iphone debug",
+                "",
+            ),
+            "mac": ({"sdk": "macosx14.0", "config": "Debug"}, "all", ""),
+            "mac arm": ({"sdk": "macosx14.0", "arch": "arm64"}, "all", "mac arm"),
+        }
+        for name, (conditions, a_value, b_value) in evaluations.items():
+            with self.subTest(name):
+                evaluator = self.evaluator(content, conditions=conditions)
+
+                self.assertEqual(evaluator.value("A"), a_value)
+                self.assertEqual(evaluator.value("B"), b_value)
+
+    def test_split_flags(self):
+        self.assertEqual(
+            xcconfig.split_flags("-Wa  -Wb"),
+            ["-Wa", "-Wb"],
+        )
+        self.assertEqual(
+            xcconfig.split_flags("-DNAME='a b' -Wc"),
+            ["-DNAME=a b", "-Wc"],
+        )
+
+
+class LoadOptionsTest(TempDirTestCase):
+    def test_includes_analyzer_and_ubsan_settings(self):
+        xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        args = xcconfig.parse_args(["-x", xcode_path, "--no-cache", "App.xcconfig"])
+
+        options = xcconfig.load_options(args)
+
+        categories = {option.category for option in options}
+        self.assertIn("UBSANPolicy", categories)
+        self.assertTrue(
+            any(option.name.startswith("CLANG_ANALYZER_") for option in options)
+        )
+
+    def test_errors_name_the_subcommand(self):
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit):
+                xcconfig.parse_args(
+                    ["--from-snapshot", self.tmp_path("missing"), "App.xcconfig"]
+                )
+
+        self.assertIn(
+            "warnings2xcconfig.py evaluate: error: snapshot", stderr.getvalue()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
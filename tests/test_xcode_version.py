@@ -0,0 +1,125 @@
+"""Finding the selected Xcode install, and reading its version from the bundle
+or, failing that, from `xcodebuild -version`."""
+
+import os
+import plistlib
+import unittest
+from os import path
+from unittest import mock
+
+from support import (
+    VERSION_PLIST_REL_PATH,
+    TempDirTestCase,
+    make_fake_xcode,
+    write_file,
+)
+
+# pylint: disable=wrong-import-order
+import xcode
+
+# What the stub xcodebuild prints
+XCODEBUILD_VERSION = ("99.0", "99A999")
+
+
+class XcodeVersionTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = make_fake_xcode(self.tmp_path("Xcode.app"))
+        self.version_plist_path = path.join(self.xcode_path, VERSION_PLIST_REL_PATH)
+
+    def write_plist(self, rel_path, plist):
+        write_file(path.join(self.xcode_path, rel_path), plistlib.dumps(plist))
+
+    def test_reads_version_plist(self):
+        self.write_plist(
+            VERSION_PLIST_REL_PATH,
+            {"CFBundleShortVersionString": "15.4", "ProductBuildVersion": "15F31d"},
+        )
+        # Fails if run
+        write_file(
+            xcode.xcodebuild_path(self.xcode_path),
+            "#!/bin/sh\nexit 1\n",
+            executable=True,
+        )
+
+        self.assertEqual(xcode.read_xcode_version(self.xcode_path), ("15.4", "15F31d"))
+
+    def test_reads_info_plist_without_version_plist(self):
+        os.remove(self.version_plist_path)
+        self.write_plist(
+            "Contents/Info.plist",
+            {"CFBundleShortVersionString": "15.4", "DTXcodeBuild": "15F31d"},
+        )
+
+        self.assertEqual(xcode.read_xcode_version(self.xcode_path), ("15.4", "15F31d"))
+
+    def test_runs_xcodebuild_without_plist(self):
+        os.remove(self.version_plist_path)
+
+        self.assertIsNone(xcode.read_bundle_version(self.xcode_path))
+        self.assertEqual(xcode.read_xcode_version(self.xcode_path), XCODEBUILD_VERSION)
+
+    def test_runs_xcodebuild_with_malformed_plist(self):
+        malformed_plists = {
+            "not a plist": b"\x00garbage",
+            "truncated": plistlib.dumps({"CFBundleShortVersionString": "15.4"})[:-20],
+            "not a dict": plistlib.dumps(["15.4", "15F31d"]),
+            "missing build": plistlib.dumps({"CFBundleShortVersionString": "15.4"}),
+            "not strings": plistlib.dumps(
+                {"CFBundleShortVersionString": 15.4, "ProductBuildVersion": 15}
+            ),
+        }
+        for name, content in malformed_plists.items():
+            with self.subTest(name):
+                write_file(self.version_plist_path, content)
+
+                self.assertIsNone(xcode.read_bundle_version(self.xcode_path))
+                self.assertEqual(
+                    xcode.read_xcode_version(self.xcode_path), XCODEBUILD_VERSION
+                )
+
+
+class SelectedXcodeTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.xcode_path = self.tmp_path("Xcode.app")
+        self.developer_dir = path.join(self.xcode_path, "Contents", "Developer")
+        os.makedirs(self.developer_dir)
+
+        env_patcher = mock.patch.dict(os.environ)
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+        os.environ.pop("DEVELOPER_DIR", None)
+
+    def patch_links(self, *link_paths):
+        links_patcher = mock.patch.object(xcode, "XCODE_SELECT_LINKS", link_paths)
+        links_patcher.start()
+        self.addCleanup(links_patcher.stop)
+
+    def test_developer_dir(self):
+        os.environ["DEVELOPER_DIR"] = self.developer_dir
+        self.patch_links(self.tmp_path("missing_link"))
+
+        self.assertEqual(xcode.selected_xcode_path(), self.xcode_path)
+
+    def test_xcode_select_link(self):
+        link_path = self.tmp_path("db", "xcode_select_link")
+        os.makedirs(path.dirname(link_path))
+        # Relative to the link's folder, like xcode-select may write it
+        os.symlink(path.join("..", "Xcode.app", "Contents", "Developer"), link_path)
+        self.patch_links(self.tmp_path("missing_link"), link_path)
+
+        self.assertEqual(xcode.selected_xcode_path(), self.xcode_path)
+
+    def test_developer_dir_wins_over_link(self):
+        other_developer_dir = self.tmp_path("Other.app", "Contents", "Developer")
+        link_path = self.tmp_path("xcode_select_link")
+        os.symlink(other_developer_dir, link_path)
+        self.patch_links(link_path)
+        os.environ["DEVELOPER_DIR"] = self.developer_dir
+
+        self.assertEqual(xcode.selected_xcode_path(), self.xcode_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""Parsing the options of the tools of a xcspec, which inherit the options of
+the tool they are BasedOn."""
+
+import unittest
+
+from support import TempDirTestCase, write_file
+
+# pylint: disable=wrong-import-order
+import synthetic
+import xcspec
+
+
+def tool(identifier, options=None, based_on=None, name=None):
+    """A xcspec tool, with Boolean options named options (inherited from the
+    tool it's based on when None)."""
+    xcspec_tool = {"Identifier": identifier, "Name": name or identifier}
+    if options is not None:
+        xcspec_tool["Options"] = [
+            {"Name": option_name, "Type": "Boolean", "Category": "Warnings"}
+            for option_name in options
+        ]
+    if based_on is not None:
+        xcspec_tool["BasedOn"] = based_on
+    return xcspec_tool
+
+
+def option_names(options_groups):
+    return sorted(option.name for group in options_groups for option in group.options)
+
+
+class BasedOnTest(TempDirTestCase):
+    def test_inherits_based_on_tool(self):
+        parser = xcspec.XSpecParser(
+            xcspec_root=[
+                tool("base", ["BASE_OPTION"], name="Base"),
+                tool("compiler", based_on="base"),
+            ]
+        )
+
+        options_groups = parser.parse_options("compiler")
+
+        self.assertEqual(option_names(options_groups), ["BASE_OPTION"])
+        self.assertEqual(options_groups[0].tool_name, "compiler")
+
+    def test_cycle(self):
+        parser = xcspec.XSpecParser(
+            xcspec_root=[
+                tool("a", ["A_OPTION"], based_on="b"),
+                tool("b", ["B_OPTION"], based_on="a"),
+            ]
+        )
+
+        with self.assertRaisesRegex(
+            xcspec.XcspecError, "Found a BasedOn cycle in xcspec: a -> b -> a"
+        ):
+            parser.parse_options("a")
+
+    def test_dangling_based_on(self):
+        parser = xcspec.XSpecParser(
+            xcspec_root=[tool("compiler", ["OPTION"], based_on="missing")]
+        )
+
+        with self.assertRaisesRegex(
+            xcspec.XcspecError, "Found no tool with identifier missing"
+        ):
+            parser.parse_options("compiler")
+
+    def test_unknown_tool(self):
+        parser = xcspec.XSpecParser(xcspec_root=[tool("compiler", ["OPTION"])])
+
+        with self.assertRaisesRegex(
+            xcspec.XcspecError, "Found no tool with identifier other"
+        ):
+            parser.parse_options("other")
+
+    def test_reading_only_some_tools_stops_at_cycles(self):
+        xcspec_path = write_file(
+            self.tmp_path("cycle.xcspec"),
+            synthetic.tools_text(
+                [
+                    tool("a", [], based_on="b"),
+                    tool("b", [], based_on="a"),
+                    tool("other", []),
+                ]
+            ),
+        )
+
+        tools = xcspec.XSpecParser.read_xcspec(xcspec_path, tool_identifiers=["a"])
+
+        self.assertEqual(sorted(t["Identifier"] for t in tools), ["a", "b"])
+        with self.assertRaises(xcspec.XcspecError):
+            xcspec.XSpecParser(xcspec_root=tools).parse_options("a")
+
+
+class QueryOptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.xcspec_root = [
+            tool("base", ["CLANG_WARN_BASE"], name="Base"),
+            {
+                **tool("compiler", based_on="base", name="Compiler"),
+                "Options": [
+                    {
+                        "Name": "CLANG_WARN_FLAG",
+                        "Type": "Boolean",
+                        "Category": "Other",
+                        "CommandLineArgs": {"YES": ["-Wflag"], "NO": []},
+                    },
+                    {
+                        "Name": "CLANG_WARN_BOTH",
+                        "Type": "Enumeration",
+                        "Values": ["YES", "YES_ERROR", "NO"],
+                        "Category": "WarningsPolicy",
+                        "CommandLineArgs": {"YES": ["-Wboth"], "NO": []},
+                    },
+                    {
+                        "Name": "CLANG_UBSAN_CHECK",
+                        "Type": "Boolean",
+                        "Category": "UBSANPolicy",
+                    },
+                    {"Name": "__INTERNAL", "Type": "Boolean", "Category": "Warnings"},
+                ],
+            },
+            tool("analyzer", ["CLANG_ANALYZER_CHECK"], based_on="compiler"),
+        ]
+        self.queries = [
+            xcspec.OptionsQuery(
+                "compiler", category_filter=r"^Warning", cli_args_filter=r"^-W"
+            ),
+            xcspec.OptionsQuery("compiler", category_filter=r"Policy"),
+            xcspec.OptionsQuery("analyzer"),
+            xcspec.OptionsQuery("base"),
+        ]
+
+    @staticmethod
+    def groups(options_groups):
+        return [
+            (group.tool_name, group.group_name, [o.name for o in group.options])
+            for group in options_groups
+        ]
+
+    def test_same_as_separate_queries(self):
+        results = xcspec.XSpecParser(xcspec_root=self.xcspec_root).query_options(
+            self.queries
+        )
+
+        separate_results = [
+            xcspec.XSpecParser(xcspec_root=self.xcspec_root).parse_options(
+                query.tool_identifier,
+                query.category_filter,
+                query.cli_args_filter,
+            )
+            for query in self.queries
+        ]
+        self.assertEqual(
+            [self.groups(result) for result in results],
+            [self.groups(result) for result in separate_results],
+        )
+        self.assertEqual(
+            self.groups(results[0]),
+            [
+                ("Compiler", "Other", ["CLANG_WARN_FLAG"]),
+                ("Compiler", "WarningsPolicy", ["CLANG_WARN_BOTH"]),
+            ],
+        )
+        self.assertEqual(
+            self.groups(results[1]),
+            [
+                ("Compiler", "WarningsPolicy", ["CLANG_WARN_BOTH"]),
+                ("Compiler", "UBSANPolicy", ["CLANG_UBSAN_CHECK"]),
+            ],
+        )
+
+    def test_options_are_parsed_once(self):
+        parser = xcspec.XSpecParser(xcspec_root=self.xcspec_root)
+
+        warnings, policies, _, _ = parser.query_options(self.queries)
+
+        # The 4 options of the compiler, the analyzer's and the base's
+        self.assertEqual(parser.parsed_options_count, 6)
+        self.assertIs(warnings[1].options[0], policies[0].options[0])
+
+    def test_based_on_tools_share_options(self):
+        parser = xcspec.XSpecParser(
+            xcspec_root=[
+                tool("base", ["CLANG_WARN_BASE"]),
+                tool("compiler", based_on="base"),
+            ]
+        )
+
+        compiler_groups, base_groups = parser.query_options(
+            [xcspec.OptionsQuery("compiler"), xcspec.OptionsQuery("base")]
+        )
+
+        self.assertEqual(parser.parsed_options_count, 1)
+        self.assertIs(compiler_groups[0].options[0], base_groups[0].options[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
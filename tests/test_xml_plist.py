@@ -0,0 +1,115 @@
+"""The reader of a single value of an XML property list, such as the default
+build settings of Xcode's project template."""
+
+import datetime
+import io
+import plistlib
+import unittest
+
+# Puts the scripts on sys.path
+import support  # noqa: F401  pylint: disable=unused-import
+
+# pylint: disable=wrong-import-order
+import xml_plist
+
+PLIST = {
+    "Kind": "Xcode.Xcode3.ProjectTemplateUnitKind",
+    "Project": {
+        "Configurations": {"Debug": {"ONLY_ACTIVE_ARCH": "YES"}},
+        "SharedSettings": {
+            "CLANG_WARN_EMPTY_BODY": "YES",
+            "Nested": {"Array": ["a", 1, 2.5, True, False]},
+            "Date": datetime.datetime(2024, 1, 2, 3, 4, 5),
+            "Data": b"\x00\x01",
+            "Empty": {},
+        },
+    },
+    "Last": "value",
+}
+
+
+class CountingReader(io.BytesIO):
+    """A file object remembering how much of it was read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.read_size = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.read_size += len(data)
+        return data
+
+
+def load_key_path(plist, key_path):
+    return xml_plist.load_key_path(io.BytesIO(plistlib.dumps(plist)), key_path)
+
+
+class LoadKeyPathTest(unittest.TestCase):
+    def test_nested_key_path(self):
+        key_paths = [
+            ("Project", "SharedSettings"),
+            ("Project", "SharedSettings", "Nested"),
+            ("Project", "SharedSettings", "Nested", "Array"),
+            ("Project", "SharedSettings", "CLANG_WARN_EMPTY_BODY"),
+            ("Project", "SharedSettings", "Empty"),
+            ("Project", "Configurations", "Debug"),
+            ("Last",),
+        ]
+        for key_path in key_paths:
+            with self.subTest(".".join(key_path)):
+                value = PLIST
+                for key in key_path:
+                    value = value[key]
+
+                self.assertEqual(load_key_path(PLIST, key_path), value)
+
+    def test_root(self):
+        self.assertEqual(load_key_path(PLIST, ()), PLIST)
+
+    def test_missing_key(self):
+        key_paths = [
+            ("Missing",),
+            ("Project", "Missing"),
+            ("Project", "SharedSettings", "Missing"),
+            # Same key, at another depth
+            ("SharedSettings",),
+            ("Project", "Debug"),
+        ]
+        for key_path in key_paths:
+            with self.subTest(".".join(key_path)):
+                with self.assertRaisesRegex(KeyError, ".".join(key_path)):
+                    load_key_path(PLIST, key_path)
+
+    def test_non_dict_intermediate_values(self):
+        plist = {
+            "String": "A",
+            "Array": [{"A": "in array"}, "A"],
+            "Dict": {"A": "in dict"},
+        }
+        for key_path in [("String", "A"), ("Array", "A"), ("Array", "0")]:
+            with self.subTest(".".join(key_path)):
+                with self.assertRaises(KeyError):
+                    load_key_path(plist, key_path)
+
+        self.assertEqual(load_key_path(plist, ("Dict", "A")), "in dict")
+
+    def test_stops_reading_once_found(self):
+        plist = {
+            "A": {"Target": "found"},
+            "Z": [f"padding {index}" for index in range(100_000)],
+        }
+        plist_fp = CountingReader(plistlib.dumps(plist))
+
+        self.assertEqual(xml_plist.load_key_path(plist_fp, ("A", "Target")), "found")
+        self.assertLess(plist_fp.read_size, len(plist_fp.getvalue()) // 10)
+
+    def test_unexpected_element(self):
+        plist_xml = b'<plist version="1.0"><dict><key>A</key><foo/></dict></plist>'
+
+        with self.assertRaisesRegex(ValueError, "Unexpected <foo>"):
+            xml_plist.load_key_path(io.BytesIO(plist_xml), ("A",))
+
+
+if __name__ == "__main__":
+    unittest.main()
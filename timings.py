@@ -0,0 +1,145 @@
+"""Hook points around the stages of a run, and a recorder of their timings.
+
+Every stage of a run (reading a xcspec, running clang, rendering a style...)
+is wrapped in `run_stage()`. Callables registered with `add_stage_hook()` are
+called with the `Stage` when it starts, and again when it finishes, so
+library callers can attach their own instrumentation:
+
+    def log_stage(stage):
+        if stage.finished:
+            print(stage.name, stage.wall_time, stage.counts)
+
+    timings.add_stage_hook(log_stage)
+
+Stages may run concurrently, in several threads, so hooks must be
+thread-safe.
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Bump this whenever the layout of the report changes
+REPORT_FORMAT_VERSION = 1
+
+# Kinds of stages
+STAGE = "stage"
+SUBPROCESS = "subprocess"
+
+_STAGE_HOOKS = []
+
+
+class Stage:
+    """A step of a run, handed to the stage hooks.
+
+    `counts` holds the number of items processed by the stage, as filled in
+    by the stage itself. The times are in seconds, `cpu_time` being the CPU
+    time of the thread which ran the stage (excluding subprocesses).
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    __slots__ = (
+        "name",
+        "kind",
+        "counts",
+        "thread_name",
+        "start_time",
+        "wall_time",
+        "cpu_time",
+        "finished",
+    )
+
+    def __init__(self, name, kind=STAGE):
+        self.name = name
+        self.kind = kind
+        self.counts = {}
+        self.thread_name = threading.current_thread().name
+        self.start_time = None
+        self.wall_time = None
+        self.cpu_time = None
+        self.finished = False
+
+
+def add_stage_hook(hook):
+    _STAGE_HOOKS.append(hook)
+
+
+def remove_stage_hook(hook):
+    _STAGE_HOOKS.remove(hook)
+
+
+@contextmanager
+def run_stage(name, kind=STAGE):
+    """Run the body of the with statement as a stage, yielding the Stage."""
+    stage = Stage(name, kind)
+    if not _STAGE_HOOKS:
+        yield stage
+        return
+
+    for hook in _STAGE_HOOKS:
+        hook(stage)
+
+    stage.start_time = time.perf_counter()
+    start_cpu_time = time.thread_time()
+    try:
+        yield stage
+    finally:
+        stage.wall_time = time.perf_counter() - stage.start_time
+        stage.cpu_time = time.thread_time() - start_cpu_time
+        stage.finished = True
+
+        for hook in _STAGE_HOOKS:
+            hook(stage)
+
+
+class TimingsRecorder:
+    """A stage hook collecting the finished stages into a JSON report."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def __call__(self, stage):
+        if not stage.finished:
+            return
+
+        record = {
+            "name": stage.name,
+            "thread": stage.thread_name,
+            "start": round(stage.start_time - self.origin, 6),
+            "wall_time": round(stage.wall_time, 6),
+            "cpu_time": round(stage.cpu_time, 6),
+        }
+        if stage.counts:
+            record["counts"] = dict(stage.counts)
+
+        with self._lock:
+            self.stages.append((stage.kind, record))
+
+    def add_records(self, records, **fields):
+        """Add records of another recorder (e.g. of a worker process)."""
+        with self._lock:
+            for kind, record in records:
+                self.stages.append((kind, dict(record, **fields)))
+
+    def report(self):
+        return {
+            "version": REPORT_FORMAT_VERSION,
+            "stages": [record for kind, record in self.stages if kind == STAGE],
+            "subprocesses": [
+                record for kind, record in self.stages if kind == SUBPROCESS
+            ],
+        }
+
+    def write_report(self, file_path):
+        """Write the report as JSON to file_path, or to stderr if it is "-"."""
+        report = json.dumps(self.report(), indent=2)
+        if file_path == "-":
+            print(report, file=sys.stderr)
+        else:
+            with open(file_path, "w", encoding="utf-8") as report_fp:
+                report_fp.write(report + "\n")
@@ -0,0 +1,443 @@
+"""Watch mode, keeping the xcconfig files of an output directory up to date.
+
+`warnings2xcconfig.py --watch --output-dir DIR` writes the files once, then
+keeps watching the Xcode install they come from: the install selected with
+xcode-select (unless --xcode-path is given), its version file, its xcspecs,
+the project template's TemplateInfo.plist and the toolchain's clang.
+
+Changes are noticed through inotify on Linux, and by stat()-ing the files every
+few seconds elsewhere. Events only wake the watcher up: what changed is always
+decided by comparing the stat information of the files, once they stopped
+changing for a while (installing Xcode writes lots of files in a row).
+
+Only the files which changed are read again, the rest of the data read from
+Xcode being kept in memory, and only the xcconfig files whose content changed
+are written, so the builds using the others aren't invalidated. The manifest
+is kept up to date, for the runs without --watch.
+"""
+
+import ctypes
+import ctypes.util
+import functools
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from os import path
+
+from cache import open_file_cache, stat_stamp, write_file_atomically
+from generate import (
+    build_xcode_model,
+    iter_output_files,
+    manifest_keys,
+    read_inputs,
+)
+from manifest import REGENERATE, Manifest
+from timings import run_stage
+from xcode import (
+    XCODE_SELECT_LINKS,
+    analyzer_help_flags,
+    default_toolchain_bin_path,
+    format_xcode_version,
+    named_xcspec_path,
+    read_analyzer_checkers,
+    read_named_xcspec,
+    read_xcode_defaults,
+    read_xcode_version,
+    selected_xcode_path,
+    template_info_path,
+    xcode_input_paths,
+    xcode_version_plist,
+    xcodebuild_path,
+    xcspec_names,
+)
+
+# How long the watched files must stay unchanged before the xcconfig files are
+# updated, in seconds
+DEFAULT_DEBOUNCE = 1.0
+
+# How often the watched files are stat()-ed without inotify, in seconds
+DEFAULT_POLL_INTERVAL = 2.0
+
+# How often the watched files are stat()-ed even with inotify, in seconds.
+# Without the symlink written by xcode-select, switching Xcode changes no
+# file we can watch.
+RECHECK_INTERVAL = 60.0
+
+# How often a waiting watcher checks whether it should stop, in seconds
+_STOP_CHECK_INTERVAL = 0.5
+
+
+class PollingWatcher:
+    """Only wakes up every interval seconds: the watched files are stat()-ed
+    by the caller."""
+
+    def __init__(self, interval=DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+
+    def wait(self, directories, timeout, stop):
+        # pylint: disable=unused-argument
+        # Same interface as InotifyWatcher.wait()
+        stop.wait(min(timeout, self.interval))
+        return False
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Wakes up on any change to the entries of the watched directories."""
+
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    # IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    _EVENTS_MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400 | 0x800
+
+    def __init__(self, libc):
+        self._libc = libc
+        # IN_NONBLOCK and IN_CLOEXEC are O_NONBLOCK and O_CLOEXEC
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    @classmethod
+    def create(cls):
+        """Return an InotifyWatcher, or None where inotify isn't available."""
+        if not sys.platform.startswith("linux"):
+            return None
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [
+                ctypes.c_int,
+                ctypes.c_char_p,
+                ctypes.c_uint32,
+            ]
+            return cls(libc)
+        except (OSError, AttributeError):
+            return None
+
+    def wait(self, directories, timeout, stop):
+        """Wait for a change in one of the directories, at most timeout
+        seconds, or until stop is set. Returns whether anything changed."""
+        # Directories replaced since the last call (e.g. by an Xcode update)
+        # are watched again. Watching a directory twice changes nothing.
+        for directory in directories:
+            self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), self._EVENTS_MASK
+            )
+
+        deadline = time.monotonic() + timeout
+        while not stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            readable, _, _ = select.select(
+                [self._fd], [], [], min(remaining, _STOP_CHECK_INTERVAL)
+            )
+            if readable:
+                self._read_events()
+                return True
+
+        return False
+
+    def _read_events(self):
+        # Which files the events are about doesn't matter
+        while True:
+            try:
+                if not os.read(self._fd, 65536):
+                    return
+            except BlockingIOError:
+                return
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(poll_interval=DEFAULT_POLL_INTERVAL):
+    return InotifyWatcher.create() or PollingWatcher(poll_interval)
+
+
+def _load_version(xcode_path, xcode_inputs):
+    xcode_inputs["version"] = read_xcode_version(xcode_path)
+
+
+def _load_xcspec(xcode_path, name, xcspec_cache, xcode_inputs):
+    xcode_inputs["xcspecs"][name] = read_named_xcspec(xcode_path, name, xcspec_cache)
+
+
+def _load_xcode_defaults(xcode_path, xcode_inputs):
+    xcode_inputs["xcode_defaults"] = read_xcode_defaults(xcode_path)
+
+
+def _load_checkers(args, checkers_cache, xcode_inputs):
+    xcode_inputs["checkers"] = {
+        help_flag: read_analyzer_checkers(args, help_flag, checkers_cache)
+        for help_flag in analyzer_help_flags(args)
+    }
+
+
+def input_loaders(args, xcspec_cache=None, checkers_cache=None):
+    """Return a {file path: (key, load)} dict for the files of
+    xcode_input_paths(args), load(xcode_inputs) reading the file again
+    into xcode_inputs[key]."""
+    if args.from_snapshot:
+        return {
+            args.from_snapshot: (
+                "snapshot",
+                lambda xcode_inputs: xcode_inputs.update(read_inputs(args)),
+            )
+        }
+
+    xcode_path = args.xcode_path
+    version_plist = xcode_version_plist(xcode_path)
+    version_path = version_plist[0] if version_plist else xcodebuild_path(xcode_path)
+
+    loaders = {
+        version_path: ("version", functools.partial(_load_version, xcode_path)),
+        template_info_path(xcode_path): (
+            "xcode_defaults",
+            functools.partial(_load_xcode_defaults, xcode_path),
+        ),
+    }
+    for name in xcspec_names(args):
+        loaders[named_xcspec_path(xcode_path, name)] = (
+            "xcspecs",
+            functools.partial(_load_xcspec, xcode_path, name, xcspec_cache),
+        )
+    if args.analyzer_flags:
+        loaders[default_toolchain_bin_path(xcode_path, "clang")] = (
+            "checkers",
+            functools.partial(_load_checkers, args, checkers_cache),
+        )
+
+    return loaders
+
+
+def _read_text(file_path):
+    try:
+        with open(file_path, encoding="utf-8") as file_fp:
+            return file_fp.read()
+    except (OSError, ValueError):
+        return None
+
+
+class OutputDirWatch:
+    """Keeps args.output_dir up to date with the files of the Xcode install.
+
+    The state of the watched files is an (install path, {file path: stamp})
+    tuple, the stamp of missing files being None.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    # The data read from Xcode is kept in memory between updates
+
+    def __init__(self, args, watcher, stop, debounce=DEFAULT_DEBOUNCE):
+        self.args = args
+        self.watcher = watcher
+        self.stop = stop
+        self.debounce = debounce
+        self.follow_selected_xcode = args.xcode_path is None and not args.from_snapshot
+
+        self.xcspec_cache = open_file_cache(args, "xcspec")
+        self.checkers_cache = open_file_cache(args, "clang-checkers")
+
+        # What is in memory: the data read from Xcode, the options built from
+        # it, and the state of the files it was read from
+        self.xcode_inputs = None
+        self.model = None
+        self.loaded_state = None
+
+        # The number of finished updates of the output directory, failed or not
+        self.updates = 0
+
+    def read_state(self):
+        if self.follow_selected_xcode:
+            try:
+                self.args.xcode_path = selected_xcode_path()
+            except (OSError, subprocess.SubprocessError) as error:
+                # Keep watching the install selected last time
+                print(f"error: can't run xcode-select: {error}", file=sys.stderr)
+                if self.args.xcode_path is None:
+                    raise
+
+        stamps = {}
+        for input_path in xcode_input_paths(self.args):
+            try:
+                stamps[input_path] = stat_stamp(os.stat(input_path))
+            except OSError:
+                stamps[input_path] = None
+
+        return path.realpath(self.args.from_snapshot or self.args.xcode_path), stamps
+
+    def watched_directories(self, state):
+        xcode_path, stamps = state
+        directories = {path.dirname(input_path) for input_path in stamps}
+        # The install itself may be replaced, renamed, or switched to
+        directories.add(path.dirname(xcode_path))
+        if self.follow_selected_xcode:
+            directories.update(path.dirname(link) for link in XCODE_SELECT_LINKS)
+
+        return sorted(d for d in directories if path.isdir(d))
+
+    def settle(self, state):
+        """Wait until the watched files stay unchanged for self.debounce
+        seconds, and return their state, or None when stopped."""
+        while True:
+            changed = self.watcher.wait(
+                self.watched_directories(state), self.debounce, self.stop
+            )
+            if self.stop.is_set():
+                return None
+
+            new_state = self.read_state()
+            if not changed and new_state == state:
+                return state
+            state = new_state
+
+    def run(self):
+        state = self.read_state()
+        self.update(state)
+
+        while not self.stop.is_set():
+            self.watcher.wait(
+                self.watched_directories(state), RECHECK_INTERVAL, self.stop
+            )
+            if self.stop.is_set():
+                break
+
+            new_state = self.read_state()
+            if new_state == state:
+                continue
+
+            state = self.settle(new_state)
+            if state is None:
+                break
+            self.update(state)
+
+    def update(self, state):
+        """Read what changed in the install, and write the xcconfig files
+        whose content changed. Errors are reported, but don't stop watching:
+        Xcode may be in the middle of an update."""
+        try:
+            with run_stage("watch_update"):
+                self._update(state)
+        except Exception as error:  # pylint: disable=broad-except
+            print(f"error: {type(error).__name__}: {error}", file=sys.stderr)
+            # Read everything again next time
+            self.xcode_inputs = None
+            self.loaded_state = None
+        finally:
+            # Only once the files are written
+            self.updates += 1
+
+    def _update(self, state):
+        args = self.args
+        xcode_path, stamps = state
+        missing_paths = [p for p, stamp in stamps.items() if stamp is None]
+        if missing_paths:
+            raise FileNotFoundError(f"Missing {', '.join(missing_paths)}")
+
+        manifest = Manifest(args.output_dir)
+        input_files = manifest.input_files(list(stamps))
+        inputs_key, render_key = manifest_keys(args)
+
+        if (
+            self.xcode_inputs is not None
+            and self.loaded_state[0] == xcode_path
+            and self.loaded_state[1].keys() == stamps.keys()
+        ):
+            changed_keys = self._reload_changed(stamps)
+        else:
+            print(f"Reading {xcode_path}", file=sys.stderr)
+            self.xcode_inputs = None
+            if self.loaded_state is None and not args.force:
+                # Starting: what was read last time is still valid if none
+                # of the files changed since
+                status = manifest.status(input_files, inputs_key, render_key)
+                if status != REGENERATE:
+                    self.xcode_inputs = manifest.load_snapshot(
+                        xcspec_names(args), analyzer_help_flags(args)
+                    )
+            if self.xcode_inputs is None:
+                self.xcode_inputs = read_inputs(
+                    args, self.xcspec_cache, self.checkers_cache
+                )
+            changed_keys = None
+
+        # The version only appears in the files' header
+        if changed_keys != {"version"}:
+            self.model = build_xcode_model(args, self.xcode_inputs)
+        self.loaded_state = state
+
+        output_paths = self._write_changed_files()
+        manifest.save(
+            input_files, inputs_key, render_key, output_paths, self.xcode_inputs
+        )
+
+    def _reload_changed(self, stamps):
+        loaders = input_loaders(self.args, self.xcspec_cache, self.checkers_cache)
+
+        changed_keys = set()
+        for input_path, stamp in stamps.items():
+            if self.loaded_state[1][input_path] != stamp:
+                print(f"Changed: {input_path}", file=sys.stderr)
+                key, load = loaders[input_path]
+                load(self.xcode_inputs)
+                changed_keys.add(key)
+
+        return changed_keys
+
+    def _write_changed_files(self):
+        """Render every file, and only write the ones whose content changed.
+        Returns the paths of all the files."""
+        args = self.args
+        options_groups, analyzer_flags = self.model
+        xcode_version = format_xcode_version(*self.xcode_inputs["version"])
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_paths = []
+        written_count = 0
+        output_files = iter_output_files(
+            args, xcode_version, options_groups, analyzer_flags
+        )
+        for name, filename, xcconfig in output_files:
+            with run_stage(f"render {name}"):
+                content = "".join(xcconfig)
+
+            xcconfig_path = path.join(args.output_dir, filename)
+            output_paths.append(xcconfig_path)
+            if _read_text(xcconfig_path) != content:
+                write_file_atomically(xcconfig_path, [content])
+                print(f"Wrote {xcconfig_path}", file=sys.stderr)
+                written_count += 1
+
+        if not written_count:
+            print(f"{args.output_dir} is up to date", file=sys.stderr)
+
+        return output_paths
+
+
+def watch_output_dir(args, watcher=None, stop=None, debounce=DEFAULT_DEBOUNCE):
+    """Write the xcconfig files to args.output_dir, and update them whenever
+    the Xcode install changes, until interrupted or stop (a threading.Event)
+    is set. Returns the exit status."""
+    watcher = watcher or create_watcher()
+    stop = stop or threading.Event()
+
+    print(
+        f"Watching with {type(watcher).__name__}, press Ctrl-C to stop",
+        file=sys.stderr,
+    )
+    try:
+        OutputDirWatch(args, watcher, stop, debounce).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+    return 0
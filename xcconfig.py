@@ -0,0 +1,547 @@
+"""Evaluation of layered xcconfig files.
+
+Build settings are resolved the way Xcode resolves them: a setting's value is
+the one of its last assignment, in the highest layer defining it (e.g. the
+options catalog's defaults, then a project-level xcconfig, then a
+target-level xcconfig). `$(inherited)` refers to the assignment below it, and
+other `$(NAME)` references to the effective value of NAME.
+
+Files are parsed once, along with the files they `#include`, into tuples of
+interned strings shared by every target. Identical values are parsed only
+once too. Values are expanded on demand, and memoized per target:
+
+    loader = XcconfigLoader()
+    catalog = catalog_layer(options, "xcode")
+    for target_path in target_paths:
+        evaluator = Evaluator([catalog, loader.load(target_path)])
+        print(target_path, warning_flags(options, evaluator))
+
+`warnings2xcconfig.py evaluate` does this from the command line.
+"""
+
+import argparse
+import functools
+import json
+import re
+import shlex
+import sys
+from fnmatch import fnmatchcase
+from os import path
+
+from cache import default_cache_dir, open_file_cache
+from generate import load_options_groups
+from snapshot import SnapshotError, read_snapshot
+from xcode import read_xcode_defaults, read_xcspecs, selected_xcode_path, xcspec_names
+from xcspec import flatmap
+
+_ASSIGNMENT_RE = re.compile(
+    r"""
+    ^(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    (?P<conditions>(?:\[[^\]]*\])*)
+    \s*=\s*
+    (?P<value>.*?)
+    \s*;?\s*$
+    """,
+    re.VERBOSE,
+)
+_CONDITION_RE = re.compile(r"\[([^\]]*)\]")
+_INCLUDE_RE = re.compile(r'^#include(?P<optional>\?)?\s*"(?P<path>[^"]*)"\s*$')
+_COMMENT_RE = re.compile(r"//.*$")
+
+# Characters ending a literal run in a value: the start of a reference, or
+# the end of the reference being parsed
+_SPECIAL_CHARS_RE = re.compile(r"[$)}]")
+_BARE_REFERENCE_RE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)")
+
+_INHERITED = "inherited"
+
+
+class XcconfigError(Exception):
+    pass
+
+
+class Reference:
+    """A `$(NAME)` in a value. `name` is a str, or a tuple of parts when the
+    name itself contains references."""
+
+    __slots__ = ("name", "modifiers")
+
+    def __init__(self, name, modifiers=()):
+        self.name = name
+        self.modifiers = modifiers
+
+
+class Assignment:
+    __slots__ = ("name", "conditions", "value", "location")
+
+    def __init__(self, name, conditions, value, location=None):
+        self.name = name
+        # ((key, pattern), ...), e.g. (("sdk", "iphoneos*"),)
+        self.conditions = conditions
+        # Parts: str literals and References
+        self.value = value
+        self.location = location
+
+    def applies(self, conditions):
+        for key, pattern in self.conditions:
+            if key not in conditions or not fnmatchcase(conditions[key], pattern):
+                return False
+        return True
+
+
+def _reference(name_parts, text):
+    # Modifiers follow the name, e.g. $(PRODUCT_NAME:lower)
+    modifiers = ()
+    for index, part in enumerate(name_parts):
+        if isinstance(part, str) and ":" in part:
+            name_end, _, modifiers_text = part.partition(":")
+            modifiers_parts = (modifiers_text,) + name_parts[index:][1:]
+            if any(not isinstance(p, str) for p in modifiers_parts):
+                raise XcconfigError(f"Unsupported modifiers in {text!r}")
+            modifiers_text = "".join(modifiers_parts)
+            modifiers = tuple(sys.intern(m) for m in modifiers_text.split(":"))
+            name_parts = name_parts[:index] + ((name_end,) if name_end else ())
+            break
+
+    if len(name_parts) == 1 and isinstance(name_parts[0], str):
+        return Reference(sys.intern(name_parts[0]), modifiers)
+    return Reference(tuple(name_parts), modifiers)
+
+
+def _parse_parts(text, pos, closing):
+    """Parse text from pos up to the closing character (or the end when
+    closing is None). Returns (parts, position of the closing character)."""
+    parts = []
+    end = len(text)
+    while pos < end:
+        match = _SPECIAL_CHARS_RE.search(text, pos)
+        special_pos = match.start() if match else end
+        if special_pos > pos:
+            parts.append(sys.intern(text[pos:special_pos]))
+        pos = special_pos
+        if pos == end:
+            break
+
+        char = text[pos]
+        if char in ")}":
+            if char == closing:
+                return tuple(parts), pos
+            parts.append(char)
+            pos += 1
+            continue
+
+        next_char = text[pos + 1] if pos + 1 < end else ""
+        if next_char in ("(", "{"):
+            name_closing = ")" if next_char == "(" else "}"
+            name_parts, pos = _parse_parts(text, pos + 2, name_closing)
+            parts.append(_reference(name_parts, text))
+            pos += 1
+            continue
+
+        bare_match = _BARE_REFERENCE_RE.match(text, pos)
+        if bare_match:
+            parts.append(Reference(sys.intern(bare_match.group(1))))
+            pos = bare_match.end()
+        else:
+            parts.append("$")
+            pos += 1
+
+    if closing is not None:
+        raise XcconfigError(f"Missing {closing!r} in {text!r}")
+    return tuple(parts), pos
+
+
+class XcconfigLoader:
+    """Parses xcconfig files, each file only once however many targets
+    include it."""
+
+    def __init__(self):
+        # Parsed values, by text: most values ("YES", "NO"...) are shared by
+        # thousands of assignments
+        self._values = {}
+        self._files = {}
+
+    def parse_value(self, text):
+        value = self._values.get(text)
+        if value is None:
+            if "$" in text:
+                value, _ = _parse_parts(text, 0, None)
+            else:
+                value = (sys.intern(text),) if text else ()
+            self._values[text] = value
+        return value
+
+    def load(self, file_path):
+        """Return the assignments of file_path, with the assignments of the
+        files it includes in place of the #include lines."""
+        return self._load(path.realpath(file_path), ())
+
+    def _load(self, file_path, including_paths):
+        assignments = self._files.get(file_path)
+        if assignments is not None:
+            return assignments
+
+        if file_path in including_paths:
+            chain = " -> ".join(including_paths + (file_path,))
+            raise XcconfigError(f"#include cycle: {chain}")
+
+        try:
+            with open(file_path, encoding="utf-8") as xcconfig_fp:
+                lines = xcconfig_fp.read().splitlines()
+        except OSError as error:
+            raise XcconfigError(f"Can't read {file_path}: {error}") from error
+
+        assignments = []
+        for line_number, line in enumerate(lines, 1):
+            line = _COMMENT_RE.sub("", line).strip()
+            if not line:
+                continue
+            location = (file_path, line_number)
+
+            include_match = _INCLUDE_RE.match(line)
+            if include_match:
+                included_path = path.realpath(
+                    path.join(path.dirname(file_path), include_match.group("path"))
+                )
+                if include_match.group("optional") and not path.exists(included_path):
+                    continue
+                assignments += self._load(included_path, including_paths + (file_path,))
+                continue
+
+            match = _ASSIGNMENT_RE.match(line)
+            if not match:
+                raise XcconfigError(f"{file_path}:{line_number}: can't parse {line!r}")
+
+            assignments.append(
+                Assignment(
+                    sys.intern(match.group("name")),
+                    self._parse_conditions(match.group("conditions")),
+                    self.parse_value(match.group("value")),
+                    location,
+                )
+            )
+
+        assignments = tuple(assignments)
+        self._files[file_path] = assignments
+        return assignments
+
+    @staticmethod
+    def _parse_conditions(text):
+        conditions = []
+        for condition_group in _CONDITION_RE.findall(text):
+            for condition in condition_group.split(","):
+                key, _, pattern = condition.partition("=")
+                conditions.append((sys.intern(key.strip()), pattern.strip()))
+        return tuple(conditions)
+
+
+def settings_layer(settings, loader=None):
+    """Return a layer assigning each value of a {name: value} dict."""
+    loader = loader or XcconfigLoader()
+    return tuple(
+        Assignment(sys.intern(name), (), loader.parse_value(value))
+        for name, value in settings.items()
+    )
+
+
+def catalog_layer(options, style, loader=None):
+    """Return a layer with the value of each XcspecOption in a defaults
+    style, e.g. "clang" for what targets get when setting nothing, or "xcode"
+    for what new Xcode projects start with."""
+    return settings_layer(
+        {option.name: option.default_value_for_style(style) for option in options},
+        loader,
+    )
+
+
+def _inherits(parts, name):
+    return any(
+        isinstance(part, Reference) and part.name in (_INHERITED, name)
+        for part in parts
+    )
+
+
+def _appends(parts, name):
+    first = parts[0] if parts else None
+    return (
+        isinstance(first, Reference)
+        and first.name in (_INHERITED, name)
+        and not first.modifiers
+        and all(isinstance(part, str) for part in parts[1:])
+    )
+
+
+def _apply_modifiers(value, modifiers):
+    for modifier in modifiers:
+        if modifier == "lower":
+            value = value.lower()
+        elif modifier == "upper":
+            value = value.upper()
+        elif modifier.startswith("default="):
+            value = value or modifier.partition("=")[2]
+        # Other modifiers (e.g. paths manipulations) don't matter for warnings
+    return value
+
+
+class Evaluator:
+    """Effective values of the settings of a stack of layers, given from the
+    lowest to the highest.
+
+    Only assignments whose conditions match `conditions` (e.g.
+    {"sdk": "iphoneos17.0", "config": "Debug"}) are considered.
+    """
+
+    def __init__(self, layers, conditions=None):
+        conditions = conditions or {}
+        self._definitions = {}
+        for layer in layers:
+            for assignment in layer:
+                if assignment.conditions and not assignment.applies(conditions):
+                    continue
+                self._definitions.setdefault(assignment.name, []).append(
+                    assignment.value
+                )
+
+        self._memo = {}
+        self._in_progress = {}
+
+    def value(self, name):
+        """Return the effective value of a setting ("" when not set)."""
+        definitions = self._definitions.get(name)
+        if not definitions:
+            return ""
+        return self._expand(name, len(definitions) - 1)
+
+    def _expand(self, name, index):
+        definitions = self._definitions[name]
+        parts = definitions[index]
+        if len(parts) == 1 and isinstance(parts[0], str):
+            # A literal, like most values
+            return parts[0]
+
+        value = self._memo.get((name, index))
+        if value is not None:
+            return value
+
+        # Assignments only appending literals to the one below (generated
+        # files have one per analyzer flag) are joined at once, rather than
+        # copying a longer value at each level
+        suffixes = []
+        lowest = index
+        while lowest > 0 and _appends(definitions[lowest], name):
+            suffixes += reversed(definitions[lowest][1:])
+            lowest -= 1
+            if (name, lowest) in self._memo:
+                break
+        if lowest < index:
+            value = self._expand(name, lowest) + "".join(reversed(suffixes))
+            self._memo[(name, index)] = value
+            return value
+
+        # Expand the assignments below it which it inherits from first,
+        # bottom-up, so that long chains don't recurse as deep
+        while (
+            lowest > 0
+            and (name, lowest - 1) not in self._memo
+            and _inherits(definitions[lowest], name)
+        ):
+            lowest -= 1
+        for lower_index in range(lowest, index):
+            self._expand_one(name, lower_index)
+
+        return self._expand_one(name, index)
+
+    def _expand_one(self, name, index):
+        key = (name, index)
+        value = self._memo.get(key)
+        if value is not None:
+            return value
+
+        if key in self._in_progress:
+            chain = [n for n, _ in self._in_progress] + [name]
+            raise XcconfigError(f"Reference cycle: {' -> '.join(chain)}")
+
+        self._in_progress[key] = None
+        try:
+            value = "".join(
+                self._expand_part(part, name, index)
+                for part in self._definitions[name][index]
+            )
+        finally:
+            del self._in_progress[key]
+
+        self._memo[key] = value
+        return value
+
+    def _expand_part(self, part, name, index):
+        if isinstance(part, str):
+            return part
+
+        reference_name = part.name
+        if not isinstance(reference_name, str):
+            reference_name = "".join(
+                self._expand_part(p, name, index) for p in reference_name
+            )
+
+        # Like Xcode, a setting referencing itself gets the value below it
+        if reference_name in (_INHERITED, name):
+            value = self._expand(name, index - 1) if index > 0 else ""
+        else:
+            value = self.value(reference_name)
+
+        return _apply_modifiers(value, part.modifiers)
+
+
+def split_flags(text):
+    """Split a list of flags like Xcode does, quotes and backslashes escaping
+    spaces."""
+    if "'" in text or '"' in text or "\\" in text:
+        return shlex.split(text)
+    # Much faster, and what nearly every value needs
+    return text.split()
+
+
+def warning_flags(options, evaluator, split=split_flags):
+    """Return the warning flags the compiler gets: the arguments of each
+    XcspecOption for its effective value, then WARNING_CFLAGS."""
+    flags = []
+    for option in options:
+        flags += option.command_line_args_for_value(evaluator.value(option.name))
+    flags += split(evaluator.value("WARNING_CFLAGS"))
+    return flags
+
+
+def evaluate_targets(
+    options, target_paths, base_paths=(), style="clang", conditions=None
+):
+    """Evaluate each target-level xcconfig, above the catalog's defaults in
+    style and the base_paths xcconfigs (e.g. project-level ones).
+
+    Returns a dict of {"settings": {name: value}, "flags": [...]} by target.
+    """
+    loader = XcconfigLoader()
+    base_layers = [catalog_layer(options, style, loader)]
+    base_layers += [loader.load(base_path) for base_path in base_paths]
+
+    # Targets mostly share their WARNING_CFLAGS
+    split = functools.lru_cache(maxsize=64)(split_flags)
+
+    results = {}
+    for target_path in target_paths:
+        evaluator = Evaluator(base_layers + [loader.load(target_path)], conditions)
+        results[target_path] = {
+            "settings": {
+                option.name: evaluator.value(option.name) for option in options
+            },
+            "flags": warning_flags(options, evaluator, split),
+        }
+    return results
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="warnings2xcconfig.py evaluate",
+        description="Print, as JSON, the effective value of every warning "
+        "setting, and the resulting warning flags, of each target-level "
+        "xcconfig file.",
+    )
+    parser.add_argument("targets", nargs="+", metavar="XCCONFIG")
+    input_group = parser.add_mutually_exclusive_group()
+    input_group.add_argument(
+        "-x",
+        "--xcode-path",
+        metavar="PATH",
+        help="Xcode install the settings come from. If not specified, "
+        "`xcode-select -p` is used",
+    )
+    input_group.add_argument(
+        "--from-snapshot",
+        metavar="FILE",
+        help="read the settings from a snapshot instead of an Xcode install",
+    )
+    parser.add_argument(
+        "--base",
+        choices=["clang", "xcode"],
+        default="xcode",
+        help="defaults below the xcconfig files: clang's, or the ones of new "
+        "Xcode projects (default: xcode)",
+    )
+    parser.add_argument(
+        "-b",
+        "--base-xcconfig",
+        action="append",
+        default=[],
+        metavar="XCCONFIG",
+        help="xcconfig file layered below every target's, e.g. a "
+        "project-level one (can be repeated)",
+    )
+    parser.add_argument(
+        "-c",
+        "--condition",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="value of a setting condition, e.g. sdk=iphoneos17.0 or "
+        "config=Debug (can be repeated)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        help="don't cache the xcspecs read from Xcode",
+    )
+    # Every setting is evaluated, the Swift, analyzer and UBSan ones included
+    parser.set_defaults(
+        swift=True,
+        analyzer_flags=True,
+        localizability=True,
+        cache_dir=default_cache_dir(),
+        refresh_cache=False,
+    )
+
+    args = parser.parse_args(argv)
+    if args.from_snapshot and not path.isfile(args.from_snapshot):
+        parser.error(f"snapshot {args.from_snapshot} doesn't exist")
+    return args
+
+
+def load_options(args):
+    """Return the options catalog of the Xcode install or snapshot in args.
+
+    Only the build settings are evaluated: clang's analyzer checkers, and
+    Xcode's version, are never read.
+    """
+    if args.from_snapshot:
+        xcode_inputs = read_snapshot(args.from_snapshot, xcspec_names(args), [])
+        xcspecs = xcode_inputs["xcspecs"]
+        xcode_defaults = xcode_inputs["xcode_defaults"]
+    else:
+        if args.xcode_path is None:
+            args.xcode_path = selected_xcode_path()
+        xcspecs = read_xcspecs(args, open_file_cache(args, "xcspec"))
+        xcode_defaults = read_xcode_defaults(args.xcode_path)
+
+    options_groups = load_options_groups(args, xcspecs, xcode_defaults)
+    return list(flatmap(lambda g: g.options, options_groups))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    conditions = dict(condition.partition("=")[::2] for condition in args.condition)
+
+    try:
+        options = load_options(args)
+        results = evaluate_targets(
+            options, args.targets, args.base_xcconfig, args.base, conditions
+        )
+    except (XcconfigError, SnapshotError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
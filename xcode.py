@@ -0,0 +1,316 @@
+"""Locating an Xcode install, and reading the data the xcconfig files are
+generated from out of it."""
+
+import glob
+import os
+from os import path
+
+from clang_analyzer import STDOUT_ENCODING, ClangHelpParser
+from timings import SUBPROCESS, run_stage
+from xcspec import (
+    CLANG_XCSPEC_QUERIES,
+    SWIFT_XCSPEC_QUERIES,
+    XSpecParser,
+    queried_tools,
+)
+
+# Everything only needed to read Xcode (the plist parsers, subprocess,
+# concurrent.futures...) is imported by the functions using it: `--help`, and
+# runs finding their output up to date, never read Xcode and start faster
+# without them.
+
+XCODE_REL_PROJECT_TEMPLATE_INFO_PATH = (
+    "Contents/Developer/Library/Xcode/"
+    "Templates/Project Templates/Base/"
+    "Base_ProjectSettings.xctemplate/"
+    "TemplateInfo.plist"
+)
+
+# Where the version of an Xcode install is read from, without running
+# xcodebuild: (plist, key of the version, key of the build number)
+XCODE_VERSION_PLISTS = (
+    ("Contents/version.plist", "CFBundleShortVersionString", "ProductBuildVersion"),
+    ("Contents/Info.plist", "CFBundleShortVersionString", "DTXcodeBuild"),
+)
+
+# Symlinks to the developer directory selected with `xcode-select --switch`,
+# the current one first
+XCODE_SELECT_LINKS = (
+    "/var/db/xcode_select_link",
+    "/usr/share/xcode-select/xcode_dir_link",
+)
+
+
+# The xcspecs the options are read from, by name: (xcplugin, xcspec, queries)
+XCSPECS = {
+    "clang": ("Clang LLVM 1.0", None, CLANG_XCSPEC_QUERIES),
+    "swift": ("XCLanguageSupport", "Swift", SWIFT_XCSPEC_QUERIES),
+}
+
+
+def template_info_path(xcode_path):
+    return path.join(xcode_path, XCODE_REL_PROJECT_TEMPLATE_INFO_PATH)
+
+
+def read_xcode_defaults(xcode_path):
+    import xml_plist  # pylint: disable=import-outside-toplevel
+
+    with run_stage("read_xcode_defaults") as stage:
+        with open(template_info_path(xcode_path), "rb") as template_fp:
+            # Only the shared settings are built, the rest of the template
+            # is skipped
+            xcode_defaults = xml_plist.load_key_path(
+                template_fp, ("Project", "SharedSettings")
+            )
+        stage.counts["settings"] = len(xcode_defaults)
+
+    return xcode_defaults
+
+
+def find_developer_dir(environ=None):
+    """Return the developer directory `xcode-select -p` would print, when it
+    can be found without running it: from DEVELOPER_DIR (in environ, which
+    defaults to os.environ), or the symlink written by `xcode-select --switch`."""
+    developer_dir = (os.environ if environ is None else environ).get("DEVELOPER_DIR")
+    if developer_dir:
+        return developer_dir
+
+    for link_path in XCODE_SELECT_LINKS:
+        try:
+            target = os.readlink(link_path)
+        except OSError:
+            continue
+        return path.join(path.dirname(link_path), target)
+
+    return None
+
+
+def selected_xcode_path(environ=None):
+    """Return the Xcode install xcode-select selects, in the environ
+    environment (os.environ by default)."""
+    developer_dir = find_developer_dir(environ)
+    if developer_dir is None:
+        from subprocess import check_output  # pylint: disable=import-outside-toplevel
+
+        with run_stage("xcode-select -p", SUBPROCESS):
+            developer_dir = check_output(["xcode-select", "-p"], env=environ)
+        developer_dir = developer_dir.decode(STDOUT_ENCODING)
+
+    xcode_path = path.normpath(developer_dir.strip())
+    xcode_path = xcode_path.replace("/Contents/Developer", "")
+
+    return xcode_path
+
+
+def expand_xcode_paths(patterns):
+    xcode_paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            xcode_paths += sorted(glob.glob(pattern))
+        else:
+            xcode_paths.append(pattern)
+
+    # Remove duplicates, keeping the order
+    return list(dict.fromkeys(path.normpath(p) for p in xcode_paths))
+
+
+def xcspec_path(xcode_path, xcplugin, xcspec=None):
+    if not xcspec:
+        xcspec = xcplugin
+
+    path_template = (
+        "Contents/PlugIns/Xcode3Core.ideplugin/Contents/SharedSupport/"
+        "Developer/Library/Xcode/Plug-ins/{}.xcplugin/Contents/Resources/{}.xcspec"
+    )
+    rel_path = path_template.format(xcplugin, xcspec)
+    full_path = path.join(xcode_path, rel_path)
+
+    return full_path
+
+
+def default_toolchain_bin_path(xcode_path, bin_name):
+    path_template = "Contents/Developer/Toolchains/XcodeDefault.xctoolchain/usr/bin/{}"
+    rel_path = path_template.format(bin_name)
+    full_path = path.join(xcode_path, rel_path)
+
+    return full_path
+
+
+def xcodebuild_path(xcode_path):
+    return f"{xcode_path}/Contents/Developer/usr/bin/xcodebuild"
+
+
+def xcode_version_plist(xcode_path):
+    """Return the (path, version key, build key) of the plist the version of
+    the Xcode install is read from, or None if it has none."""
+    for rel_path, version_key, build_key in XCODE_VERSION_PLISTS:
+        plist_path = path.join(xcode_path, rel_path)
+        if path.isfile(plist_path):
+            return plist_path, version_key, build_key
+    return None
+
+
+def read_bundle_version(xcode_path):
+    """Return the (version, build) of the Xcode install from its bundle, or
+    None if they aren't found there."""
+    version_plist = xcode_version_plist(xcode_path)
+    if version_plist is None:
+        return None
+
+    # pylint: disable=import-outside-toplevel
+    import plistlib
+    from xml.parsers.expat import ExpatError
+
+    plist_path, version_key, build_key = version_plist
+    try:
+        with open(plist_path, "rb") as plist_fp:
+            plist = plistlib.load(plist_fp)
+    except (OSError, ValueError, ExpatError):
+        return None
+
+    if not isinstance(plist, dict):
+        return None
+    version = plist.get(version_key)
+    build = plist.get(build_key)
+    if not isinstance(version, str) or not isinstance(build, str):
+        return None
+
+    return version, build
+
+
+def read_xcode_version(xcode_path):
+    with run_stage("read_bundle_version"):
+        version_info = read_bundle_version(xcode_path)
+    if version_info is not None:
+        return version_info
+
+    # xcodebuild can take more than a second to start, only run it when the
+    # bundle doesn't tell
+    from subprocess import check_output  # pylint: disable=import-outside-toplevel
+
+    with run_stage("xcodebuild -version", SUBPROCESS):
+        output = check_output([xcodebuild_path(xcode_path), "-version"])
+    output = output.decode(STDOUT_ENCODING)
+    version, build = output.splitlines()
+    version = version.replace("Xcode", "").strip()
+    build = build.replace("Build version", "").strip()
+
+    return version, build
+
+
+def format_xcode_version(version, build):
+    return f"{version} ({build})"
+
+
+def parse_xcode_version(xcode_path):
+    version, build = read_xcode_version(xcode_path)
+    xcode_version = format_xcode_version(version, build)
+
+    return xcode_version
+
+
+def xcspec_names(args):
+    return ["clang", "swift"] if args.swift else ["clang"]
+
+
+def named_xcspec_path(xcode_path, name):
+    xcplugin, xcspec, _ = XCSPECS[name]
+    return xcspec_path(xcode_path, xcplugin, xcspec)
+
+
+def read_named_xcspec(xcode_path, name, xcspec_cache=None):
+    _, _, queries = XCSPECS[name]
+    return XSpecParser.read_xcspec(
+        named_xcspec_path(xcode_path, name), xcspec_cache, queried_tools(queries)
+    )
+
+
+def read_xcspecs(args, xcspec_cache=None):
+    with run_stage("read_xcspecs") as stage:
+        xcspecs = {
+            name: read_named_xcspec(args.xcode_path, name, xcspec_cache)
+            for name in xcspec_names(args)
+        }
+        stage.counts["tools"] = sum(len(root) for root in xcspecs.values())
+
+    return xcspecs
+
+
+def analyzer_help_flags(args):
+    if not args.analyzer_flags:
+        return []
+
+    help_flags = ["-analyzer-checker-help"]
+    if args.analyzer_alpha_flags:
+        help_flags.append("-analyzer-checker-help-alpha")
+
+    return help_flags
+
+
+def read_analyzer_checkers(args, help_flag, cache=None):
+    with run_stage(f"read_analyzer_checkers {help_flag}") as stage:
+        clang_bin_path = default_toolchain_bin_path(args.xcode_path, "clang")
+        help_parser = ClangHelpParser(clang_bin_path, help_flag=help_flag)
+        checkers = help_parser.read_checkers(cache=cache)
+        stage.counts["checkers_parsed"] = len(checkers)
+
+    return checkers
+
+
+def read_xcode_inputs(args, xcspec_cache=None, checkers_cache=None):
+    """Read everything the xcconfig files are derived from in args.xcode_path.
+
+    The external commands (`xcodebuild -version` and clang's checkers help) do
+    not depend on each other, nor on the xcspecs. They are run concurrently,
+    at most args.max_subprocesses at a time, while the xcspecs are parsed.
+    Clang's output is parsed as it is written.
+
+    Returns a dict of plain, picklable data, turned into options by
+    build_xcode_model(). None of our own settings (such as the tables of
+    tables.py) are applied yet.
+    """
+    # pylint: disable=import-outside-toplevel
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=args.max_subprocesses) as executor:
+        version_future = executor.submit(read_xcode_version, args.xcode_path)
+        checkers_futures = {
+            help_flag: executor.submit(
+                read_analyzer_checkers, args, help_flag, cache=checkers_cache
+            )
+            for help_flag in analyzer_help_flags(args)
+        }
+
+        xcspecs = read_xcspecs(args, xcspec_cache)
+        xcode_defaults = read_xcode_defaults(args.xcode_path)
+
+        checkers = {
+            help_flag: future.result() for help_flag, future in checkers_futures.items()
+        }
+        version_info = version_future.result()
+
+    return {
+        "version": version_info,
+        "xcspecs": xcspecs,
+        "xcode_defaults": xcode_defaults,
+        "checkers": checkers,
+    }
+
+
+def xcode_input_paths(args):
+    """Return the files of the Xcode install the xcconfig files come from."""
+    if args.from_snapshot:
+        return [args.from_snapshot]
+
+    version_plist = xcode_version_plist(args.xcode_path)
+    input_paths = [
+        version_plist[0] if version_plist else xcodebuild_path(args.xcode_path),
+        named_xcspec_path(args.xcode_path, "clang"),
+        template_info_path(args.xcode_path),
+    ]
+    if args.swift:
+        input_paths.append(named_xcspec_path(args.xcode_path, "swift"))
+    if args.analyzer_flags:
+        input_paths.append(default_toolchain_bin_path(args.xcode_path, "clang"))
+
+    return input_paths
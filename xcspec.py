@@ -0,0 +1,601 @@
+"""The options of Xcode's xcspecs, and how they are selected and rendered."""
+
+import itertools
+import re
+import sys
+
+from tables import (
+    AGGRESSIVE_DEFAULTS_EXCEPTIONS,
+    INGORED_BUILD_SETTINGS,
+    STRICT_DEFAULTS_EXCEPTIONS,
+)
+
+
+# Grabbed from https://stackoverflow.com/a/20037408/404321
+def flatmap(func, *iterable):
+    return itertools.chain.from_iterable(map(func, *iterable))
+
+
+# Grabbed from https://stackoverflow.com/a/953097/404321
+def flatten(list_of_lists):
+    return list(itertools.chain.from_iterable(list_of_lists))
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return ("list", tuple(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def intern_value(value, interned_values):
+    """Return a shared copy of value. Strings are interned with sys.intern(),
+    lists and dicts in interned_values, which is only kept for one parse:
+    batch workers parse each install in their own process, and for the
+    installs a server keeps loaded, the table takes more memory than the
+    values it would share."""
+    if isinstance(value, str):
+        return sys.intern(value)
+
+    if isinstance(value, list):
+        value = [intern_value(v, interned_values) for v in value]
+    elif isinstance(value, dict):
+        value = {
+            intern_value(k, interned_values): intern_value(v, interned_values)
+            for k, v in value.items()
+        }
+    else:
+        return value
+
+    return interned_values.setdefault(_freeze(value), value)
+
+
+# Marks a lazily computed attribute which wasn't computed yet
+_NOT_COMPUTED = object()
+
+
+class XcspecOptionsGroup:
+    __slots__ = (
+        "tool_name",
+        "group_name",
+        "options",
+        "display_name",
+        "tool_identifier",
+    )
+
+    _DISPLAY_NAMES = {
+        "WarningsObjCARC": "Warnings - Objective C and ARC",
+        "WarningsPolicy": "Warnings - Warning Policies",
+        "WarningsCXX": "Warnings - C++",
+        "WarningsObjC": "Warnings - Objective C",
+        "Warnings": "Warnings - All languages",
+        "LanguageModules": "Language - Modules",
+        "SAObjCCheckers": "Issues - Objective C",
+        "SASecurityCheckers": "Issues - Security",
+        "SAAppleAPICheckers": "Issues - Apple APIs",
+        "SACheckers": "Generic Issues",
+        "SAPolicy": "Analysis Policy",
+        "UBSANPolicy": "Undefined Behavior Sanitizer",
+    }
+
+    def __init__(self, tool_name, group_name, tool_identifier=None):
+        self.tool_name = tool_name
+        self.group_name = group_name
+        self.tool_identifier = tool_identifier
+        self.options = []
+
+        name = self.tool_name + " - "
+        name += self._DISPLAY_NAMES.get(self.group_name, self.group_name)
+        self.display_name = name
+
+    def iter_xcconfig(
+        self, default_values=None, add_doc=False, delta_from=None, values=None
+    ):
+        """With values, a {name: value} dict such as a profile's, only the
+        options in values are written, with these values."""
+        sorted_options = sorted(self.options, key=lambda o: o.name)
+        if values is not None:
+            sorted_options = [o for o in sorted_options if o.name in values]
+        if delta_from:
+            sorted_options = [
+                option
+                for option in sorted_options
+                if option.differs_between_styles(default_values, delta_from)
+            ]
+        if not sorted_options:
+            return
+
+        yield f"// {self.display_name}\n"
+
+        for option in sorted_options:
+            yield option.format_for_xcconfig(
+                default_values=default_values,
+                add_doc=add_doc,
+                value=values[option.name] if values is not None else None,
+            )
+
+        yield "\n"
+
+
+class XcspecOption:
+    # pylint: disable=too-many-instance-attributes
+
+    # Options are created by the thousands and read once per rendered style.
+    # Keep them compact, and compute everything derived from the xcspec only
+    # once.
+    __slots__ = (
+        "name",
+        "display_name",
+        "category",
+        "description",
+        "type",
+        "values",
+        "clang_default_value",
+        "raw_command_line_args",
+        "command_line_args",
+        "clang_analyzer_flags",
+        "xcode_default_value",
+        "_aggressive_default_value",
+        "_values_doc",
+    )
+
+    # The keys of a xcspec option read by from_xspec_dict()
+    XCSPEC_KEYS = (
+        "Name",
+        "DisplayName",
+        "Category",
+        "Description",
+        "Type",
+        "Values",
+        "DefaultValue",
+        "CommandLineArgs",
+    )
+
+    def __init__(self, xcspec_dict, interned_values=None):
+        self.from_xspec_dict(
+            xcspec_dict, {} if interned_values is None else interned_values
+        )
+        self.xcode_default_value = None
+
+    def from_xspec_dict(self, xcspec_dict, interned_values):
+        def get(key, default=None):
+            return intern_value(xcspec_dict.get(key, default), interned_values)
+
+        self.name = intern_value(xcspec_dict["Name"], interned_values)
+        self.display_name = get("DisplayName")
+        self.category = get("Category", "Others")
+        self.description = get("Description")
+        self.type = intern_value(xcspec_dict["Type"], interned_values)
+        self.values = get("Values")
+        self.clang_default_value = get("DefaultValue")
+        self.raw_command_line_args = get("CommandLineArgs")
+
+        self.command_line_args = self._flatten_command_line_args(
+            self.raw_command_line_args
+        )
+        self.clang_analyzer_flags = self._parse_clang_analyzer_flags(
+            self.command_line_args
+        )
+        self._aggressive_default_value = _NOT_COMPUTED
+        self._values_doc = _NOT_COMPUTED
+
+    @staticmethod
+    def _flatten_command_line_args(raw_command_line_args):
+        if not raw_command_line_args:
+            return ()
+
+        if isinstance(raw_command_line_args, list):
+            return raw_command_line_args
+
+        return tuple(itertools.chain.from_iterable(raw_command_line_args.values()))
+
+    @staticmethod
+    def _parse_clang_analyzer_flags(args):
+        if "-Xclang" not in args or "-analyzer-checker" not in args:
+            return ()
+        return tuple(arg for arg in args if not arg.startswith("-"))
+
+    @property
+    def aggressive_default_value(self):
+        # Computed lazily: this raises for options we don't know how to make
+        # aggressive, which is only an error when rendering such a style
+        if self._aggressive_default_value is _NOT_COMPUTED:
+            self._aggressive_default_value = self._compute_aggressive_default_value()
+
+        return self._aggressive_default_value
+
+    def _compute_aggressive_default_value(self):
+        if self.name in AGGRESSIVE_DEFAULTS_EXCEPTIONS:
+            return AGGRESSIVE_DEFAULTS_EXCEPTIONS[self.name]
+
+        default_value = None
+        if self.type == "Boolean":
+            default_value = self.aggressive_default_bool_value()
+        elif self.type == "Enumeration":
+            default_value = self.aggressive_default_enum_value(self.values)
+
+        if default_value is None:
+            msg = (
+                f"Unknown default value for {self.name} "
+                f"(Type : {self.type}; Values : {self.values})"
+            )
+            raise NotImplementedError(msg)
+
+        return default_value
+
+    @staticmethod
+    def aggressive_default_bool_value():
+        return "YES"
+
+    @staticmethod
+    def aggressive_default_enum_value(values):
+        if values == ["YES", "NO"]:
+            return "YES"
+        if "YES_AGGRESSIVE" in values:
+            return "YES_AGGRESSIVE"
+        if "YES_ERROR" in values:
+            return "YES_ERROR"
+        if set(values) == {"YES", "YES_NONAGGRESSIVE", "NO"}:
+            return "YES"
+        if set(values) == {"shallow", "deep"}:
+            return "deep"
+
+        return None
+
+    @property
+    def values_doc(self):
+        if self._values_doc is _NOT_COMPUTED:
+            if self.type == "Boolean":
+                value = "YES | NO"
+            elif self.type == "Enumeration":
+                value = " | ".join(self.values)
+            else:
+                value = self.type
+
+            self._values_doc = f"// {value}"
+
+        return self._values_doc
+
+    def default_value_for_style(self, style):
+        if style == "clang":
+            value = self.clang_default_value
+
+        elif style == "xcode":
+            value = self.xcode_default_value
+            if value is None:
+                value = self.clang_default_value
+
+        elif style == "strict":
+            if self.name in STRICT_DEFAULTS_EXCEPTIONS:
+                value = STRICT_DEFAULTS_EXCEPTIONS[self.name]
+            else:
+                value = self.aggressive_default_value
+
+        elif style == "aggressive":
+            value = self.aggressive_default_value
+
+        else:
+            value = self.values_doc
+
+        assert value is not None
+
+        return value
+
+    def differs_between_styles(self, style, other_style):
+        value = self.default_value_for_style(style)
+        return value != self.default_value_for_style(other_style)
+
+    def command_line_args_for_value(self, value):
+        """Return the arguments Xcode passes to the compiler for this value."""
+        raw_args = self.raw_command_line_args
+        if isinstance(raw_args, dict):
+            raw_args = raw_args.get(value, raw_args.get("<<otherwise>>"))
+        elif self.type == "Boolean" and value != "YES":
+            return ()
+
+        if not raw_args:
+            return ()
+        if isinstance(raw_args, str):
+            return (raw_args,)
+        return tuple(raw_args)
+
+    def format_for_xcconfig(self, default_values=None, add_doc=False, value=None):
+        if value is None:
+            value = self.default_value_for_style(default_values)
+
+        opt_str = ""
+
+        if add_doc and self.description:
+            name = self.display_name
+            doc = self.description
+            opt_str += f"// {name}: {doc}\n"
+
+        opt_str += f"{self.name} = {value}\n"
+
+        return opt_str
+
+
+class OptionsQuery:
+    """Selects the options of a xcspec tool, see XSpecParser.query_options().
+
+    An option matches if its category matches category_filter, or if one of
+    its command line arguments matches cli_args_filter. A query with no
+    filter matches every option of the tool.
+
+    The filters are compiled by the first matches() call, so that importing
+    the module and runs not parsing xcspecs don't compile them.
+    """
+
+    __slots__ = (
+        "tool_identifier",
+        "category_filter",
+        "cli_args_filter",
+        "_compiled_filters",
+    )
+
+    def __init__(self, tool_identifier, category_filter=None, cli_args_filter=None):
+        self.tool_identifier = tool_identifier
+        self.category_filter = category_filter
+        self.cli_args_filter = cli_args_filter
+        self._compiled_filters = None
+
+    def matches(self, xcspec_option):
+        if self._compiled_filters is None:
+            self._compiled_filters = tuple(
+                re.compile(pattern) if pattern else None
+                for pattern in (self.category_filter, self.cli_args_filter)
+            )
+        return XSpecParser.option_matches_filters(
+            xcspec_option, *self._compiled_filters
+        )
+
+
+# The options extracted from Xcode's xcspecs
+CLANG_WARNINGS_QUERY = OptionsQuery(
+    "com.apple.compilers.llvm.clang.1_0.compiler",
+    category_filter=r"^Warning",
+    cli_args_filter=r"^-W",
+)
+CLANG_UBSAN_POLICY_QUERY = OptionsQuery(
+    "com.apple.compilers.llvm.clang.1_0.compiler", category_filter=r"UBSANPolicy"
+)
+CLANG_ANALYZER_QUERY = OptionsQuery("com.apple.compilers.llvm.clang.1_0.analyzer")
+SWIFT_WARNINGS_QUERY = OptionsQuery(
+    "com.apple.xcode.tools.swift.compiler", category_filter=r"^Warning"
+)
+
+# All the queries run on each xcspec, whatever the options
+CLANG_XCSPEC_QUERIES = (
+    CLANG_WARNINGS_QUERY,
+    CLANG_UBSAN_POLICY_QUERY,
+    CLANG_ANALYZER_QUERY,
+)
+SWIFT_XCSPEC_QUERIES = (SWIFT_WARNINGS_QUERY,)
+
+
+def queried_tools(queries):
+    return sorted({query.tool_identifier for query in queries})
+
+
+class XcspecError(Exception):
+    pass
+
+
+class XSpecParser:
+    def __init__(self, filepath=None, cache=None, xcspec_root=None):
+        if xcspec_root is None:
+            xcspec_root = XSpecParser.read_xcspec(filepath, cache)
+        self.xcspec_root = xcspec_root
+        self.include_localization_options = False
+        self.parsed_options_count = 0
+
+        # When several tools share an identifier, the last one wins
+        self._tools_by_id = {tool["Identifier"]: tool for tool in self.xcspec_root}
+        self._resolved_tools = {}
+
+    @staticmethod
+    def read_xcspec(file_path, cache=None, tool_identifiers=None):
+        """Read a xcspec, or only the given tools (and the tools they are
+        BasedOn) when tool_identifiers is set."""
+
+        def load():
+            if tool_identifiers is None:
+                return XSpecParser._load_xcspec(file_path)
+            return XSpecParser._load_xcspec_tools(file_path, tool_identifiers)
+
+        if cache:
+            key = () if tool_identifiers is None else ("tools", tuple(tool_identifiers))
+            return cache.get_or_create(file_path, load, key=key)
+        return load()
+
+    @staticmethod
+    def _load_xcspec(file_path):
+        # Apple uses the old NeXTSTEP format for its xcspec, parse it directly
+        # instead of round-tripping through `plutil -convert xml1`
+        import openstep_plist  # pylint: disable=import-outside-toplevel
+
+        with open(file_path, "rb") as xcspec_fp:
+            return openstep_plist.load(xcspec_fp)
+
+    @staticmethod
+    def _load_xcspec_tools(file_path, tool_identifiers):
+        import openstep_plist  # pylint: disable=import-outside-toplevel
+
+        with open(file_path, "rb") as xcspec_fp:
+            items = openstep_plist.load_items(xcspec_fp, ("Identifier", "BasedOn"))
+
+        # When several tools share an identifier, the last one wins
+        items_by_id = {item.summary.get("Identifier"): item for item in items}
+
+        needed_ids = set()
+        for identifier in tool_identifiers:
+            while identifier in items_by_id and identifier not in needed_ids:
+                needed_ids.add(identifier)
+                identifier = items_by_id[identifier].summary.get("BasedOn")
+
+        # The other tools are skipped without being parsed
+        return [
+            item.load()
+            for identifier, item in items_by_id.items()
+            if identifier in needed_ids
+        ]
+
+    def _get_tool_with_id(self, tool_identifier):
+        if tool_identifier in self._resolved_tools:
+            return self._resolved_tools[tool_identifier]
+
+        # Walk up the 'BasedOn' chain until we reach a tool which is either
+        # already resolved, or not based on anything
+        chain = []
+        identifier = tool_identifier
+        while identifier not in self._resolved_tools:
+            if identifier in chain:
+                cycle = " -> ".join(chain + [identifier])
+                raise XcspecError(f"Found a BasedOn cycle in xcspec: {cycle}")
+
+            if identifier not in self._tools_by_id:
+                raise XcspecError(
+                    f"Found no tool with identifier {identifier} in xcspec"
+                )
+
+            chain.append(identifier)
+            identifier = self._tools_by_id[identifier].get("BasedOn")
+            if identifier is None:
+                break
+
+        # Then resolve the chain top-down, inheriting properties of the
+        # 'BasedOn' tool each time, and memoize every intermediate tool
+        based_on_tool = self._resolved_tools.get(identifier)
+        for identifier in reversed(chain):
+            xcspec_tool = self._tools_by_id[identifier]
+            if based_on_tool is not None:
+                full_tool = based_on_tool.copy()
+                full_tool.update(xcspec_tool)
+                xcspec_tool = full_tool
+
+            self._resolved_tools[identifier] = xcspec_tool
+            based_on_tool = xcspec_tool
+
+        return self._resolved_tools[tool_identifier]
+
+    def export_tools(self, tool_identifiers):
+        """Return a standalone xcspec with only the given tools.
+
+        BasedOn chains are resolved, and only what XSpecParser reads from
+        each tool and option is kept.
+        """
+        exported_tools = []
+        for tool_identifier in sorted(tool_identifiers):
+            xcspec_tool = self._get_tool_with_id(tool_identifier)
+            options = [
+                {key: option[key] for key in XcspecOption.XCSPEC_KEYS if key in option}
+                for option in xcspec_tool["Options"]
+            ]
+            exported_tools.append(
+                {
+                    "Identifier": tool_identifier,
+                    "Name": xcspec_tool["Name"],
+                    "Options": options,
+                }
+            )
+
+        return exported_tools
+
+    def parse_options(
+        self, tool_identifier, category_filter=None, cli_args_filter=None
+    ):
+        query = OptionsQuery(tool_identifier, category_filter, cli_args_filter)
+        return self.query_options([query])[0]
+
+    def query_options(self, queries):
+        """Run several OptionsQuery in a single pass over each tool's options.
+
+        Returns one list of options groups per query, in the same order. Each
+        option is only parsed and validated once, and an option matching
+        several queries is shared between their results.
+        """
+        results = [{} for _ in queries]
+        queries_by_tool = {}
+        for query, result in zip(queries, results):
+            tool_queries = queries_by_tool.setdefault(query.tool_identifier, [])
+            tool_queries.append((query, result))
+
+        # Tools inherit their options from the tool they're based on, so the
+        # same option dict may be found in several tools
+        parsed_options = {}
+        # Options often have identical values (e.g. the same Values list)
+        interned_values = {}
+        self.parsed_options_count = 0
+        for tool_identifier, tool_queries in queries_by_tool.items():
+            xcspec_tool = self._get_tool_with_id(tool_identifier)
+            xcspec_tool_name = xcspec_tool["Name"]
+
+            for option in xcspec_tool["Options"]:
+                xcspec_option = parsed_options.get(id(option), _NOT_COMPUTED)
+                if xcspec_option is _NOT_COMPUTED:
+                    xcspec_option = XcspecOption(option, interned_values)
+                    self.parsed_options_count += 1
+                    if not self.is_option_valid(xcspec_option):
+                        xcspec_option = None
+                    parsed_options[id(option)] = xcspec_option
+
+                if xcspec_option is None:
+                    continue
+
+                for query, options_groups in tool_queries:
+                    if query.matches(xcspec_option):
+                        XSpecParser._add_to_group(
+                            options_groups,
+                            xcspec_tool_name,
+                            xcspec_option,
+                            tool_identifier,
+                        )
+
+        return [list(options_groups.values()) for options_groups in results]
+
+    @staticmethod
+    def _add_to_group(
+        options_groups, xcspec_tool_name, xcspec_option, tool_identifier=None
+    ):
+        category = xcspec_option.category
+        if category not in options_groups:
+            new_group = XcspecOptionsGroup(xcspec_tool_name, category, tool_identifier)
+            options_groups[category] = new_group
+
+        options_groups[category].options.append(xcspec_option)
+
+    def is_option_valid(self, xcspec_option):
+        if (
+            xcspec_option.name in INGORED_BUILD_SETTINGS
+            or xcspec_option.name.startswith("__")
+            or xcspec_option.name.endswith("EXPERIMENTAL")
+        ):
+            return False
+
+        if xcspec_option.type in ["Path", "String"]:
+            return False
+
+        # Never include options depending on an user defined value
+        if any("$(value)" in arg for arg in xcspec_option.command_line_args):
+            return False
+
+        is_localization_option = "LOCALIZABILITY" in xcspec_option.name.upper()
+        if not self.include_localization_options and is_localization_option:
+            return False
+
+        return True
+
+    @staticmethod
+    def option_matches_filters(
+        xcspec_option, category_filter=None, cli_args_filter=None
+    ):
+        category = xcspec_option.category
+        if category_filter and category_filter.search(category):
+            return True
+
+        for arg in xcspec_option.command_line_args:
+            if cli_args_filter and cli_args_filter.search(arg):
+                return True
+
+        return category_filter is None and cli_args_filter is None
@@ -0,0 +1,121 @@
+"""Selective reader for XML property lists.
+
+`load_key_path()` streams an XML plist with `iterparse`, and only builds the
+value found at a path of dictionary keys (e.g. `Project.SharedSettings` of
+Xcode's project template). Every other element is discarded as soon as it
+has been read, and the file isn't read any further once the value is found.
+
+The value is built like `plistlib` would build it.
+"""
+
+import base64
+from datetime import datetime
+from xml.etree import ElementTree
+
+__all__ = ["load_key_path"]
+
+_CONTAINER_TAGS = ("dict", "array")
+
+
+def _integer(text):
+    if text.startswith(("0x", "0X")):
+        return int(text, 16)
+    return int(text)
+
+
+_SCALAR_BUILDERS = {
+    "string": lambda text: text,
+    "integer": _integer,
+    "real": float,
+    "true": lambda text: True,
+    "false": lambda text: False,
+    "date": lambda text: datetime.strptime(text, "%Y-%m-%dT%H:%M:%SZ"),
+    "data": base64.b64decode,
+}
+
+
+def _build(element):
+    if element.tag == "dict":
+        children = list(element)
+        return {
+            key.text or "": _build(value)
+            for key, value in zip(children[::2], children[1::2])
+        }
+    if element.tag == "array":
+        return [_build(child) for child in element]
+
+    try:
+        builder = _SCALAR_BUILDERS[element.tag]
+    except KeyError:
+        raise ValueError(f"Unexpected <{element.tag}> in property list") from None
+    return builder(element.text or "")
+
+
+class _Container:
+    __slots__ = ("on_path", "key")
+
+    def __init__(self, on_path):
+        self.on_path = on_path
+        self.key = None
+
+
+def _is_on_path(containers, key_path):
+    """Whether a value inside the innermost of containers is on key_path."""
+    depth = len(containers)
+    if depth == 0:
+        return True
+
+    parent = containers[-1]
+    return (
+        parent.on_path and depth <= len(key_path) and parent.key == key_path[depth - 1]
+    )
+
+
+def load_key_path(fp, key_path):
+    """Return the value at key_path, a sequence of dictionary keys, in the XML
+    property list read from the binary file object fp.
+
+    Raises KeyError when there is no such value.
+    """
+    key_path = tuple(key_path)
+    containers = []
+    # Depth of the value being built, once its start has been reached
+    target_depth = None
+
+    for event, element in ElementTree.iterparse(fp, events=("start", "end")):
+        tag = element.tag
+        if tag == "plist":
+            continue
+
+        if event == "start":
+            if tag not in _CONTAINER_TAGS:
+                continue
+
+            on_path = _is_on_path(containers, key_path)
+            if on_path and len(containers) == len(key_path):
+                target_depth = len(containers)
+            containers.append(_Container(on_path and tag == "dict"))
+            continue
+
+        if tag in _CONTAINER_TAGS:
+            containers.pop()
+        depth = len(containers)
+
+        if target_depth is not None and depth > target_depth:
+            # Part of the value being built
+            continue
+
+        if tag == "key":
+            if containers:
+                containers[-1].key = element.text or ""
+            element.clear()
+            continue
+
+        if depth == len(key_path) and _is_on_path(containers, key_path):
+            return _build(element)
+
+        element.clear()
+        if containers:
+            containers[-1].key = None
+
+    raise KeyError(".".join(key_path))